@@ -1,11 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict
-from app.schemas.analysis import AnalysisRequest, AnalysisResponse, TranslationRequest
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from typing import List, Dict, Optional
+from app.schemas.analysis import (
+    AnalysisRequest,
+    AnalysisResponse,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    TranslationRequest,
+    TranslationBatchRequest,
+    TranslationBatchResponse,
+)
 from app.schemas.chat import ChatRequest, ChatResponse
+from app.schemas.job import AnalysisJob
 from app.core.orchestrator import AnalysisOrchestrator
-from app.core.chat_orchestrator import ChatOrchestrator
+from app.core.chat_orchestrator import ChatOrchestrator, CHAT_FAILURE_MESSAGE
 from app.generation.generator import Generator
 from app.core.storage import storage
+from app.core.persistence import persistence_worker
+from app.core.response_cache import response_cache, IdempotencyConflictError
+from app.core.jobs import job_manager, JobQueueFullError, TERMINAL_STATUSES
+from app.core.llm_gateway import llm_gateway
+from app.core.prewarm import prewarm_scheduler
+from app.api.streaming import format_sse, sse_response
+from app.config.settings import settings
 
 
 router = APIRouter()
@@ -14,14 +31,37 @@ router = APIRouter()
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_funding_fit(
     request: AnalysisRequest,
+    response: Response,
+    refresh: bool = False,
+    idempotency_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
     orchestrator: AnalysisOrchestrator = Depends(AnalysisOrchestrator),
 ):
     # API Layer:Entry point for startup analysis.
-
+    # Resubmissions are served from storage unless ?refresh=true or
+    # "Cache-Control: no-cache" forces a fresh run.
+    bypass = refresh or "no-cache" in (cache_control or "").lower()
     try:
+        if not bypass:
+            cached = response_cache.lookup(request, idempotency_key)
+            if cached is not None:
+                response.headers["X-Cache"] = "HIT"
+                return cached
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def run():
         result = await orchestrator.run_analysis(request)
+        if idempotency_key:
+            result.metadata["idempotency_key"] = f"idem:{idempotency_key}"
         storage.save_analysis(result)
         return result
+
+    try:
+        response.headers["X-Cache"] = "MISS"
+        return await response_cache.get_or_run(request, idempotency_key, run)
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         import traceback
 
@@ -29,6 +69,95 @@ async def analyze_funding_fit(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_funding_fit_batch(
+    request: BatchAnalysisRequest,
+    orchestrator: AnalysisOrchestrator = Depends(AnalysisOrchestrator),
+):
+    # Bulk screening: one retrieval per (sector, geography, stage) cohort,
+    # per-item results with partial failures reported inline.
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {settings.BATCH_MAX_ITEMS})",
+        )
+
+    batch = await orchestrator.run_batch(request.items, request.max_concurrency)
+    for item in batch.results:
+        if item.result is not None:
+            storage.save_analysis(item.result)
+    return batch
+
+
+@router.post("/analyze/stream")
+async def analyze_funding_fit_stream(
+    request: AnalysisRequest,
+    orchestrator: AnalysisOrchestrator = Depends(AnalysisOrchestrator),
+):
+    # SSE variant of /analyze: one event per pipeline stage (evidence, reasoning,
+    # report, scores) with stage timings, then "complete" with the full response.
+
+    async def event_stream():
+        try:
+            async for stage, payload in orchestrator.stream_analysis(request):
+                if stage == "complete":
+                    storage.save_analysis(payload["data"])
+                yield format_sse(stage, payload)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield format_sse("error", {"detail": str(e)})
+
+    return sse_response(event_stream())
+
+
+@router.post("/jobs/analyze", response_model=AnalysisJob, status_code=202)
+async def submit_analysis_job(request: AnalysisRequest):
+    # Queues the analysis and returns immediately; poll /jobs/{job_id} or
+    # subscribe to /jobs/{job_id}/events for the result.
+    try:
+        return await job_manager.submit(request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get("/jobs", response_model=List[AnalysisJob])
+async def list_analysis_jobs(user_id: str = None):
+    return await job_manager.list(user_id)
+
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJob)
+async def get_analysis_job(job_id: str, user_id: str = None):
+    job = await job_manager.get(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str, user_id: str = None):
+    # SSE: emits the job every time its status changes, ends once it finished.
+    if not await job_manager.get(job_id, user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_status = None
+        while True:
+            job = await job_manager.get(job_id, user_id)
+            if job is None:
+                # Expired from the job log (ANALYSIS_JOB_RETENTION_SECONDS) meanwhile.
+                yield format_sse("error", {"detail": "Job not found"})
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield format_sse(job.status.value, job)
+            if job.status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(settings.ANALYSIS_JOB_POLL_SECONDS / 2)
+
+    return sse_response(event_stream())
+
+
 @router.get("/stats", response_model=Dict)
 async def get_stats(user_id: str = None):
     # for stats returning
@@ -51,9 +180,20 @@ async def get_analysis(analysis_id: str, user_id: str = None):
 
 
 @router.get("/evidence", response_model=List[Dict])
-async def get_all_evidence(user_id: str = None):
-    # unique evidenrces
-    return storage.get_all_evidence(user_id)
+async def get_all_evidence(
+    user_id: str = None,
+    sort: str = "first_seen",
+    order: str = "asc",
+    offset: int = 0,
+    limit: Optional[int] = None,
+):
+    # unique evidenrces, sort=usage_count&order=desc gives the most-cited sources
+    try:
+        return storage.get_all_evidence(
+            user_id, sort=sort, descending=order == "desc", offset=offset, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -66,20 +206,7 @@ async def chat_with_ai(
     
     try:
         response = await orchestrator.handle_chat(request)
-        
-        if request.user_id:
-            storage.save_chat_message(request.user_id, {
-                "role": "user",
-                "content": request.message,
-                "created_at": None 
-            })
-            storage.save_chat_message(request.user_id, {
-                "role": "assistant",
-                "content": response.answer,
-                "sources": [s.model_dump() for s in response.sources] if response.sources else [],
-                "created_at": None
-            })
-            
+        _save_chat_turn(request, response)
         return response
     except Exception as e:
         import traceback
@@ -87,6 +214,49 @@ async def chat_with_ai(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    orchestrator: ChatOrchestrator = Depends(ChatOrchestrator)
+):
+    # SSE variant of /chat: "sources" event, then "token" events, then "done".
+
+    async def event_stream():
+        try:
+            async for event, data in orchestrator.stream_chat(request):
+                if event == "done":
+                    # Persist the assembled answer before telling the client we're done.
+                    _save_chat_turn(request, data)
+                yield format_sse(event, data)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield format_sse("error", {"detail": str(e)})
+
+    return sse_response(event_stream())
+
+
+def _save_chat_turn(request: ChatRequest, response: ChatResponse):
+    if not request.user_id:
+        return
+    # analysis_id ties the messages to their chat session (server-side memory)
+    storage.save_chat_message(request.user_id, {
+        "role": "user",
+        "content": request.message,
+        "analysis_id": request.analysis_id,
+        "created_at": None
+    })
+    storage.save_chat_message(request.user_id, {
+        "role": "assistant",
+        "content": response.answer,
+        "analysis_id": request.analysis_id,
+        "sources": [s.model_dump() for s in response.sources] if response.sources else [],
+        # Failed turns stay visible in the UI but are left out of chat memory
+        "failed": response.answer == CHAT_FAILURE_MESSAGE,
+        "created_at": None
+    })
+
+
 @router.post("/translate")
 async def translate_text(
     request: TranslationRequest,
@@ -96,6 +266,23 @@ async def translate_text(
     
     translated = await generator.translate(request.text, request.target_language)
     return {"translated_text": translated}
+
+
+@router.post("/translate/batch", response_model=TranslationBatchResponse)
+async def translate_batch(
+    request: TranslationBatchRequest,
+    generator: Generator = Depends(Generator)
+):
+    # All strings of a page in one round trip; results come back in request order.
+    if len(request.texts) > settings.TRANSLATION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.texts)} texts (max {settings.TRANSLATION_BATCH_MAX_ITEMS})",
+        )
+    translations = await generator.translate_batch(request.texts, request.target_language)
+    return TranslationBatchResponse(translations=translations)
+
+
 @router.get("/intelligence", response_model=List[Dict])
 async def get_intelligence_library():
     return storage.get_intelligence_library()
@@ -106,3 +293,26 @@ async def get_chat_history(user_id: str):
     
     
     return storage.get_chat_history(user_id)
+
+
+@router.get("/system/persistence", response_model=Dict)
+async def get_persistence_stats():
+    # write-behind queue depth and flush latency
+    return persistence_worker.stats()
+
+
+@router.get("/system/jobs", response_model=Dict)
+async def get_job_stats():
+    return await job_manager.stats()
+
+
+@router.get("/system/prewarm", response_model=Dict)
+async def get_prewarm_stats():
+    # popular combos, what was warmed and the retrieval cache hit rate
+    return prewarm_scheduler.stats()
+
+
+@router.get("/system/llm", response_model=Dict)
+async def get_llm_stats():
+    # circuit breaker state and observed Gemini latency
+    return llm_gateway.stats()
@@ -0,0 +1,29 @@
+import json
+from typing import Any
+from fastapi.responses import StreamingResponse
+
+
+def _jsonable(data: Any) -> Any:
+    if hasattr(data, "model_dump"):
+        return data.model_dump(mode="json")
+    if hasattr(data, "to_dict"):
+        return data.to_dict(json_mode=True)
+    if isinstance(data, dict):
+        return {key: _jsonable(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_jsonable(value) for value in data]
+    return data
+
+
+def format_sse(event: str, data: Any) -> str:
+    # One Server-Sent Events frame; payloads are always JSON.
+    return f"event: {event}\ndata: {json.dumps(_jsonable(data))}\n\n"
+
+
+def sse_response(event_stream) -> StreamingResponse:
+    return StreamingResponse(
+        event_stream,
+        media_type="text/event-stream",
+        # Stop proxies (nginx, Render) from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -11,6 +11,132 @@ class Settings(BaseSettings):
 
     GOOGLE_API_KEY: Optional[str] = None
     ENABLE_VECTOR_DB: bool = False
+    # Evidence store snapshot (scripts/vector_snapshot.py) imported at boot
+    # when the vector DB is enabled and the collection does not hold it yet.
+    VECTOR_SNAPSHOT_PATH: Optional[str] = None
+
+    # Write-behind persistence: "always" (fsync every write), "interval"
+    # (group commit every PERSIST_FLUSH_INTERVAL_MS) or "none" (no fsync).
+    PERSIST_DURABILITY: str = "interval"
+    PERSIST_FLUSH_INTERVAL_MS: int = 200
+
+    # Max number of fully parsed AnalysisResponse objects kept in memory.
+    ANALYSIS_CACHE_SIZE: int = 256
+
+    # Evidence section of the report prompt (estimated tokens, ~4 chars each).
+    REPORT_EVIDENCE_TOKEN_BUDGET: int = 2500
+    REPORT_EVIDENCE_UNIT_TOKENS: int = 200
+
+    # /analyze/batch limits.
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_CONCURRENCY: int = 4
+
+    # Asynchronous analysis jobs (/jobs/analyze).
+    ANALYSIS_JOB_WORKERS: int = 2
+    ANALYSIS_JOB_QUEUE_LIMIT: int = 100
+    ANALYSIS_JOB_LEASE_SECONDS: int = 900
+    ANALYSIS_JOB_POLL_SECONDS: float = 2.0
+    # A job whose runs were interrupted (process died) this often is failed.
+    ANALYSIS_JOB_MAX_ATTEMPTS: int = 3
+    # Finished/failed jobs are dropped from the job log after this long.
+    ANALYSIS_JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+
+    # /analyze returns an identical earlier request's stored analysis within this window.
+    ANALYSIS_RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    # Idempotency-Keys answered from an earlier identical request, remembered per worker fleet.
+    ANALYSIS_IDEMPOTENCY_KEYS_SIZE: int = 10000
+
+    # Gemini call resilience (app/core/llm_gateway.py). Per-call timeouts are
+    # further capped by what is left of the request deadline.
+    ANALYSIS_DEADLINE_SECONDS: float = 90.0
+    CHAT_DEADLINE_SECONDS: float = 45.0
+    LLM_DEFAULT_TIMEOUT_SECONDS: float = 30.0
+    LLM_CALL_TIMEOUTS: Dict[str, float] = {
+        "search": 40.0, "report": 40.0, "chat": 30.0, "translate": 20.0, "expansion": 8.0,
+        "embedding": 5.0, "summary": 20.0,
+    }
+    LLM_MIN_CALL_SECONDS: float = 1.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Client-side Gemini rate limiting (app/core/rate_limiter.py), per process.
+    LLM_REQUESTS_PER_MINUTE: Dict[str, float] = {
+        "search": 30, "report": 30, "chat": 60, "translate": 60, "expansion": 60,
+        "embedding": 300, "summary": 20,
+    }
+    LLM_DEFAULT_REQUESTS_PER_MINUTE: float = 30
+    LLM_MAX_CONCURRENCY: Dict[str, int] = {
+        "search": 4, "report": 4, "chat": 8, "translate": 4, "expansion": 8,
+        "embedding": 8, "summary": 2,
+    }
+    LLM_DEFAULT_MAX_CONCURRENCY: int = 4
+    LLM_TOTAL_CONCURRENCY: int = 16
+    LLM_RATE_BURST_SECONDS: float = 10.0
+    LLM_RATE_LIMIT_RETRIES: int = 2
+    LLM_RATE_LIMIT_BACKOFF_SECONDS: float = 2.0
+    LLM_MIN_THROTTLE: float = 0.1
+
+    # Persistent translation cache (entries) and /translate/batch size limit.
+    TRANSLATION_CACHE_SIZE: int = 20000
+    TRANSLATION_BATCH_MAX_ITEMS: int = 200
+
+    # Session-scoped chat evidence: reused while questions stay close to it.
+    EMBEDDING_MODEL: str = "text-embedding-004"
+    CHAT_EVIDENCE_TTL_SECONDS: float = 1800
+    CHAT_EVIDENCE_MAX_SESSIONS: int = 1000
+    CHAT_EVIDENCE_MAX_UNITS: int = 24
+    CHAT_EVIDENCE_PER_TURN: int = 8
+    CHAT_EVIDENCE_MIN_SIMILARITY: float = 0.55
+    CHAT_EVIDENCE_MIN_SIMILARITY_LOCAL: float = 0.5
+
+    # Server-side chat memory: last N turns verbatim, older turns summarized
+    # in the background; the history prompt section never exceeds the cap.
+    CHAT_HISTORY_TURNS: int = 4
+    CHAT_HISTORY_TOKEN_CAP: int = 1500
+    CHAT_SUMMARY_TOKEN_CAP: int = 300
+    CHAT_SUMMARY_BATCH: int = 4
+    CHAT_MEMORY_MAX_SESSIONS: int = 1000
+
+    # English search queries for non-English chat messages (entries), and
+    # how many earlier questions of the conversation the expansion sees.
+    CHAT_EXPANSION_CACHE_SIZE: int = 2000
+    CHAT_EXPANSION_CONTEXT_TURNS: int = 2
+
+    # Semantic answer cache for standalone chat questions.
+    CHAT_ANSWER_CACHE_SIZE: int = 500
+    CHAT_ANSWER_CACHE_TTL_SECONDS: float = 6 * 3600
+    CHAT_ANSWER_CACHE_MIN_SIMILARITY: float = 0.92
+    CHAT_ANSWER_CACHE_MIN_SIMILARITY_LOCAL: float = 0.8
+
+    # Evidence units shared across retrieval tiers and workers, by content id.
+    EVIDENCE_CACHE_SIZE: int = 5000
+
+    # Description-free web-tier results reused per (sector, geography, stage).
+    RETRIEVAL_CACHE_SIZE: int = 1000
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 6 * 3600
+
+    # Pre-warm scheduler (app/core/prewarm.py): refreshes the retrieval cache
+    # for the most frequent combos of the last PREWARM_LOOKBACK_DAYS before
+    # entries expire, spending at most PREWARM_SEARCHES_PER_HOUR grounded
+    # searches. PREWARM_HOURS ("1-6", UTC) restricts it to off-peak hours.
+    PREWARM_ENABLED: bool = True
+    PREWARM_INTERVAL_SECONDS: float = 600
+    PREWARM_TOP_COMBOS: int = 20
+    PREWARM_LOOKBACK_DAYS: int = 30
+    PREWARM_REFRESH_AHEAD_SECONDS: float = 3600
+    PREWARM_SEARCHES_PER_HOUR: int = 20
+    PREWARM_HOURS: str = ""
+
+    # Investor index (app/core/investor_index.py): shortlist size for the
+    # report prompt / fallback, and the years over which recency decays.
+    INVESTOR_SHORTLIST_SIZE: int = 5
+    INVESTOR_RECENCY_YEARS: int = 5
+
+    # Extra validator rule packs (*.yaml); same-named packs shadow the
+    # built-in ones in app/reasoning/rule_packs.
+    VALIDATOR_RULE_PACKS_DIR: Optional[str] = None
 
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://127.0.0.1:5173"
 
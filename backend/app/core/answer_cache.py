@@ -0,0 +1,130 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.metrics import record_cache
+from app.rag.embeddings import embedder, similarity, LOCAL_SPACE
+
+
+ContextKey = Tuple[str, ...]
+
+
+class CachedAnswer:
+    __slots__ = ("question", "answer", "sources", "created_at", "hits", "similarity")
+
+    def __init__(self, question: str, answer: str, sources: List[Dict]):
+        self.question = question
+        self.answer = answer
+        self.sources = sources
+        self.created_at = time.monotonic()
+        self.hits = 0
+        self.similarity = 1.0
+
+
+class AnswerProbe:
+    # Result of a lookup; carries the question embedding so a miss can be
+    # stored without embedding the question again.
+    __slots__ = ("context", "question", "vector", "space", "hit")
+
+    def __init__(self, context: ContextKey, question: str, vector: np.ndarray, space: str, hit: Optional[CachedAnswer]):
+        self.context = context
+        self.question = question
+        self.vector = vector
+        self.space = space
+        self.hit = hit
+
+
+class _ContextIndex:
+    # Answers of one context in one embedding space: a matrix of question
+    # vectors plus the entries, row-aligned.
+    __slots__ = ("vectors", "entries")
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.entries: List[CachedAnswer] = []
+
+    def remove(self, keep: np.ndarray):
+        self.vectors = self.vectors[keep]
+        self.entries = [e for e, k in zip(self.entries, keep) if k]
+
+
+class SemanticAnswerCache:
+
+    # Small local vector index of answered chat questions. A new question
+    # whose embedding is close enough to a cached one *in the same context*
+    # (language, analysis, sector, geography, stage) gets the cached answer
+    # and sources without expansion, retrieval or generation.
+    # Entries expire after CHAT_ANSWER_CACHE_TTL_SECONDS; when full, the
+    # entry with the fewest hits for its age is evicted. Per process.
+
+    def __init__(self, capacity: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.capacity = capacity or settings.CHAT_ANSWER_CACHE_SIZE
+        self.ttl = ttl_seconds or settings.CHAT_ANSWER_CACHE_TTL_SECONDS
+        self._indexes: Dict[Tuple[ContextKey, str], _ContextIndex] = {}
+        self._size = 0
+
+    async def lookup(self, context: ContextKey, question: str) -> AnswerProbe:
+        vector, space = await embedder.embed([question])
+        index = self._indexes.get((context, space))
+        hit = None
+        if index is not None and index.entries:
+            self._expire(index)
+            if index.entries:
+                scores = similarity(vector[0], index.vectors, space, symmetric=True)
+                best = int(np.argmax(scores))
+                threshold = (
+                    settings.CHAT_ANSWER_CACHE_MIN_SIMILARITY_LOCAL if space == LOCAL_SPACE
+                    else settings.CHAT_ANSWER_CACHE_MIN_SIMILARITY
+                )
+                if scores[best] >= threshold:
+                    hit = index.entries[best]
+                    hit.hits += 1
+                    hit.similarity = float(scores[best])
+        record_cache("chat_answer", hit is not None)
+        return AnswerProbe(context, question, vector[0], space, hit)
+
+    def store(self, probe: AnswerProbe, answer: str, sources: List[Dict]):
+        # Evict first: it drops emptied indexes, which must not include this one.
+        if self._size >= self.capacity:
+            self._evict()
+        index = self._indexes.get((probe.context, probe.space))
+        if index is None:
+            index = self._indexes[(probe.context, probe.space)] = _ContextIndex(len(probe.vector))
+        index.vectors = np.vstack([index.vectors, probe.vector[None, :]])
+        index.entries.append(CachedAnswer(probe.question, answer, sources))
+        self._size += 1
+
+    def _expire(self, index: _ContextIndex):
+        now = time.monotonic()
+        keep = np.array([now - e.created_at <= self.ttl for e in index.entries], dtype=bool)
+        if not keep.all():
+            self._size -= int((~keep).sum())
+            index.remove(keep)
+
+    def _evict(self):
+        # Expired entries go first; otherwise the lowest hits-per-age entry.
+        for index in self._indexes.values():
+            self._expire(index)
+        if self._size < self.capacity:
+            return
+        now = time.monotonic()
+        victim_index, victim_row, victim_score = None, -1, None
+        for index in self._indexes.values():
+            for row, entry in enumerate(index.entries):
+                score = (entry.hits + 1) / (1.0 + (now - entry.created_at) / self.ttl)
+                if victim_score is None or score < victim_score:
+                    victim_index, victim_row, victim_score = index, row, score
+        if victim_index is not None:
+            keep = np.ones(len(victim_index.entries), dtype=bool)
+            keep[victim_row] = False
+            victim_index.remove(keep)
+            self._size -= 1
+        self._indexes = {k: v for k, v in self._indexes.items() if v.entries}
+
+    def stats(self) -> Dict:
+        return {"entries": self._size, "contexts": len(self._indexes), "capacity": self.capacity}
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,183 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.evidence_catalog import normalize_evidence_key, evidence_id_for
+from app.core.evidence_cache import evidence_cache
+from app.core.metrics import record_cache
+from app.rag.embeddings import embedder, embed_local, similarity, LOCAL_SPACE
+from app.schemas.analysis import AnalysisResponse
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+SessionKey = Tuple[str, str]
+
+
+def units_from_analysis(analysis: AnalysisResponse) -> List[EvidenceRecord]:
+    # Prompt-ready evidence for a stored analysis: the full units from the
+    # shared evidence cache when its ids are still there, else rebuilt from
+    # what the analysis stored. Older records have no excerpt; their title
+    # and usage reason stand in.
+    metadata = analysis.metadata or {}
+    cited = [ev.evidence_id for ev in analysis.evidence_used if ev.evidence_id]
+    cached = dict(zip(cited, evidence_cache.get_many(cited, metric="evidence"))) if cited else {}
+    units = []
+    for ev in analysis.evidence_used:
+        shared = cached.get(ev.evidence_id)
+        if shared is not None:
+            # The geography this analysis saw, not the shared copy's.
+            units.append(shared.with_context(shared.sector, ev.geography or shared.geography))
+            continue
+        try:
+            year = int(ev.year)
+        except (TypeError, ValueError):
+            year = 2024
+        try:
+            source_type = SourceType(ev.source_type)
+        except ValueError:
+            source_type = SourceType.NEWS
+        units.append(
+            EvidenceRecord(
+                evidence_id=ev.evidence_id or evidence_id_for(ev.title, ev.url),
+                source_type=source_type,
+                title=ev.title,
+                source_name=ev.source_name,
+                published_year=year,
+                url=ev.url,
+                sector=metadata.get("sector", "General"),
+                geography=ev.geography or metadata.get("geography"),
+                investors=ev.investors or [],
+                content=ev.excerpt or f"{ev.title}. {ev.usage_reason}",
+                usage_tags=ev.usage_tags or [ev.usage_reason],
+            )
+        )
+    return units
+
+
+class _ChatSession:
+    __slots__ = ("units", "refreshed_at")
+
+    def __init__(self, units: List, now: float):
+        self.units = units
+        self.refreshed_at = now
+
+
+class ChatEvidenceCache:
+
+    # Evidence per signed-in chat session (user_id, analysis_id), so follow-up
+    # questions reuse what was already retrieved instead of re-running the
+    # tiers (and the grounded web search) on every turn.
+    # - Seeded from the stored analysis' evidence_used on the first turn.
+    # - A turn is served from the cache when the question is close enough to
+    #   some cached unit (embedding similarity); otherwise it
+    #   retrieves, and the new evidence is merged into the session.
+    # - Sessions expire CHAT_EVIDENCE_TTL_SECONDS after their last refresh.
+    # Per process, like the other in-memory caches.
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_sessions: Optional[int] = None):
+        self.ttl = ttl_seconds or settings.CHAT_EVIDENCE_TTL_SECONDS
+        self.max_sessions = max_sessions or settings.CHAT_EVIDENCE_MAX_SESSIONS
+        self._sessions: "OrderedDict[SessionKey, _ChatSession]" = OrderedDict()
+
+    async def get_evidence(
+        self,
+        key: Optional[SessionKey],
+        query: str,
+        retrieve: Callable[[], Awaitable[List]],
+        seed: Optional[Callable[[], List]] = None,
+    ) -> List:
+        # key is None for anonymous chats: the analysis seed is still used,
+        # but nothing is kept for the next turn.
+        session = self._get(key) if key is not None else None
+        if session is None and seed is not None:
+            units = seed()
+            if units:
+                session = (
+                    self._put(key, units) if key is not None
+                    else _ChatSession(units[: settings.CHAT_EVIDENCE_MAX_UNITS], time.monotonic())
+                )
+
+        if session is not None:
+            ranked = await self._rank(session, query)
+            if ranked is not None:
+                record_cache("chat_evidence", True)
+                print(f"[*] [LOG] Chat evidence cache hit ({len(ranked)} units), skipping retrieval.")
+                return ranked
+
+        record_cache("chat_evidence", False)
+        units = await retrieve()
+        if key is not None:
+            self._merge(key, units)
+        return units
+
+    def has_session(self, key: Optional[SessionKey]) -> bool:
+        return key is not None and self._get(key) is not None
+
+    def invalidate(self, key: SessionKey):
+        self._sessions.pop(key, None)
+
+    def _get(self, key: SessionKey) -> Optional[_ChatSession]:
+        session = self._sessions.get(key)
+        if session is None:
+            return None
+        if time.monotonic() - session.refreshed_at > self.ttl:
+            del self._sessions[key]
+            return None
+        self._sessions.move_to_end(key)
+        return session
+
+    def _put(self, key: SessionKey, units: List) -> _ChatSession:
+        session = self._sessions[key] = _ChatSession(units[: settings.CHAT_EVIDENCE_MAX_UNITS], time.monotonic())
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def _merge(self, key: SessionKey, units: List):
+        # Fresh evidence first; cached units keep the remaining room.
+        session = self._sessions.get(key)
+        if session is None:
+            if units:
+                self._put(key, units)
+            return
+        merged, seen = [], set()
+        for ev in list(units) + session.units:
+            ev_key = normalize_evidence_key(ev.title, ev.url)
+            if ev_key in seen:
+                continue
+            seen.add(ev_key)
+            merged.append(ev)
+        self._put(key, merged)
+
+    async def _rank(self, session: _ChatSession, query: str) -> Optional[List]:
+        # Cached units ordered by similarity to the query, or None on drift.
+        # Unit embeddings come from the shared evidence cache, so a source
+        # is embedded once however many sessions cite it.
+        query_vec, space = await embedder.embed([query])
+        try:
+            vectors, _ = await evidence_cache.embed_units(session.units, space=space)
+        except Exception:
+            # The model went away between the two calls: compare locally.
+            query_vec, space = embed_local([query]), LOCAL_SPACE
+            vectors, _ = await evidence_cache.embed_units(session.units, space=space)
+
+        similarities = similarity(query_vec[0], vectors, space)
+        threshold = (
+            settings.CHAT_EVIDENCE_MIN_SIMILARITY_LOCAL if space == LOCAL_SPACE
+            else settings.CHAT_EVIDENCE_MIN_SIMILARITY
+        )
+        best = float(similarities.max()) if similarities.size else 0.0
+        if best < threshold:
+            print(f"[*] [LOG] Chat question drifted from cached evidence (best similarity {best:.2f} < {threshold}).")
+            return None
+        order = np.argsort(-similarities)[: settings.CHAT_EVIDENCE_PER_TURN]
+        return [session.units[i] for i in order]
+
+    def stats(self) -> Dict:
+        return {"sessions": len(self._sessions), "ttl_seconds": self.ttl}
+
+
+chat_evidence_cache = ChatEvidenceCache()
@@ -1,59 +1,304 @@
 import json
-from typing import List, Dict, Optional
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, AsyncIterator, Any
 from app.schemas.chat import ChatRequest, ChatResponse, ChatSource
 from app.rag.retriever import Retriever
 from app.generation.generator import Generator
 from app.core.storage import storage
+from app.core.chat_evidence_cache import chat_evidence_cache, units_from_analysis
+from app.core.conversation_memory import conversation_memory, CHAT_FAILURE_MESSAGE
+from app.core.answer_cache import answer_cache, AnswerProbe
+from app.core.metrics import span, record_fallback, record_cache
+from app.core.llm_gateway import llm_gateway, fallback_reason, request_deadline
+from app.config.settings import settings
 from google.genai import types
 
+
+# English search queries for non-English chat messages, keyed by
+# (language, earlier questions, message): the expansion prompt sees the
+# conversation's last questions, so a follow-up like "what about Series A?"
+# only reuses an expansion made in the same context. Shared by all requests
+# of this process.
+ExpansionKey = Tuple[str, Tuple[str, ...], str]
+_expansions: "OrderedDict[ExpansionKey, str]" = OrderedDict()
+
+
+def _expansion_key(request: ChatRequest, context: List[str]) -> ExpansionKey:
+    return (request.language, tuple(q.strip() for q in context), request.message.strip())
+
+
+def _cached_expansion(request: ChatRequest, context: List[str]) -> Optional[str]:
+    # The retrieval query when no model call is needed, else None.
+    if request.language == "en":
+        return request.message
+    key = _expansion_key(request, context)
+    query = _expansions.get(key)
+    record_cache("chat_expansion", query is not None)
+    if query is not None:
+        _expansions.move_to_end(key)
+    return query
+
+
+def _remember_expansion(request: ChatRequest, context: List[str], query: str):
+    _expansions[_expansion_key(request, context)] = query
+    while len(_expansions) > settings.CHAT_EXPANSION_CACHE_SIZE:
+        _expansions.popitem(last=False)
+
+
+class _PreparedTurn:
+    # Everything a chat turn needs after context, expansion and retrieval.
+    # `cached` is set (and prompt is None) when the semantic answer cache
+    # already answered the question; `probe` lets a fresh answer be cached.
+    __slots__ = ("session_key", "prompt", "sources", "cached", "probe")
+
+    def __init__(self, session_key, prompt: Optional[str], sources: List[ChatSource],
+                 cached: Optional[str] = None, probe: Optional[AnswerProbe] = None):
+        self.session_key = session_key
+        self.prompt = prompt
+        self.sources = sources
+        self.cached = cached
+        self.probe = probe
+
+
 class ChatOrchestrator:
     def __init__(self):
         self.retriever = Retriever()
         self.generator = Generator()
 
     async def handle_chat(self, request: ChatRequest) -> ChatResponse:
-        # 1. Fetch Context if analysis_id is provided
-        context_description = ""
-        sector = "General"
-        geography = "India"
-        stage = ""
-        
-        if request.analysis_id:
-            analysis = storage.get_analysis_by_id(request.analysis_id, request.user_id)
-            if analysis:
-                context_description = analysis.startup_summary
-                sector = analysis.metadata.get("sector", "General") if analysis.metadata else "General"
-                geography = analysis.metadata.get("geography", "India") if analysis.metadata else "India"
-                stage = analysis.metadata.get("stage", "") if analysis.metadata else ""
-
- 
-        retrieval_query = request.message
-        if request.language != "en":
-            try:
-                expansion_prompt = (
-                    f"Translate and expand the following user question into a professional English search query "
-                    f"for venture capital and market analysis.\n\n"
-                    f"Original Question: {request.message}\n"
-                    f"Context: {sector} startup in {geography}\n\n"
-                    "Output ONLY the English search query string."
-                )
-                expansion_resp = await self.generator.client.aio.models.generate_content(
+        with request_deadline(settings.CHAT_DEADLINE_SECONDS):
+            turn = await self._prepare(request)
+            if turn.cached is not None:
+                answer = turn.cached
+            else:
+                try:
+                    with span("chat_generation"):
+                        response = await llm_gateway.generate(
+                            "chat",
+                            self.generator.client,
+                            model="gemini-2.0-flash-exp",
+                            contents=turn.prompt,
+                            config=types.GenerateContentConfig(
+                                temperature=0.4
+                            )
+                        )
+                    answer = response.text.strip()
+                except Exception as e:
+                    print(f"[!] Chat generation failed: {e}")
+                    record_fallback("chat_answer", fallback_reason(e))
+                    answer = CHAT_FAILURE_MESSAGE
+
+        self._finish(request, turn, answer)
+        return ChatResponse(
+            answer=answer,
+            sources=turn.sources,
+            language=request.language
+        )
+
+    async def stream_chat(self, request: ChatRequest) -> AsyncIterator[Tuple[str, Any]]:
+        # Yields ("sources", [...]) as soon as retrieval is done, then ("token", text)
+        # chunks as Gemini produces them, and finally ("done", ChatResponse).
+        with request_deadline(settings.CHAT_DEADLINE_SECONDS):
+            turn = await self._prepare(request)
+            yield "sources", [s.model_dump() for s in turn.sources]
+
+            parts: List[str] = []
+            if turn.cached is not None:
+                parts.append(turn.cached)
+                yield "token", turn.cached
+            else:
+                try:
+                    async for chunk in llm_gateway.stream(
+                        "chat",
+                        self.generator.client,
+                        model="gemini-2.0-flash-exp",
+                        contents=turn.prompt,
+                        config=types.GenerateContentConfig(
+                            temperature=0.4
+                        )
+                    ):
+                        text = chunk.text
+                        if text:
+                            parts.append(text)
+                            yield "token", text
+                except Exception as e:
+                    print(f"[!] Chat streaming failed: {e}")
+                    if not parts:
+                        record_fallback("chat_answer", fallback_reason(e))
+                        parts.append(CHAT_FAILURE_MESSAGE)
+                        yield "token", CHAT_FAILURE_MESSAGE
+
+        answer = "".join(parts).strip()
+        self._finish(request, turn, answer)
+        yield "done", ChatResponse(
+            answer=answer,
+            sources=turn.sources,
+            language=request.language
+        )
+
+    def _finish(self, request: ChatRequest, turn: _PreparedTurn, answer: str):
+        ok = answer != CHAT_FAILURE_MESSAGE
+        conversation_memory.record_turn(turn.session_key, request.message, answer, remember=ok)
+        if ok and turn.probe is not None and turn.cached is None:
+            answer_cache.store(turn.probe, answer, [s.model_dump() for s in turn.sources])
+
+    def _sources(self, evidence_units: List) -> List[ChatSource]:
+        return [
+            ChatSource(
+                title=ev.title,
+                url=ev.url,
+                source_name=ev.source_name
+            ) for ev in evidence_units[:3]
+        ]
+
+    async def _expand(self, request: ChatRequest, context: List[str]) -> str:
+        # Translation-aware expansion of a non-English message into an English
+        # search query, resolving references to the earlier questions in
+        # `context`; the raw message is used if the call fails.
+        try:
+            earlier = ""
+            if context:
+                earlier = "Earlier Questions (oldest first):\n" + "\n".join(f"- {q}" for q in context) + "\n\n"
+            expansion_prompt = (
+                f"Translate and expand the following user question into a professional English search query "
+                f"for venture capital and market analysis. If it refers to an earlier question, make the "
+                f"query self-contained.\n\n"
+                f"{earlier}"
+                f"Original Question: {request.message}\n\n"
+                "Output ONLY the English search query string."
+            )
+            with span("chat_expansion"):
+                expansion_resp = await llm_gateway.generate(
+                    "expansion",
+                    self.generator.client,
                     model="gemini-2.0-flash-exp",
                     contents=expansion_prompt
                 )
-                retrieval_query = expansion_resp.text.strip()
-                print(f"[*] [LOG] TRANSLATION-AWARE EXPANSION: '{request.message}' -> '{retrieval_query}'")
-            except Exception as e:
-                print(f"[!] Expansion failed, falling back to raw message: {e}")
-
-        # 3. Retrieve relevant evidence using the expanded query
-        evidence_units = await self.retriever.retrieve_relevant_evidence(
-            sector=sector,
-            geography=geography,
-            funding_stage=stage,
-            startup_description=f"{context_description} {retrieval_query}"
+            retrieval_query = expansion_resp.text.strip()
+            print(f"[*] [LOG] TRANSLATION-AWARE EXPANSION: '{request.message}' -> '{retrieval_query}'")
+            _remember_expansion(request, context, retrieval_query)
+            return retrieval_query
+        except Exception as e:
+            print(f"[!] Expansion failed, falling back to raw message: {e}")
+            record_fallback("query_expansion", fallback_reason(e))
+            return request.message
+
+    async def _refine_web(self, speculative: "asyncio.Task", sector: str, geography: str, stage: str,
+                          context_description: str, raw_query: str, retrieval_query: str) -> List:
+        # The web tier speculatively started on the raw message. Grounded
+        # search reads the message in its own language, so its results stand
+        # (the vector tier, caches and packing all use the expanded query);
+        # only when it found nothing is it re-run once on the expansion.
+        evidence = await speculative
+        if evidence or self.retriever.client is None or retrieval_query.strip() == raw_query.strip():
+            return evidence
+        print("[*] [LOG] Raw-message web tier came back empty, re-running on the expanded query.")
+        return await self.retriever.start_generative(
+            sector, geography, stage, f"{context_description} {retrieval_query}"
+        )
+
+    async def _prepare(self, request: ChatRequest) -> _PreparedTurn:
+        # Context lookup, query expansion, answer cache and retrieval shared by
+        # both chat modes, as a small DAG:
+        #   history --> expansion ----------+--> answer cache --> evidence cache / retrieval
+        #   analysis --> web tier ----------+
+        # The expansion (an LLM round trip for non-English messages) is
+        # conditioned on the conversation's last questions and overlaps the
+        # analysis lookup and, when the turn will likely need retrieval, a
+        # web tier started on the raw message (refined in _refine_web).
+        # Everything that compares questions (caches, vector tier) waits for
+        # the expanded query.
+
+        # Last turns verbatim plus a rolling summary, under a fixed token cap
+        session_key = conversation_memory.session_key(request.user_id, request.analysis_id)
+        await conversation_memory.refresh(session_key)
+        history_str = conversation_memory.history_section(session_key, request.chat_history)
+        context = conversation_memory.recent_questions(
+            session_key, request.chat_history, settings.CHAT_EXPANSION_CONTEXT_TURNS
         )
 
+        retrieval_query = _cached_expansion(request, context)
+        expansion = None
+        if retrieval_query is None:
+            expansion = asyncio.ensure_future(self._expand(request, context))
+
+        web = None
+        try:
+            # 1. Fetch Context if analysis_id is provided
+            context_description = ""
+            sector = "General"
+            geography = "India"
+            stage = ""
+            analysis = None
+
+            if request.analysis_id:
+                analysis = await asyncio.to_thread(storage.get_analysis_by_id, request.analysis_id, request.user_id)
+                if analysis:
+                    context_description = analysis.startup_summary
+                    sector = analysis.metadata.get("sector", "General") if analysis.metadata else "General"
+                    geography = analysis.metadata.get("geography", "India") if analysis.metadata else "India"
+                    stage = analysis.metadata.get("stage", "") if analysis.metadata else ""
+
+            # Follow-ups usually hit the session's cached evidence, and a first
+            # turn on an analysis is seeded from its evidence; only speculate
+            # on the web tier when neither applies and the expansion is still pending.
+            seeded = chat_evidence_cache.has_session(session_key) or bool(analysis and analysis.evidence_used)
+            if expansion is not None and not expansion.done() and not seeded:
+                web = self.retriever.start_generative(
+                    sector, geography, stage, f"{context_description} {request.message}"
+                )
+            if expansion is not None:
+                retrieval_query = await expansion
+
+            # 2. Standalone questions (no conversation to depend on) may already
+            # have been answered for the same context
+            probe = None
+            if not history_str:
+                probe = await answer_cache.lookup(
+                    (request.language, request.analysis_id or "", sector, geography, stage),
+                    retrieval_query,
+                )
+                if probe.hit is not None:
+                    print(f"[*] [LOG] Semantic answer cache hit (similarity {probe.hit.similarity:.2f}).")
+                    return _PreparedTurn(
+                        session_key,
+                        None,
+                        [ChatSource(**source) for source in probe.hit.sources],
+                        cached=probe.hit.answer,
+                    )
+
+            # 3. Retrieve relevant evidence using the expanded query, unless the
+            # session's cached evidence (seeded from the analysis) still covers it
+            async def retrieve():
+                nonlocal web
+                generative = None
+                if web is not None:
+                    generative = self._refine_web(
+                        web, sector, geography, stage, context_description, request.message, retrieval_query
+                    )
+                    web = None
+                return await self.retriever.retrieve_relevant_evidence(
+                    sector=sector,
+                    geography=geography,
+                    funding_stage=stage,
+                    startup_description=f"{context_description} {retrieval_query}",
+                    generative=generative,
+                    combo_cache=False,
+                )
+
+            evidence_units = await chat_evidence_cache.get_evidence(
+                session_key,
+                retrieval_query,
+                retrieve,
+                seed=(lambda: units_from_analysis(analysis)) if analysis else None,
+            )
+        finally:
+            # Speculative work the turn ended up not needing.
+            for task in (web, expansion):
+                if task is not None and not task.done():
+                    task.cancel()
+
         system_prompt = (
             "You are FundingSense AI, acting as the user's Personal VC Lead and Strategy Consultant.\n"
             "Your goal is to provide deep-dive analysis into the user's startup pitch and funding journey.\n"
@@ -64,10 +309,6 @@ class ChatOrchestrator:
         )
 
         chat_context = f"Internal Context: {context_description}\nSector: {sector}\nGeography: {geography}\nStage: {stage}\n\n"
-        history_str = ""
-        if request.chat_history:
-            history_str = "Conversation History:\n" + "\n".join([f"{h['role'].upper()}: {h['content']}" for h in request.chat_history]) + "\n\n"
-
         evidence_str = "Grounded Evidence (Sources found via search & docs):\n" + "\n".join([
             f"- {ev.title} ({ev.source_name}, {ev.published_year}): {ev.content[:300]}..." 
             for ev in evidence_units
@@ -82,30 +323,4 @@ class ChatOrchestrator:
             f"RESPONSE LANGUAGE: {request.language}\n"
             "ASSISTANT ANSWER:"
         )
-
-        try:
-            response = await self.generator.client.aio.models.generate_content(
-                model="gemini-2.0-flash-exp",
-                contents=full_prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.4
-                )
-            )
-            answer = response.text.strip()
-        except Exception as e:
-            print(f"[!] Chat generation failed: {e}")
-            answer = "I'm sorry, I'm having trouble processing your request right now. Please try again shortly."
-
-        sources = [
-            ChatSource(
-                title=ev.title,
-                url=ev.url,
-                source_name=ev.source_name
-            ) for ev in evidence_units[:3]
-        ]
-
-        return ChatResponse(
-            answer=answer,
-            sources=sources,
-            language=request.language
-        )
+        return _PreparedTurn(session_key, full_prompt, self._sources(evidence_units), probe=probe)
@@ -0,0 +1,243 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from google import genai
+
+from app.config.settings import settings
+from app.core.storage import storage
+from app.core.llm_gateway import llm_gateway, fallback_reason
+from app.core.rate_limiter import llm_priority, PRIORITY_BULK
+from app.core.metrics import record_fallback
+from app.generation.evidence_packer import estimate_tokens
+
+
+# Answer of a turn that could not be generated; persisted turns carrying it
+# (or flagged "failed") never go back into a prompt.
+CHAT_FAILURE_MESSAGE = "I'm sorry, I'm having trouble processing your request right now. Please try again shortly."
+
+SessionKey = Tuple[str, str]
+Turn = Tuple[str, str]  # (user message, assistant answer)
+
+# Per-turn text fed to the summarizer, so a summary refresh costs the same
+# whatever the answers looked like.
+_SUMMARY_INPUT_CHARS = 600
+# A long backlog (first turn after a restart) only summarizes its newest turns.
+_MAX_FOLDED_TURNS = 20
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    clipped = text[: max(max_tokens, 0) * 4].rsplit(" ", 1)[0]
+    return clipped + "..."
+
+
+def _format_turn(turn: Turn) -> str:
+    return f"USER: {turn[0]}\nASSISTANT: {turn[1]}"
+
+
+class _Conversation:
+    __slots__ = ("turns", "summary", "summarizing", "stored")
+
+    def __init__(self):
+        # Turns not folded into the summary yet; the newest are sent verbatim.
+        self.turns: List[Turn] = []
+        self.summary = ""
+        self.summarizing = False
+        # Persisted chat messages of this session already reflected in turns.
+        self.stored = 0
+
+
+class ConversationMemory:
+
+    # Server-side chat history per session (user_id, analysis_id):
+    # - the last CHAT_HISTORY_TURNS turns go into the prompt verbatim;
+    # - older turns are folded into a rolling summary by a background task
+    #   (bulk priority, never on the request path);
+    # - the whole history section is held under CHAT_HISTORY_TOKEN_CAP.
+    # Sessions are rebuilt from the persisted chat log after a restart and
+    # pick up turns another worker stored (see refresh); only the summary is
+    # process-local.
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or settings.CHAT_MEMORY_MAX_SESSIONS
+        self._sessions: "OrderedDict[SessionKey, _Conversation]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self.client = genai.Client(api_key=settings.GOOGLE_API_KEY) if settings.GOOGLE_API_KEY else None
+
+    @staticmethod
+    def session_key(user_id: Optional[str], analysis_id: Optional[str]) -> Optional[SessionKey]:
+        # Only signed-in users get a server-side session; anonymous chats
+        # (even on the same analysis) must not share one.
+        if not user_id:
+            return None
+        return (user_id, analysis_id or "")
+
+    def history_section(self, key: Optional[SessionKey], client_history: Optional[List[Dict]] = None) -> str:
+        # Prompt block for the conversation so far, within the token cap.
+        # Anonymous sessions fall back to the history the client sent.
+        if key is None:
+            turns = self._pair(client_history or [])
+            summary = ""
+        else:
+            conversation = self._get(key)
+            turns, summary = conversation.turns, conversation.summary
+
+        cap = settings.CHAT_HISTORY_TOKEN_CAP
+        parts: List[str] = []
+        if summary:
+            summary_text = _clip(summary, min(settings.CHAT_SUMMARY_TOKEN_CAP, cap))
+            parts.append(f"Summary of earlier conversation: {summary_text}")
+            cap -= estimate_tokens(parts[0])
+
+        recent: List[str] = []
+        for turn in reversed(turns[-settings.CHAT_HISTORY_TURNS:]):
+            text = _format_turn(turn)
+            cost = estimate_tokens(text)
+            if cost > cap:
+                if not recent and cap > 50:
+                    recent.append(_clip(text, cap))
+                break
+            recent.append(text)
+            cap -= cost
+        parts.extend(reversed(recent))
+
+        if not parts:
+            return ""
+        return "Conversation History:\n" + "\n".join(parts) + "\n\n"
+
+    def recent_questions(self, key: Optional[SessionKey], client_history: Optional[List[Dict]] = None,
+                         count: int = 2) -> List[str]:
+        # The last `count` user questions of the conversation, oldest first;
+        # lets a follow-up like "what about Series A?" be read in context.
+        if count <= 0:
+            return []
+        if key is None:
+            turns = self._pair(client_history or [])
+        else:
+            turns = self._get(key).turns
+        return [question for question, _ in turns[-count:]]
+
+    def record_turn(self, key: Optional[SessionKey], message: str, answer: str, remember: bool = True):
+        # Called once the answer is final. The endpoint persists both messages
+        # for signed-in users; `remember=False` keeps failed turns out of the prompt.
+        if key is None:
+            return
+        conversation = self._get(key)
+        conversation.stored += 2
+        if remember:
+            conversation.turns.append((message, answer))
+        self._maybe_summarize(conversation)
+
+    def _get(self, key: SessionKey) -> _Conversation:
+        conversation = self._sessions.get(key)
+        if conversation is None:
+            conversation = self._sessions[key] = _Conversation()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(key)
+        return conversation
+
+    async def refresh(self, key: Optional[SessionKey]):
+        # Appends messages persisted since we last looked (first turn after a
+        # restart, or turns served by another worker). Call before reading
+        # the session; the chat log is read off the event loop.
+        if key is None:
+            return
+        messages = await asyncio.to_thread(self._stored_messages, key)
+        conversation = self._get(key)
+        if len(messages) > conversation.stored:
+            conversation.turns.extend(self._pair(messages[conversation.stored:]))
+            conversation.stored = len(messages)
+            self._maybe_summarize(conversation)
+
+    @staticmethod
+    def _stored_messages(key: SessionKey) -> List[Dict]:
+        user_id, analysis_id = key
+        return [
+            m for m in storage.get_chat_history(user_id)
+            if (m.get("analysis_id") or "") == analysis_id
+        ]
+
+    @staticmethod
+    def _pair(messages: List[Dict]) -> List[Turn]:
+        turns: List[Turn] = []
+        question = None
+        for m in messages:
+            if m.get("role") == "user":
+                question = m.get("content", "")
+            elif m.get("role") == "assistant" and question is not None:
+                answer = m.get("content", "")
+                if not m.get("failed") and answer != CHAT_FAILURE_MESSAGE:
+                    turns.append((question, answer))
+                question = None
+        return turns
+
+    def _maybe_summarize(self, conversation: _Conversation):
+        overflow = len(conversation.turns) - settings.CHAT_HISTORY_TURNS
+        if conversation.summarizing or overflow < settings.CHAT_SUMMARY_BATCH:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        conversation.summarizing = True
+        task = loop.create_task(self._summarize(conversation, overflow))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, conversation: _Conversation, count: int):
+        # Folds the `count` oldest unsummarized turns into the summary.
+        folded = conversation.turns[max(count - _MAX_FOLDED_TURNS, 0):count]
+        try:
+            try:
+                summary = await self._llm_summary(conversation.summary, folded)
+            except Exception as e:
+                print(f"[!] Conversation summary failed, using extractive summary: {e}")
+                record_fallback("chat_summary", fallback_reason(e))
+                summary = self._extractive_summary(conversation.summary, folded)
+            conversation.summary = summary
+            # New turns may have arrived meanwhile; only drop what was folded.
+            del conversation.turns[:count]
+        finally:
+            conversation.summarizing = False
+        self._maybe_summarize(conversation)
+
+    async def _llm_summary(self, summary: str, turns: List[Turn]) -> str:
+        transcript = "\n".join(
+            f"USER: {q[:_SUMMARY_INPUT_CHARS]}\nASSISTANT: {a[:_SUMMARY_INPUT_CHARS]}" for q, a in turns
+        )
+        prompt = (
+            "You maintain the running summary of a conversation between a startup founder and a "
+            "venture capital analyst. Update the summary with the new turns. Keep concrete facts, "
+            "numbers, investor names, decisions and open questions; drop pleasantries. "
+            f"At most {settings.CHAT_SUMMARY_TOKEN_CAP * 3 // 4} words. Output ONLY the summary.\n\n"
+            f"CURRENT SUMMARY: {summary or '(none)'}\n\n"
+            f"NEW TURNS:\n{transcript}"
+        )
+        with llm_priority(PRIORITY_BULK):
+            response = await llm_gateway.generate(
+                "summary",
+                self.client,
+                model="gemini-2.0-flash-exp",
+                contents=prompt,
+            )
+        return _clip(response.text.strip(), settings.CHAT_SUMMARY_TOKEN_CAP)
+
+    def _extractive_summary(self, summary: str, turns: List[Turn]) -> str:
+        # No model available: remember what was asked, newest topics kept.
+        questions = "; ".join(q.strip().rstrip("?") for q, _ in turns if q.strip())
+        combined = f"{summary} {questions}".strip() if summary else f"Earlier the user asked about: {questions}"
+        if estimate_tokens(combined) > settings.CHAT_SUMMARY_TOKEN_CAP:
+            combined = "..." + combined[-settings.CHAT_SUMMARY_TOKEN_CAP * 4:]
+        return combined
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "summaries_in_flight": len(self._tasks),
+        }
+
+
+conversation_memory = ConversationMemory()
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.storage import DATA_DIR
+from app.core.log_cache import LogBackedCache
+from app.rag.embeddings import embedder, LOCAL_SPACE
+from app.schemas.evidence import EvidenceRecord
+
+
+EVIDENCE_CACHE_FILE = DATA_DIR / "evidence_cache.jsonl"
+EVIDENCE_CACHE_LOCK_FILE = DATA_DIR / ".evidence_cache.lock"
+
+
+def evidence_text(ev: EvidenceRecord) -> str:
+    # What gets embedded for an evidence unit.
+    return f"{ev.title}. {ev.content[:500]}"
+
+
+class EvidenceCache(LogBackedCache):
+
+    # Evidence units keyed by their content-addressed id (evidence_id_for),
+    # shared by all retrieval tiers and workers: every tier writes what it
+    # found, a source seen before keeps its first copy, and stored analyses
+    # can get the full evidence back from the ids they cite. Embeddings are
+    # kept per (id, space) in this process so a unit is embedded once.
+    # The sector/geography of a shared copy are those of the request that
+    # first cached it; callers re-apply their own (EvidenceRecord.with_context).
+
+    first_wins = True
+
+    def __init__(self, capacity: Optional[int] = None):
+        super().__init__(
+            "evidence",
+            EVIDENCE_CACHE_FILE,
+            EVIDENCE_CACHE_LOCK_FILE,
+            capacity or settings.EVIDENCE_CACHE_SIZE,
+        )
+        self._vectors: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+
+    def _key_value(self, record: Dict):
+        unit = EvidenceRecord.from_dict(record)
+        return unit.evidence_id, unit
+
+    def _to_record(self, key: str, value: EvidenceRecord) -> Dict:
+        return value.to_dict(json_mode=True)
+
+    def get(self, evidence_id: str) -> Optional[EvidenceRecord]:
+        return self.get_many([evidence_id], metric="evidence")[0]
+
+    def put_units(self, units: Iterable[EvidenceRecord]) -> List[EvidenceRecord]:
+        # Stores new units and returns the list with already cached sources
+        # replaced by their cached copy, keeping each unit's own sector and
+        # geography (the request context the tier stamped on it).
+        units = list(units)
+        self.put_many(((ev.evidence_id, ev) for ev in units), only_new=True)
+        with self._lock:
+            cached = [self._entries.get(ev.evidence_id, ev) for ev in units]
+        return [shared.with_context(ev.sector, ev.geography) for shared, ev in zip(cached, units)]
+
+    async def embed_units(self, units: List[EvidenceRecord], space: Optional[str] = None) -> Tuple[np.ndarray, str]:
+        # Embeddings of evidence_text(unit), computing only the units not
+        # embedded before in that space.
+        if not units:
+            return await embedder.embed([], space=space)
+        if space is None:
+            # The embedder's own choice: the model, else the local fallback.
+            preferred = settings.EMBEDDING_MODEL if embedder.client is not None else LOCAL_SPACE
+            try:
+                return await self.embed_units(units, space=preferred)
+            except Exception:
+                return await self.embed_units(units, space=LOCAL_SPACE)
+
+        rows: List[Optional[np.ndarray]] = [self._vectors.get((ev.evidence_id, space)) for ev in units]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            matrix, _ = await embedder.embed([evidence_text(units[i]) for i in missing], space=space)
+            self._remember([units[i] for i in missing], matrix, space)
+            for i, row in zip(missing, matrix):
+                rows[i] = row
+        return np.vstack(rows), space
+
+    def _remember(self, units: List[EvidenceRecord], matrix: np.ndarray, space: str):
+        for ev, row in zip(units, matrix):
+            self._vectors[(ev.evidence_id, space)] = row
+            self._vectors.move_to_end((ev.evidence_id, space))
+        while len(self._vectors) > 2 * self.capacity:
+            self._vectors.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {**super().stats(), "vectors": len(self._vectors)}
+
+
+evidence_cache = EvidenceCache()
@@ -0,0 +1,135 @@
+import re
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+SORT_FIELDS = ("first_seen", "last_seen", "usage_count", "title")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_evidence_key(title: Optional[str], url: Optional[str] = None) -> str:
+    # Titles are the dedupe key the evidence page always used; the URL is only
+    # a fallback for untitled sources.
+    if title and title.strip():
+        return "t:" + _WS_RE.sub(" ", title).strip().casefold()
+    if url and url.strip():
+        return "u:" + url.strip().rstrip("/").casefold()
+    return ""
+
+
+def evidence_id_for(title: Optional[str], url: Optional[str] = None, content: Optional[str] = None) -> str:
+    # Content-addressed evidence id: the same source (normalized title and
+    # URL; the text only when both are missing) gets the same id in every
+    # retrieval tier, worker and run.
+    key = "|".join(
+        part for part in (
+            normalize_evidence_key(title),
+            normalize_evidence_key(None, url),
+        ) if part
+    )
+    if not key:
+        key = "c:" + _WS_RE.sub(" ", content or "").strip().casefold()
+    return "ev_" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:20]
+
+
+class _CatalogEntry:
+
+    __slots__ = ("evidence", "usage_count", "first_seen", "last_seen")
+
+    def __init__(self, evidence: Dict, seen_at: Optional[str]):
+        self.evidence = evidence
+        self.usage_count = 0
+        self.first_seen = seen_at
+        self.last_seen = seen_at
+
+    def touch(self, seen_at: Optional[str]):
+        self.usage_count += 1
+        if seen_at:
+            if not self.first_seen or seen_at < self.first_seen:
+                self.first_seen = seen_at
+            if not self.last_seen or seen_at > self.last_seen:
+                self.last_seen = seen_at
+
+    def to_dict(self) -> Dict:
+        return {
+            **self.evidence,
+            "usage_count": self.usage_count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+
+
+class EvidenceCatalog:
+
+    # Incrementally maintained catalog of the evidence cited by stored analyses,
+    # one scope per user plus a global scope (user_id=None). Updated once per
+    # saved analysis so the evidence page never rescans the history.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes: Dict[Optional[str], Dict[str, _CatalogEntry]] = {}
+        self._versions: Dict[Optional[str], int] = {}
+        self._sorted: Dict[Tuple[Optional[str], str, bool], Tuple[int, List[_CatalogEntry]]] = {}
+
+    def record(self, user_id: Optional[str], evidence_used: Iterable[Dict], seen_at: Optional[str] = None):
+        # evidence_used holds EvidenceUsed-shaped dicts from one analysis.
+        keyed: Dict[str, Dict] = {}
+        for ev in evidence_used or []:
+            key = normalize_evidence_key(ev.get("title"), ev.get("url"))
+            if key and key not in keyed:
+                keyed[key] = ev
+        if not keyed:
+            return
+
+        scopes = [None] if not user_id else [None, user_id]
+        with self._lock:
+            for scope in scopes:
+                entries = self._scopes.setdefault(scope, {})
+                for key, ev in keyed.items():
+                    entry = entries.get(key)
+                    if entry is None:
+                        entry = entries[key] = _CatalogEntry(dict(ev), seen_at)
+                    entry.touch(seen_at)
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        return len(self._scopes.get(user_id or None, {}))
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        sort: str = "first_seen",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field '{sort}'. Use one of: {', '.join(SORT_FIELDS)}")
+
+        scope = user_id or None
+        with self._lock:
+            entries = self._sorted_view(scope, sort, descending)
+        end = None if limit is None else offset + max(limit, 0)
+        return [entry.to_dict() for entry in entries[max(offset, 0):end]]
+
+    def _sorted_view(self, scope: Optional[str], sort: str, descending: bool) -> List[_CatalogEntry]:
+        version = self._versions.get(scope, 0)
+        cache_key = (scope, sort, descending)
+        cached = self._sorted.get(cache_key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        entries = list(self._scopes.get(scope, {}).values())
+        if sort == "first_seen" and not descending:
+            # Insertion order already is first-citation order.
+            view = entries
+        elif sort == "usage_count":
+            view = sorted(entries, key=lambda e: (e.usage_count, e.last_seen or ""), reverse=descending)
+        elif sort == "title":
+            view = sorted(entries, key=lambda e: (e.evidence.get("title") or "").casefold(), reverse=descending)
+        else:
+            view = sorted(entries, key=lambda e: getattr(e, sort) or "", reverse=descending)
+        self._sorted[cache_key] = (version, view)
+        return view
@@ -0,0 +1,48 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+class FileLock:
+
+    # Advisory inter-process lock built on flock(2). Every acquisition opens its
+    # own descriptor, so threads of the same process exclude each other too.
+    # On platforms without fcntl it degrades to a process-local lock, which is
+    # only correct for a single uvicorn worker.
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.RLock()
+
+    @contextmanager
+    def shared(self):
+        with self._acquire(fcntl.LOCK_SH if fcntl else None):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        with self._acquire(fcntl.LOCK_EX if fcntl else None):
+            yield
+
+    @contextmanager
+    def _acquire(self, mode):
+        if fcntl is None:
+            with self._local:
+                yield
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
@@ -0,0 +1,259 @@
+import re
+import math
+import datetime
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.evidence_catalog import normalize_evidence_key
+from app.data.knowledge_base import iter_local_documents, as_list
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Too generic to say two sectors or regions are the same.
+_GENERIC_WORDS = {"and", "the", "tech", "technology", "services", "sector", "pan", "global"}
+
+# Score weights (sum to 100).
+_SECTOR_WEIGHT = 45
+_GEOGRAPHY_WEIGHT = 20
+_VOLUME_WEIGHT = 15
+_RECENCY_WEIGHT = 15
+_STAGE_WEIGHT = 5
+# Deals for a full volume score.
+_FULL_VOLUME_DEALS = 10
+
+
+def normalize_investor_name(name: str) -> str:
+    return " ".join(_WORD_RE.findall((name or "").lower()))
+
+
+def _words(text: Optional[str]) -> frozenset:
+    # Tokens plus the joined form, so "Agri-Tech" and "AgriTech" meet.
+    tokens = _WORD_RE.findall((text or "").lower())
+    words = {t for t in tokens if len(t) > 2 and t not in _GENERIC_WORDS}
+    if len(tokens) > 1:
+        words.add("".join(tokens))
+    return frozenset(words)
+
+
+class _Deal:
+    # One piece of evidence naming the investor.
+    __slots__ = ("sector", "geography", "stage", "year")
+
+    def __init__(self, sector: str, geography: str, stage: str, year: Optional[int]):
+        self.sector = sector
+        self.geography = geography
+        self.stage = stage
+        self.year = year
+
+
+class InvestorProfile:
+
+    __slots__ = ("name", "deals", "names", "sector_words", "geo_words", "stage_words", "last_year", "focus_areas")
+
+    def __init__(self):
+        self.name = ""
+        # evidence key -> deal; the same article cited by many analyses counts once.
+        # `names` counts spellings; the most common one is displayed.
+        self.deals: Dict[str, _Deal] = {}
+        self.names: Counter = Counter()
+        self._reset()
+
+    def _reset(self):
+        self.sector_words: List[frozenset] = []
+        self.geo_words: List[frozenset] = []
+        self.stage_words: List[frozenset] = []
+        self.last_year: Optional[int] = None
+        self.focus_areas: List[str] = []
+
+    def add(self, name: str, key: str, deal: _Deal) -> bool:
+        self.names[name] += 1
+        if key in self.deals:
+            return False
+        self.deals[key] = deal
+        return True
+
+    def compile(self):
+        # Per-deal word sets and summary fields used by scoring.
+        self.name = self.names.most_common(1)[0][0]
+        self._reset()
+        sectors: Counter = Counter()
+        for deal in self.deals.values():
+            self.sector_words.append(_words(deal.sector))
+            self.geo_words.append(_words(deal.geography))
+            self.stage_words.append(_words(deal.stage))
+            if deal.year and (self.last_year is None or deal.year > self.last_year):
+                self.last_year = deal.year
+            if deal.sector:
+                sectors[deal.sector] += 1
+        self.focus_areas = [s for s, _ in sectors.most_common(3)]
+
+
+class InvestorIndex:
+
+    # Investor profiles aggregated from evidence that names investors: the
+    # local knowledge base (data/raw), stored analyses (fed by storage as it
+    # indexes them) and evidence retrieved at runtime. rank() scores every
+    # profile against a request on sector and geography overlap, deal count,
+    # recency and stage - a few milliseconds, no model call. The shortlist
+    # seeds the report prompt and replaces the generic fallback investor.
+
+    def __init__(self, data_root: str = "data/raw"):
+        self.data_root = data_root
+        self._lock = threading.Lock()
+        self._local_lock = threading.Lock()
+        self._profiles: Dict[str, InvestorProfile] = {}
+        self._dirty: set = set()
+        self._local_loaded = False
+        self._version = 0
+        self._ranked: Dict[Tuple[str, str, str], Tuple[int, List[Tuple[InvestorProfile, int]]]] = {}
+
+    def observe(self, evidence_units: Iterable, sector: Optional[str] = None):
+        # EvidenceRecords from retrieval; `sector` stands in for units without one.
+        for ev in evidence_units:
+            if ev.investors:
+                self._add(
+                    ev.investors, normalize_evidence_key(ev.title, ev.url), ev.sector or sector or "",
+                    ev.geography or "", ev.funding_stage or "", ev.published_year,
+                )
+
+    def record_analysis(self, record: Dict):
+        # A stored analysis record; evidence_used has investors since they
+        # were added to EvidenceUsed.
+        metadata = record.get("metadata") or {}
+        for ev in record.get("evidence_used") or []:
+            investors = ev.get("investors")
+            if not investors:
+                continue
+            try:
+                year = int(ev.get("year"))
+            except (TypeError, ValueError):
+                year = None
+            self._add(
+                investors, normalize_evidence_key(ev.get("title"), ev.get("url")),
+                metadata.get("sector", ""), ev.get("geography") or metadata.get("geography", ""),
+                metadata.get("stage", ""), year,
+            )
+
+    def _add(self, investors: Iterable[str], evidence_key: str, sector: str, geography: str,
+             stage: str, year: Optional[int]):
+        if not evidence_key:
+            return
+        deal = _Deal(sector, geography, stage, year)
+        with self._lock:
+            for name in investors:
+                key = normalize_investor_name(name)
+                if not key:
+                    continue
+                profile = self._profiles.get(key)
+                if profile is None:
+                    profile = self._profiles[key] = InvestorProfile()
+                if profile.add(name.strip(), evidence_key, deal):
+                    self._dirty.add(key)
+
+    def _load_local(self):
+        for file, metadata, _ in iter_local_documents(self.data_root):
+            investors = as_list(metadata.get("investors"), [])
+            if not investors:
+                continue
+            try:
+                year = int(metadata.get("published_year"))
+            except (TypeError, ValueError):
+                year = None
+            self._add(
+                investors,
+                normalize_evidence_key(metadata.get("title"), metadata.get("source_url")) or f"f:{file}",
+                metadata.get("sector", ""), metadata.get("geography", ""), metadata.get("funding_stage", ""),
+                year,
+            )
+
+    def _ensure_local(self):
+        # The knowledge base is read once, on the first ranking.
+        if self._local_loaded:
+            return
+        with self._local_lock:
+            if not self._local_loaded:
+                self._load_local()
+                self._local_loaded = True
+
+    def _compile(self):
+        # Caller holds the lock.
+        if self._dirty:
+            for key in self._dirty:
+                self._profiles[key].compile()
+            self._dirty = set()
+            self._version += 1
+
+    def rank(self, sector: str, geography: str, stage: str = "", limit: Optional[int] = None) -> List[Tuple[InvestorProfile, int]]:
+        # (profile, fit score 5-98) best first.
+        limit = limit or settings.INVESTOR_SHORTLIST_SIZE
+        cache_key = (sector.lower(), geography.lower(), stage.lower())
+        self._ensure_local()
+        with self._lock:
+            self._compile()
+            cached = self._ranked.get(cache_key)
+            if cached and cached[0] == self._version:
+                return cached[1][:limit]
+            profiles = list(self._profiles.values())
+            version = self._version
+
+        sector_words, geo_words, stage_words = _words(sector), _words(geography), _words(stage)
+        current_year = datetime.date.today().year
+        horizon = max(settings.INVESTOR_RECENCY_YEARS, 1)
+        scored = []
+        for profile in profiles:
+            deals = len(profile.deals)
+            if not deals:
+                continue
+            sector_share = sum(1 for w in profile.sector_words if w & sector_words) / deals
+            geo_share = sum(1 for w in profile.geo_words if w & geo_words) / deals
+            staged = [w for w in profile.stage_words if w]
+            stage_share = (sum(1 for w in staged if w & stage_words) / len(staged)) if staged and stage_words else 0.0
+            volume = min(1.0, math.log1p(deals) / math.log1p(_FULL_VOLUME_DEALS))
+            recency = (
+                max(0.0, 1.0 - (current_year - profile.last_year) / horizon) if profile.last_year else 0.0
+            )
+            score = (
+                _SECTOR_WEIGHT * sector_share
+                + _GEOGRAPHY_WEIGHT * geo_share
+                + _VOLUME_WEIGHT * volume
+                + _RECENCY_WEIGHT * recency
+                + _STAGE_WEIGHT * stage_share
+            )
+            scored.append((profile, max(5, min(98, int(round(score))))))
+        scored.sort(key=lambda item: (-item[1], -len(item[0].deals), item[0].name))
+        # Cache enough rows for any shortlist size used in practice.
+        ranked = scored[: max(limit, 20)]
+
+        with self._lock:
+            if version == self._version:
+                self._ranked[cache_key] = (version, ranked)
+                if len(self._ranked) > 512:
+                    self._ranked = {cache_key: (version, ranked)}
+        return ranked[:limit]
+
+    def shortlist(self, sector: str, geography: str, stage: str = "", limit: Optional[int] = None) -> List[Dict]:
+        # Recommendation-shaped dicts (name, fit_score, focus_areas, reasons).
+        results = []
+        for profile, score in self.rank(sector, geography, stage, limit):
+            reasons = [
+                f"Named in {len(profile.deals)} funding evidence item{'s' if len(profile.deals) != 1 else ''}"
+                + (f", most recently {profile.last_year}" if profile.last_year else "") + "."
+            ]
+            if profile.focus_areas:
+                reasons.append(f"Evidence shows activity in {', '.join(profile.focus_areas)}.")
+            results.append({
+                "name": profile.name,
+                "fit_score": score,
+                "focus_areas": profile.focus_areas or [sector],
+                "reasons": reasons,
+                "deal_count": len(profile.deals),
+            })
+        return results
+
+    def stats(self) -> Dict:
+        return {"investors": len(self._profiles), "version": self._version}
+
+
+investor_index = InvestorIndex()
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import datetime
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.core.file_lock import FileLock
+from app.core.storage import DATA_DIR, storage
+from app.core.metrics import registry
+from app.core.rate_limiter import llm_priority, PRIORITY_BULK
+from app.schemas.analysis import AnalysisRequest
+from app.schemas.job import AnalysisJob, JobStatus
+
+
+# Append-only log of job snapshots; the last line for a job_id is its state.
+JOBS_FILE = DATA_DIR / "analysis_jobs.jsonl"
+JOBS_LOCK_FILE = DATA_DIR / ".jobs.lock"
+
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+def _utcnow() -> str:
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+class JobManager:
+
+    # Asynchronous /analyze jobs executed by a bounded pool of asyncio workers.
+    #
+    # Every state change is appended to JOBS_FILE under a file lock before it
+    # takes effect, so queued work survives restarts and several uvicorn
+    # workers can share one queue: a job only runs in the process that
+    # atomically moves it from "queued" to "running" (its lease). Running jobs
+    # whose lease expired (the process died) are queued again.
+
+    def __init__(self, jobs_file=JOBS_FILE):
+        self.jobs_file = jobs_file
+        self._file_lock = FileLock(JOBS_LOCK_FILE)
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._read_bytes = 0
+        self._read_inode: Optional[int] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._active = 0
+        self._log_lines = 0
+
+    # ---- persistence -------------------------------------------------------
+
+    def _refresh(self):
+        # Folds in transitions appended by any process since the last read.
+        try:
+            st = self.jobs_file.stat()
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._read_inode or st.st_size < self._read_bytes:
+            self._jobs, self._read_bytes, self._log_lines = {}, 0, 0
+        if st.st_size == self._read_bytes:
+            return
+        with self.jobs_file.open("rb") as f:
+            self._read_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._read_bytes)
+            offset = self._read_bytes
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                self._log_lines += 1
+                try:
+                    job = AnalysisJob(**json.loads(line))
+                    self._jobs[job.job_id] = job
+                except Exception as e:
+                    print(f"[!] Skipping unreadable job record: {e}")
+            self._read_bytes = offset
+
+    def _append(self, job: AnalysisJob):
+        line = (json.dumps(job.model_dump(mode="json", exclude={"result"})) + "\n").encode()
+        with self.jobs_file.open("ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._jobs[job.job_id] = job
+
+    def _transition(
+        self, job_id: str, expect: Optional[List[JobStatus]] = None, attempts_delta: int = 0, **changes
+    ) -> Optional[AnalysisJob]:
+        # Compare-and-set on the latest persisted state of a job;
+        # attempts_delta is added to its persisted attempt count.
+        with self._file_lock.exclusive():
+            self._refresh()
+            job = self._jobs.get(job_id)
+            if job is None or (expect is not None and job.status not in expect):
+                return None
+            if attempts_delta:
+                changes["attempts"] = job.attempts + attempts_delta
+            job = job.model_copy(update=changes)
+            self._append(job)
+            return job
+
+    def _compact(self):
+        # Caller holds the exclusive lock, freshly refreshed. Forgets terminal
+        # jobs finished more than ANALYSIS_JOB_RETENTION_SECONDS ago and, when
+        # the log holds mostly superseded snapshots, rewrites it with the last
+        # snapshot of each remaining job. Other processes see the new inode
+        # and re-read it from the start.
+        cutoff = (
+            datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.ANALYSIS_JOB_RETENTION_SECONDS)
+        ).isoformat() + "Z"
+        kept = {
+            job_id: job for job_id, job in self._jobs.items()
+            if job.status not in TERMINAL_STATUSES or (job.finished_at or job.created_at or "") >= cutoff
+        }
+        if len(kept) == len(self._jobs) and self._log_lines <= 2 * len(self._jobs) + 100:
+            return
+        tmp_path = self.jobs_file.with_name(f".{self.jobs_file.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            for job in kept.values():
+                f.write((json.dumps(job.model_dump(mode="json", exclude={"result"})) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.jobs_file)
+        st = self.jobs_file.stat()
+        dropped = len(self._jobs) - len(kept)
+        self._jobs, self._read_inode, self._read_bytes, self._log_lines = kept, st.st_ino, st.st_size, len(kept)
+        print(f"[*] [LOG] Compacted job log to {len(kept)} jobs ({dropped} expired).")
+
+    # ---- public API --------------------------------------------------------
+
+    async def submit(self, request: AnalysisRequest) -> AnalysisJob:
+        job = await asyncio.to_thread(self._submit, request)
+        if self._queue is not None:
+            self._queue.put_nowait(job.job_id)
+        return job
+
+    def _submit(self, request: AnalysisRequest) -> AnalysisJob:
+        with self._file_lock.exclusive():
+            self._refresh()
+            queued = sum(1 for j in self._jobs.values() if j.status == JobStatus.QUEUED)
+            if queued >= settings.ANALYSIS_JOB_QUEUE_LIMIT:
+                raise JobQueueFullError(
+                    f"Analysis queue is full ({queued} jobs waiting). Retry later."
+                )
+            job = AnalysisJob(
+                job_id=str(uuid.uuid4()),
+                user_id=request.user_id,
+                status=JobStatus.QUEUED,
+                request=request,
+                created_at=_utcnow(),
+            )
+            self._append(job)
+            return job
+
+    async def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[AnalysisJob]:
+        return await asyncio.to_thread(self._get, job_id, user_id)
+
+    def _get(self, job_id: str, user_id: Optional[str] = None) -> Optional[AnalysisJob]:
+        with self._file_lock.shared():
+            self._refresh()
+        job = self._jobs.get(job_id)
+        if job is None or (user_id and job.user_id != user_id):
+            return None
+        if job.status == JobStatus.SUCCEEDED and job.analysis_id:
+            job = job.model_copy(update={"result": storage.get_analysis_by_id(job.analysis_id)})
+        return job
+
+    async def list(self, user_id: Optional[str] = None) -> List[AnalysisJob]:
+        return await asyncio.to_thread(self._list, user_id)
+
+    def _list(self, user_id: Optional[str] = None) -> List[AnalysisJob]:
+        with self._file_lock.shared():
+            self._refresh()
+        return [j for j in self._jobs.values() if not user_id or j.user_id == user_id]
+
+    async def stats(self) -> Dict:
+        return await asyncio.to_thread(self._stats)
+
+    def _stats(self) -> Dict:
+        with self._file_lock.shared():
+            self._refresh()
+        return {
+            "workers": len(self._workers),
+            "active_in_this_process": self._active,
+            "queue_limit": settings.ANALYSIS_JOB_QUEUE_LIMIT,
+            "jobs": self.counts(),
+        }
+
+    def counts(self) -> Dict[str, int]:
+        # Jobs by status as of this process's last read of the log (at most
+        # ANALYSIS_JOB_POLL_SECONDS old while workers run); no file I/O.
+        counts = {status.value: 0 for status in JobStatus}
+        for job in list(self._jobs.values()):
+            counts[job.status.value] += 1
+        return counts
+
+    # ---- worker pool -------------------------------------------------------
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(n))
+            for n in range(max(settings.ANALYSIS_JOB_WORKERS, 1))
+        ]
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+
+    async def stop(self):
+        tasks = self._workers + ([self._recovery_task] if self._recovery_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._recovery_task = None
+        self._queue = None
+
+    async def _recovery_loop(self):
+        # Picks up jobs queued before a restart, by other processes, or whose
+        # owner died mid-run (expired lease).
+        while True:
+            try:
+                for job_id in await asyncio.to_thread(self._recoverable_job_ids):
+                    self._queue.put_nowait(job_id)
+            except Exception as e:
+                print(f"[!] Job recovery scan failed: {e}")
+            await asyncio.sleep(settings.ANALYSIS_JOB_POLL_SECONDS)
+
+    def _recoverable_job_ids(self) -> List[str]:
+        now = time.time()
+        with self._file_lock.exclusive():
+            self._refresh()
+            for job in list(self._jobs.values()):
+                if job.status != JobStatus.RUNNING or (job.lease_expires_at or 0) >= now:
+                    continue
+                if job.attempts >= settings.ANALYSIS_JOB_MAX_ATTEMPTS:
+                    # Its runs keep taking the process down with them.
+                    print(f"[!] Giving up on job {job.job_id} after {job.attempts} attempts")
+                    self._append(job.model_copy(update={
+                        "status": JobStatus.FAILED,
+                        "error": f"Abandoned after {job.attempts} interrupted attempts",
+                        "finished_at": _utcnow(),
+                        "lease_expires_at": None,
+                    }))
+                    continue
+                print(f"[*] [LOG] Re-queuing orphaned job {job.job_id}")
+                self._append(job.model_copy(update={"status": JobStatus.QUEUED, "lease_expires_at": None}))
+            self._refresh()
+            self._compact()
+        if self._queue is None or not self._queue.empty():
+            return []
+        return [j.job_id for j in self._jobs.values() if j.status == JobStatus.QUEUED]
+
+    async def _worker(self, n: int):
+        # Imported lazily: the orchestrator pulls in the retrieval/generation stack.
+        from app.core.orchestrator import AnalysisOrchestrator
+
+        while True:
+            job_id = await self._queue.get()
+            job = await asyncio.to_thread(
+                self._transition,
+                job_id,
+                [JobStatus.QUEUED],
+                attempts_delta=1,
+                status=JobStatus.RUNNING,
+                started_at=_utcnow(),
+                lease_expires_at=time.time() + settings.ANALYSIS_JOB_LEASE_SECONDS,
+            )
+            if job is None:
+                continue  # already claimed by another worker or process
+
+            self._active += 1
+            print(f"[*] [LOG] Job worker {n} running {job_id}")
+            try:
+                with llm_priority(PRIORITY_BULK):
+                    result = await AnalysisOrchestrator().run_analysis(job.request)
+                storage.save_analysis(result)
+                changes = {"status": JobStatus.SUCCEEDED, "analysis_id": result.analysis_id}
+            except asyncio.CancelledError:
+                # Shutting down: hand the job back to the queue for the next
+                # start, off the event loop, without spending an attempt.
+                # Best effort; if this is lost too, the expired lease
+                # re-queues the job.
+                try:
+                    await asyncio.shield(asyncio.to_thread(
+                        self._transition, job_id, [JobStatus.RUNNING], attempts_delta=-1,
+                        status=JobStatus.QUEUED, lease_expires_at=None,
+                    ))
+                except (asyncio.CancelledError, Exception) as e:
+                    print(f"[!] Could not re-queue job {job_id} on shutdown: {e!r}")
+                raise
+            except Exception as e:
+                print(f"[!] Job {job_id} failed: {e}")
+                changes = {"status": JobStatus.FAILED, "error": str(e)}
+            finally:
+                self._active -= 1
+
+            await asyncio.to_thread(
+                self._transition,
+                job_id,
+                [JobStatus.RUNNING],
+                finished_at=_utcnow(),
+                lease_expires_at=None,
+                **changes,
+            )
+
+job_manager = JobManager()
+registry.gauge(
+    "fundingsense_analysis_jobs",
+    "Analysis jobs by status.",
+    ["status"],
+    job_manager.counts,
+)
@@ -0,0 +1,373 @@
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.config.settings import settings
+from app.core.metrics import registry, record_llm_call
+from app.core.rate_limiter import rate_limiter, is_rate_limited
+
+
+class LLMUnavailableError(Exception):
+    pass
+
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+
+class DeadlineExceededError(LLMUnavailableError):
+    pass
+
+
+class LLMNotConfiguredError(LLMUnavailableError):
+    pass
+
+
+def fallback_reason(error: Exception) -> str:
+    # Label used for fallback metrics at the call sites.
+    if isinstance(error, LLMNotConfiguredError):
+        return "no_api_key"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, DeadlineExceededError):
+        return "deadline"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+# Absolute monotonic deadline of the request being served, if any.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    # Every LLM call made inside the block gets at most the time that is left.
+    # A nested deadline can only shorten the outer one.
+    if not seconds:
+        yield
+        return
+    outer = _deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(min(outer, deadline) if outer else deadline)
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Async generator closed from another context (client went away).
+            pass
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+
+    # closed -> open after `failure_threshold` consecutive failures; after
+    # `reset_timeout` one probe call is let through (half-open) and its result
+    # closes or re-opens the breaker.
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._opened_count += 1
+                    print(f"[!] LLM circuit breaker OPEN after {self._failures} consecutive failures.")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        # The call ended without telling us anything about upstream health
+        # (queue timeout, 429); let the next call probe instead.
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        state = self.state
+        with self._lock:
+            retry_in = (
+                max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+                if self._state == self.OPEN
+                else 0.0
+            )
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._opened_count,
+                "retry_in_seconds": round(retry_in, 1),
+            }
+
+
+class LatencyTracker:
+
+    # Rolling window of successful call latencies, used for the hedge delay.
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class LLMGateway:
+
+    # Single choke point for every Gemini call:
+    # - per-call timeout = min(default for the call type, time left before the
+    #   request deadline); no time left means no call at all;
+    # - optional hedging: a duplicate call is fired once the first has run
+    #   longer than the p95 latency of its call type, first answer wins;
+    # - one circuit breaker for the upstream, so while Gemini is down callers
+    #   fail immediately and go straight to their local fallbacks;
+    # - every call holds a rate limiter slot (app/core/rate_limiter.py); 429s
+    #   slow the limiter down and are retried instead of tripping the breaker.
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS
+        )
+        self._latency: Dict[str, LatencyTracker] = {}
+
+    def _timeout_for(self, call_type: str) -> float:
+        timeout = settings.LLM_CALL_TIMEOUTS.get(call_type, settings.LLM_DEFAULT_TIMEOUT_SECONDS)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining < settings.LLM_MIN_CALL_SECONDS:
+                raise DeadlineExceededError(
+                    f"{remaining:.1f}s left before the request deadline, skipping {call_type} call"
+                )
+            timeout = min(timeout, remaining)
+        return timeout
+
+    def _admit(self, call_type: str, client) -> float:
+        if client is None:
+            # No API key: not an upstream failure, leave the breaker alone.
+            raise LLMNotConfiguredError("Gemini client is not configured")
+        if not self.breaker.allow():
+            record_llm_call(call_type, outcome="short_circuit")
+            raise CircuitOpenError("Gemini circuit breaker is open")
+        try:
+            return self._timeout_for(call_type)
+        except DeadlineExceededError:
+            # Nothing was sent upstream; release a half-open probe slot.
+            self.breaker.release_probe()
+            record_llm_call(call_type, outcome="deadline")
+            raise
+
+    def _record_error(self, call_type: str, error: Exception, upstream: bool):
+        if isinstance(error, asyncio.TimeoutError) and not upstream:
+            # Timed out waiting for a rate-limit slot; Gemini itself is fine.
+            self.breaker.release_probe()
+            record_llm_call(call_type, outcome="queue_timeout")
+        elif is_rate_limited(error):
+            # Quota, not an outage: the rate limiter backs off, the breaker stays closed.
+            self.breaker.release_probe()
+            record_llm_call(call_type, outcome="rate_limited")
+        else:
+            self.breaker.record_failure()
+            record_llm_call(call_type, outcome="timeout" if isinstance(error, asyncio.TimeoutError) else "error")
+
+    async def generate(self, call_type: str, client, **kwargs) -> Any:
+        # kwargs are passed to client.aio.models.generate_content. The timeout
+        # covers queueing in the rate limiter as well as the call itself.
+        return await self._invoke(call_type, client, "generate_content", kwargs)
+
+    async def embed(self, call_type: str, client, **kwargs) -> Any:
+        # kwargs are passed to client.aio.models.embed_content.
+        return await self._invoke(call_type, client, "embed_content", kwargs)
+
+    async def _invoke(self, call_type: str, client, method: str, kwargs: Dict) -> Any:
+        timeout = self._admit(call_type, client)
+        state = {"in_flight": False}
+        try:
+            response = await asyncio.wait_for(
+                self._call_limited(call_type, client, method, kwargs, state), timeout
+            )
+        except asyncio.CancelledError:
+            # Abandoned by the caller (e.g. a speculative retrieval that was
+            # not needed); says nothing about upstream health.
+            self.breaker.release_probe()
+            raise
+        except Exception as e:
+            self._record_error(call_type, e, state["in_flight"])
+            raise
+        self.breaker.record_success()
+        rate_limiter.record_success()
+        record_llm_call(call_type, response)
+        return response
+
+    async def _call_limited(self, call_type: str, client, method: str, kwargs: Dict, state: Dict):
+        tracker = self._latency.setdefault(call_type, LatencyTracker())
+        retries = settings.LLM_RATE_LIMIT_RETRIES
+        while True:
+            async with rate_limiter.slot(call_type):
+                state["in_flight"] = True
+                start = time.monotonic()
+                try:
+                    response = await self._call_with_hedge(call_type, getattr(client.aio.models, method), tracker, kwargs)
+                except Exception as e:
+                    state["in_flight"] = False
+                    if not is_rate_limited(e) or retries <= 0:
+                        raise
+                    # Back off and queue again while the request deadline allows.
+                    retries -= 1
+                    rate_limiter.record_throttled(e)
+                    record_llm_call(call_type, outcome="rate_limited")
+                    continue
+                tracker.add(time.monotonic() - start)
+                return response
+
+    async def _call_with_hedge(self, call_type: str, call, tracker: LatencyTracker, kwargs: Dict):
+        hedge_after = None
+        if settings.LLM_HEDGE_ENABLED and len(tracker) >= settings.LLM_HEDGE_MIN_SAMPLES:
+            hedge_after = tracker.percentile(0.95)
+        if hedge_after is None:
+            return await call(**kwargs)
+
+        primary = asyncio.ensure_future(call(**kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done or not rate_limiter.try_acquire(call_type):
+                # Hedges only use spare rate-limit capacity.
+                return await primary
+
+            print(f"[*] [LOG] Hedging slow {call_type} call after {hedge_after:.2f}s")
+            record_llm_call(call_type, outcome="hedged")
+            hedge = asyncio.ensure_future(call(**kwargs))
+            hedge.add_done_callback(lambda _: rate_limiter.release(call_type))
+            tasks.append(hedge)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled (deadline, disconnect,
+            # shutdown): no call keeps running, or holding a slot, as an orphan.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def stream(self, call_type: str, client, **kwargs) -> AsyncIterator[Any]:
+        # Streaming variant: the timeout bounds queueing plus the whole stream;
+        # not hedged and not retried (tokens may already be on the wire).
+        timeout = self._admit(call_type, client)
+        deadline = time.monotonic() + timeout
+        last_chunk = None
+        in_flight = False
+        try:
+            async with rate_limiter.slot(call_type, timeout=timeout):
+                in_flight = True
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(**kwargs), deadline - time.monotonic()
+                )
+                iterator = stream.__aiter__()
+                while True:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), left)
+                    except StopAsyncIteration:
+                        break
+                    last_chunk = chunk
+                    yield chunk
+        except Exception as e:
+            self._record_error(call_type, e, in_flight)
+            raise
+        except BaseException:
+            # Cancelled, or closed by a client that disconnected
+            # (GeneratorExit): says nothing about upstream health.
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+        rate_limiter.record_success()
+        # Usage metadata on the final chunk covers the whole stream.
+        record_llm_call(call_type, last_chunk)
+
+    def stats(self) -> Dict:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "hedging_enabled": settings.LLM_HEDGE_ENABLED,
+            "rate_limiter": rate_limiter.stats(),
+            "p95_latency_seconds": {
+                call_type: round(tracker.percentile(0.95), 3)
+                for call_type, tracker in self._latency.items()
+                if len(tracker)
+            },
+        }
+
+
+llm_gateway = LLMGateway()
+
+_BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+registry.gauge(
+    "fundingsense_llm_breaker_state",
+    "Gemini circuit breaker state (0 closed, 1 half-open, 2 open).",
+    [],
+    lambda: {(): _BREAKER_STATES[llm_gateway.breaker.state]},
+)
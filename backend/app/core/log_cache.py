@@ -0,0 +1,158 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.core.persistence import persistence_worker
+from app.core.file_lock import FileLock
+from app.core.metrics import record_cache
+
+
+class LogBackedCache:
+
+    # In-memory LRU mirrored to an append-only JSONL log that every worker
+    # appends to and tail-reads; by default the newest record of a key wins. Misses
+    # first pick up lines other workers appended. The log is compacted to
+    # the LRU contents once it holds more than twice `capacity` lines.
+    # Subclasses map between records and (key, value); with `first_wins`,
+    # replay keeps a key's cached value like put_many(only_new=True) does.
+
+    first_wins = False
+
+    def __init__(self, name: str, path: Path, lock_path: Path, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.path = path
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(lock_path)
+        self._read_bytes = 0
+        self._read_inode = None
+        self._log_lines = 0
+        persistence_worker.register(name, self._flush)
+        self._refresh()
+
+    def _key_value(self, record: Dict) -> Tuple[Hashable, Any]:
+        raise NotImplementedError
+
+    def _to_record(self, key: Hashable, value: Any) -> Dict:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[Hashable], metric: Optional[str] = None) -> List[Optional[Any]]:
+        if any(key not in self._entries for key in keys):
+            self._refresh()
+        results: List[Optional[Any]] = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                if metric:
+                    record_cache(metric, value is not None)
+                results.append(value)
+        return results
+
+    def put_many(self, pairs: Iterable[Tuple[Hashable, Any]], only_new: bool = False):
+        # only_new: keys already cached keep their value and are not re-logged.
+        records = []
+        with self._lock:
+            for key, value in pairs:
+                if only_new and key in self._entries:
+                    self._entries.move_to_end(key)
+                    continue
+                self._store(key, value)
+                records.append(self._to_record(key, value))
+        if records:
+            persistence_worker.submit(self.name, records)
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._evicted(*self._entries.popitem(last=False))
+
+    def _evicted(self, key: Hashable, value: Any):
+        pass
+
+    def _refresh(self):
+        # Cheap stat() first; tail-reads lines appended since the last scan (by any process).
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return
+        if st.st_ino == self._read_inode and st.st_size == self._read_bytes:
+            return
+        try:
+            with self._file_lock.shared():
+                self._read_tail()
+        except Exception as e:
+            print(f"Failed to load {self.name} cache:", e)
+
+    def _read_tail(self):
+        # Caller holds the file lock (shared or exclusive).
+        with self._lock, self.path.open("rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._read_inode or st.st_size < self._read_bytes:
+                # Compacted by another worker: re-read from the start.
+                self._read_bytes = 0
+                self._log_lines = 0
+            self._read_inode = st.st_ino
+            f.seek(self._read_bytes)
+            offset = self._read_bytes
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                self._log_lines += 1
+                try:
+                    key, value = self._key_value(json.loads(line))
+                    if self.first_wins and key in self._entries:
+                        self._entries.move_to_end(key)
+                        continue
+                    self._store(key, value)
+                except Exception as e:
+                    print(f"Failed to read cached {self.name} record: {e}")
+            self._read_bytes = offset
+
+    def _flush(self, batches: List[List[Dict]], fsync: bool):
+        records = [record for batch in batches for record in batch]
+        with self._file_lock.exclusive():
+            with self.path.open("a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            self._read_tail()
+            if self._log_lines > 2 * self.capacity:
+                self._compact(fsync)
+
+    def _compact(self, fsync: bool):
+        # Caller holds the exclusive file lock. Rewrites the log with just the
+        # live LRU entries, oldest first, so replaying it rebuilds the order.
+        with self._lock:
+            lines = [
+                json.dumps(self._to_record(key, value), ensure_ascii=False) + "\n"
+                for key, value in self._entries.items()
+            ]
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            st = self.path.stat()
+            self._read_inode = st.st_ino
+            self._read_bytes = st.st_size
+            self._log_lines = len(lines)
+        print(f"[*] [LOG] Compacted {self.name} cache to {len(lines)} entries.")
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "capacity": self.capacity, "log_lines": self._log_lines}
@@ -0,0 +1,221 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, row in items:
+            for i, bound in enumerate(self.buckets):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {row[i]}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {row[-1]}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    # Read at scrape time from a callback returning {label values: value}.
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], collect: Callable[[], Dict]):
+        super().__init__(name, help_text, labelnames)
+        self._collect = collect
+
+    def _samples(self) -> List[str]:
+        try:
+            values = self._collect()
+        except Exception as e:
+            print(f"[!] Gauge {self.name} collection failed: {e}")
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key if isinstance(key, tuple) else (key,))} {value}"
+            for key, value in values.items()
+        ]
+
+
+class MetricsRegistry:
+
+    # Minimal Prometheus text-format registry. Values are per process; with
+    # several uvicorn workers each scrape sees the worker that served it.
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets=buckets))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str], collect: Callable[[], Dict]) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "fundingsense_stage_duration_seconds",
+    "Duration of pipeline stages (retrieval tiers, validation, generation, translation, storage writes).",
+    ["stage"],
+)
+LLM_CALLS = registry.counter(
+    "fundingsense_llm_calls_total", "Gemini calls by call type and outcome.", ["call_type", "outcome"]
+)
+LLM_TOKENS = registry.counter(
+    "fundingsense_llm_tokens_total", "Gemini tokens by call type and direction.", ["call_type", "direction"]
+)
+CACHE_EVENTS = registry.counter(
+    "fundingsense_cache_events_total", "Cache lookups by cache and result (hit/miss).", ["cache", "result"]
+)
+FALLBACKS = registry.counter(
+    "fundingsense_fallbacks_total", "Degraded paths taken (mock report, empty retrieval, ...).", ["kind", "reason"]
+)
+
+
+# Per-request timing breakdown: a dict installed by collect_timings() that
+# span() adds to. Unset (None) for requests that did not ask for timings.
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            # Async generator closed from another context (client went away).
+            pass
+
+
+@contextmanager
+def span(stage: str):
+    # Times a block into the stage histogram and, if enabled, the request breakdown.
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed * 1000, 1)
+
+
+def record_llm_call(call_type: str, response=None, outcome: str = "ok"):
+    LLM_CALLS.inc(call_type=call_type, outcome=outcome)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, call_type=call_type, direction="prompt")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, call_type=call_type, direction="completion")
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_EVENTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_fallback(kind: str, reason: str):
+    FALLBACKS.inc(kind=kind, reason=reason)
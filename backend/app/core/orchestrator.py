@@ -1,9 +1,26 @@
+import time
 import uuid
+import asyncio
 import datetime
-from app.schemas.analysis import AnalysisRequest, AnalysisResponse
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.schemas.analysis import (
+    AnalysisRequest,
+    AnalysisResponse,
+    BatchAnalysisItem,
+    BatchAnalysisResponse,
+)
+from app.config.settings import settings
+from app.core.response_cache import request_fingerprint
+from app.core.metrics import span, collect_timings
+from app.core.llm_gateway import request_deadline
+from app.core.rate_limiter import llm_priority, PRIORITY_BULK
+from app.core.investor_index import investor_index
+from app.core.retrieval_cache import combo_key
 from app.rag.retriever import Retriever
 from app.reasoning.validator import Validator
+from app.reasoning.scoring import blend_score
 from app.generation.generator import Generator
+from app.schemas.reasoning import ReasoningResult
 
 
 class AnalysisOrchestrator:
@@ -13,36 +30,166 @@ class AnalysisOrchestrator:
         self.validator = Validator()
         self.generator = Generator()
 
-    async def run_analysis(self, request: AnalysisRequest) -> AnalysisResponse:
+    async def run_analysis(
+        self, request: AnalysisRequest, evidence_units: Optional[List] = None
+    ) -> AnalysisResponse:
+        result = None
+        async for stage, payload in self.stream_analysis(request, evidence_units):
+            if stage == "complete":
+                result = payload["data"]
+        return result
+
+    async def run_batch(
+        self, requests: List[AnalysisRequest], max_concurrency: Optional[int] = None
+    ) -> BatchAnalysisResponse:
+        # Retrieval runs once per cohort of normalized (sector, geography, stage);
+        # every item in the cohort is then validated and reported on that shared
+        # evidence, with report generation bounded by a semaphore.
+        cohorts: Dict[Tuple[str, str, str], List[int]] = {}
+        for index, request in enumerate(requests):
+            cohorts.setdefault(self.cohort_key(request), []).append(index)
+
+        # Clients may lower the server's concurrency, never raise it.
+        concurrency = min(max_concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        results: List[Optional[BatchAnalysisItem]] = [None] * len(requests)
+
+        async def run_item(index: int, evidence_units: List):
+            async with semaphore:
+                try:
+                    result = await self.run_analysis(requests[index], evidence_units)
+                    results[index] = BatchAnalysisItem(index=index, status="ok", result=result)
+                except Exception as e:
+                    print(f"[!] Batch item {index} failed: {e}")
+                    results[index] = BatchAnalysisItem(index=index, status="error", error=str(e))
+
+        async def run_cohort(indices: List[int]):
+            lead = requests[indices[0]]
+            try:
+                async with semaphore:
+                    evidence_units = await self.retriever.retrieve_relevant_evidence(
+                        sector=lead.sector,
+                        geography=lead.geography,
+                        funding_stage=lead.funding_stage,
+                    )
+            except Exception as e:
+                print(f"[!] Cohort retrieval failed for {self.cohort_key(lead)}: {e}")
+                for index in indices:
+                    results[index] = BatchAnalysisItem(
+                        index=index, status="error", error=f"Retrieval failed: {e}"
+                    )
+                return
+            await asyncio.gather(*(run_item(index, evidence_units) for index in indices))
+
+        print(f"[*] [LOG] Batch of {len(requests)} analyses grouped into {len(cohorts)} cohorts.")
+        # Batch Gemini calls queue behind interactive traffic.
+        with llm_priority(PRIORITY_BULK):
+            await asyncio.gather(*(run_cohort(indices) for indices in cohorts.values()))
+
+        succeeded = sum(1 for r in results if r.status == "ok")
+        return BatchAnalysisResponse(
+            results=results,
+            cohort_count=len(cohorts),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+        )
+
+    @staticmethod
+    def cohort_key(request: AnalysisRequest) -> Tuple[str, str, str]:
+        return combo_key(request.sector, request.geography, request.funding_stage)
+
+    async def stream_analysis(
+        self, request: AnalysisRequest, evidence_units: Optional[List] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        # Yields (stage, {"data", "stage_ms", "elapsed_ms"}) as each pipeline
+        # step finishes: evidence -> reasoning -> report -> scores -> complete.
+        # Pre-fetched evidence_units (batch cohorts) skip the retrieval step.
+        # Gemini calls share one deadline; when it runs out the remaining
+        # stages use their local fallbacks instead of waiting on the API.
+        with collect_timings() as timings, request_deadline(settings.ANALYSIS_DEADLINE_SECONDS):
+            async for stage, payload in self._run_stages(request, evidence_units, timings):
+                yield stage, payload
+
+    async def _run_stages(
+        self, request: AnalysisRequest, evidence_units: Optional[List], timings: Dict[str, float]
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        pipeline_start = time.perf_counter()
+        stage_start = pipeline_start
+
+        def event(data) -> Dict:
+            nonlocal stage_start
+            now = time.perf_counter()
+            payload = {
+                "data": data,
+                "stage_ms": round((now - stage_start) * 1000, 1),
+                "elapsed_ms": round((now - pipeline_start) * 1000, 1),
+            }
+            stage_start = now
+            return payload
 
         # 1. RETRIEVAL
         # Fetches contextually relevant facts based on startup sector, geography, and stage.
-        evidence_units = await self.retriever.retrieve_relevant_evidence(
-            sector=request.sector,
-            geography=request.geography,
-            funding_stage=request.funding_stage,
-            startup_description=request.startup_description,
-        )
+        if evidence_units is None:
+            evidence_units = await self.retriever.retrieve_relevant_evidence(
+                sector=request.sector,
+                geography=request.geography,
+                funding_stage=request.funding_stage,
+                startup_description=request.startup_description,
+            )
+        evidence_for_ui = self._evidence_for_ui(evidence_units)
+        yield "evidence", event(evidence_for_ui)
 
         # 2. VALIDATION
         # Analyzes evidence and determines which logical claims are supported or rejected.
-        reasoning_result = self.validator.validate(
-            evidence=evidence_units,
-            sector=request.sector,
-            geography=request.geography,
-            funding_stage=request.funding_stage,
-        )
+        with span("validation"):
+            reasoning_result = self.validator.validate(
+                evidence=evidence_units,
+                sector=request.sector,
+                geography=request.geography,
+                funding_stage=request.funding_stage,
+            )
+        yield "reasoning", event(reasoning_result.model_dump())
 
         # 3. GENERATION
         # Translates validated reasoning into professional, multilingual prose via Gemini.
-        report = await self.generator.generate_report(
-            reasoning_result=reasoning_result,
-            evidence_units=evidence_units,
-            language=request.language,
+        # Investors ranked from evidence deal history seed the recommendations.
+        investor_index.observe(evidence_units, sector=request.sector)
+        with span("investor_ranking"):
+            investor_shortlist = investor_index.shortlist(
+                request.sector, request.geography, request.funding_stage
+            )
+        with span("generation"):
+            report = await self.generator.generate_report(
+                reasoning_result=reasoning_result,
+                evidence_units=evidence_units,
+                language=request.language,
+                investor_shortlist=investor_shortlist,
+            )
+        yield "report", event(report)
+
+        # 4. SCORING
+        final_investors, blended_score = self._score(request, reasoning_result, report, evidence_units)
+        yield "scores", event(
+            {
+                "overall_score": blended_score,
+                "confidence_indicator": reasoning_result.confidence_level,
+                "recommended_investors": final_investors,
+            }
+        )
+
+        response = self._build_response(
+            request, reasoning_result, report, evidence_units, evidence_for_ui,
+            final_investors, blended_score,
         )
+        if request.include_timings:
+            timings["total"] = round((time.perf_counter() - pipeline_start) * 1000, 1)
+            response.metadata["timings_ms"] = dict(timings)
+        yield "complete", event(response)
 
-        evidence_for_ui = [
+    def _evidence_for_ui(self, evidence_units: List) -> List[Dict]:
+        return [
             {
+                "evidence_id": ev.evidence_id,
                 "source_type": ev.source_type.value if hasattr(ev.source_type, "value") else str(ev.source_type),
                 "title": ev.title,
                 "source_name": ev.source_name,
@@ -51,10 +198,21 @@ class AnalysisOrchestrator:
                 "usage_reason": (
                     ev.usage_tags[0] if ev.usage_tags else "General context"
                 ),
+                "excerpt": ev.content[:300] if ev.content else None,
+                "usage_tags": list(ev.usage_tags),
+                "investors": list(ev.investors),
+                "geography": ev.geography,
             }
             for ev in evidence_units
         ]
 
+    def _score(
+        self,
+        request: AnalysisRequest,
+        reasoning_result: ReasoningResult,
+        report: Dict,
+        evidence_units: List,
+    ) -> Tuple[List[Dict], int]:
         investors_from_report = report.get("recommended_investors", [])
         final_investors = []
         investor_scores = []
@@ -84,27 +242,21 @@ class AnalysisOrchestrator:
                 }
             )
 
-        # Calculates a more intuitive overall fit score
-        avg_inv_score = (
-            sum(investor_scores) / max(len(investor_scores), 1)
-            if investor_scores
-            else 50
-        )
-        # Evidence score is normalized
-        evidence_score = min(100, (len(evidence_units) / 7.0) * 100) if evidence_units else 30
-        
-        # 0.6 factor from validator ratio, 0.4 from aggregate investor match
-        reasoning_ratio_score = reasoning_result.support_ratio * 100
-        
-        blended_score = int(
-            (avg_inv_score * 0.45) + 
-            (reasoning_ratio_score * 0.45) + 
-            (evidence_score * 0.1)
-        )
-        
-        # Final cap for realism
-        blended_score = max(5, min(99, blended_score))
+        # Calculates a more intuitive overall fit score (app/reasoning/scoring.py)
+        blended_score = blend_score(investor_scores, reasoning_result.support_ratio, len(evidence_units))
+
+        return final_investors, blended_score
 
+    def _build_response(
+        self,
+        request: AnalysisRequest,
+        reasoning_result: ReasoningResult,
+        report: Dict,
+        evidence_units: List,
+        evidence_for_ui: List[Dict],
+        final_investors: List[Dict],
+        blended_score: int,
+    ) -> AnalysisResponse:
         return AnalysisResponse(
             analysis_id=str(uuid.uuid4()),
             user_id=request.user_id,
@@ -136,5 +288,7 @@ class AnalysisOrchestrator:
                 "stage": request.funding_stage,
                 "geography": request.geography,
                 "raw_support_ratio": reasoning_result.support_ratio,
+                "evidence_prompt_tokens": report.get("evidence_tokens"),
+                "request_fingerprint": request_fingerprint(request),
             },
         )
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.metrics import registry, span
+
+
+DURABILITY_MODES = ("always", "interval", "none")
+
+_STOP = object()
+
+
+def atomic_write_json(path: Path, data: Any, fsync: bool = True, indent: Optional[int] = 2):
+    # Write to a sibling temp file and rename over the target so readers never
+    # observe a half-written file.
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PersistenceWorker:
+
+    # Write-behind persistence: request handlers enqueue mutations and return
+    # immediately, a background thread batches them per target and flushes
+    # them to disk off the event loop.
+    #
+    # Durability modes:
+    #   - "always":   flush + fsync as soon as a mutation is queued.
+    #   - "interval": group commit, flush + fsync at most every N ms.
+    #   - "none":     group commit without fsync (dev only, OS-buffered).
+
+    def __init__(
+        self,
+        durability: Optional[str] = None,
+        flush_interval_ms: Optional[int] = None,
+    ):
+        self.durability = durability or settings.PERSIST_DURABILITY
+        if self.durability not in DURABILITY_MODES:
+            print(f"[!] Unknown durability mode '{self.durability}', using 'interval'.")
+            self.durability = "interval"
+        interval_ms = (
+            flush_interval_ms
+            if flush_interval_ms is not None
+            else settings.PERSIST_FLUSH_INTERVAL_MS
+        )
+        self.flush_interval = max(interval_ms, 0) / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._handlers: Dict[str, Callable[[List[Any], bool], None]] = {}
+        self._retry: Dict[str, List[Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        self._flush_count = 0
+        self._flushed_mutations = 0
+        self._failures = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def register(self, target: str, handler: Callable[[List[Any], bool], None]):
+        # handler(payloads, fsync) writes one batch of mutations for `target`.
+        self._handlers[target] = handler
+
+    def submit(self, target: str, payload: Any = None):
+        if target not in self._handlers:
+            raise KeyError(f"No persistence handler registered for '{target}'")
+        self.start()
+        self._queue.put((target, payload))
+
+    def start(self):
+        with self._state_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="persistence-worker", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        # Drains everything still queued before returning.
+        with self._state_lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self.flush()
+
+    def flush(self):
+        # Synchronously writes every pending mutation (used on shutdown).
+        self._flush_batch(self._drain()[0])
+
+    def _drain(self, first: Any = None) -> Tuple[List, bool]:
+        # (queued mutations, whether a stop was requested among them)
+        stop_requested = first is _STOP
+        batch = [] if first is None or first is _STOP else [first]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, stop_requested
+            if item is _STOP:
+                stop_requested = True
+            else:
+                batch.append(item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if self.durability != "always" and self.flush_interval and item is not _STOP:
+                # Group commit: let concurrent mutations pile up for one interval.
+                deadline = time.monotonic() + self.flush_interval
+                stop_requested = False
+                batch = [item]
+                while not stop_requested:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        nxt = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if nxt is _STOP:
+                        stop_requested = True
+                    else:
+                        batch.append(nxt)
+                rest, stopped = self._drain()
+                self._flush_batch(batch + rest)
+                stop_requested = stop_requested or stopped
+            else:
+                batch, stop_requested = self._drain(item)
+                self._flush_batch(batch)
+            if stop_requested:
+                self._flush_batch(self._drain()[0])
+                return
+
+    def _flush_batch(self, batch: List):
+        with self._flush_lock:
+            grouped: Dict[str, List[Any]] = {
+                target: payloads for target, payloads in self._retry.items()
+            }
+            self._retry = {}
+            for target, payload in batch:
+                grouped.setdefault(target, []).append(payload)
+            if not grouped:
+                return
+
+            fsync = self.durability != "none"
+            start = time.perf_counter()
+            for target, payloads in grouped.items():
+                try:
+                    with span("storage_write"):
+                        self._handlers[target](payloads, fsync)
+                    self._flushed_mutations += len(payloads)
+                except Exception as e:
+                    # Keep the mutations around so the next flush retries them.
+                    print(f"[!] Persistence flush failed for '{target}': {e}")
+                    self._failures += 1
+                    self._retry.setdefault(target, []).extend(payloads)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            self._flush_count += 1
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def stats(self) -> Dict:
+        return {
+            "durability": self.durability,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queue_depth": self._queue.qsize(),
+            "pending_retries": sum(len(p) for p in self._retry.values()),
+            "flush_count": self._flush_count,
+            "flushed_mutations": self._flushed_mutations,
+            "failed_flushes": self._failures,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+            "max_flush_ms": round(self._max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self._flush_count, 3)
+            if self._flush_count
+            else 0.0,
+        }
+
+
+persistence_worker = PersistenceWorker()
+registry.gauge(
+    "fundingsense_persistence_queue_depth",
+    "Mutations waiting for the write-behind worker.",
+    [],
+    lambda: {(): persistence_worker.stats()["queue_depth"]},
+)
+atexit.register(persistence_worker.stop)
@@ -0,0 +1,165 @@
+import time
+import random
+import asyncio
+import datetime
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.storage import storage
+from app.core.metrics import registry
+from app.core.rate_limiter import llm_priority, PRIORITY_BULK
+from app.core.retrieval_cache import retrieval_cache, combo_key, Combo
+from app.rag.retriever import Retriever
+
+
+PREWARM_REFRESHES = registry.counter(
+    "fundingsense_prewarm_refreshes_total",
+    "Pre-warm web-tier refreshes by outcome (warmed, empty, over_budget).",
+    ["outcome"],
+)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def in_hours_window(window: str, hour: int) -> bool:
+    # "1-6" covers 01:00-06:59; "22-4" wraps past midnight; "" is always on.
+    if not window.strip():
+        return True
+    try:
+        start, end = (int(part) for part in window.split("-"))
+    except ValueError:
+        print(f"[!] Ignoring invalid PREWARM_HOURS '{window}'.")
+        return True
+    if start <= end:
+        return start <= hour <= end
+    return hour >= start or hour <= end
+
+
+class PrewarmScheduler:
+
+    # Keeps the retrieval cache warm for popular requests. Every
+    # PREWARM_INTERVAL_SECONDS it counts the (sector, geography, stage) of
+    # recent stored analyses, and re-runs the web tier for the most frequent
+    # combos whose cached results are missing or expire within
+    # PREWARM_REFRESH_AHEAD_SECONDS, as bulk-priority LLM calls and within
+    # PREWARM_SEARCHES_PER_HOUR. Runs in every worker; the cache is shared,
+    # so a combo one worker refreshed is skipped by the others.
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._retriever = None
+        self._searches: deque = deque()
+        self._warmed: deque = deque(maxlen=50)
+        self._candidates: List[Dict] = []
+        self._last_run: Optional[str] = None
+
+    async def start(self):
+        if self._task:
+            return
+        if not settings.PREWARM_ENABLED or not retrieval_cache.enabled:
+            print("[*] Pre-warm scheduler disabled by config.")
+            return
+        if not settings.GOOGLE_API_KEY:
+            print("[*] Pre-warm scheduler idle: no GOOGLE_API_KEY, the web tier is off.")
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        # Workers boot together; a random first delay spreads their cycles.
+        await asyncio.sleep(random.uniform(0, min(settings.PREWARM_INTERVAL_SECONDS, 60)))
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[!] Pre-warm cycle failed: {e}")
+            await asyncio.sleep(settings.PREWARM_INTERVAL_SECONDS)
+
+    def popular_combos(self, limit: int) -> List[Tuple[Combo, Tuple[str, str, str], int]]:
+        # (normalized combo, most common spelling, analyses) most frequent first.
+        cutoff = (_utcnow() - datetime.timedelta(days=settings.PREWARM_LOOKBACK_DAYS)).isoformat()
+        counts: Counter = Counter()
+        spellings: Dict[Combo, Counter] = {}
+        for created_at, metadata in storage.analysis_metadata():
+            if created_at and created_at < cutoff:
+                continue
+            sector = metadata.get("sector")
+            if not sector:
+                continue
+            raw = (sector, metadata.get("geography") or "", metadata.get("stage") or "")
+            combo = combo_key(*raw)
+            counts[combo] += 1
+            spellings.setdefault(combo, Counter())[raw] += 1
+        return [(combo, spellings[combo].most_common(1)[0][0], n) for combo, n in counts.most_common(limit)]
+
+    def _budget_left(self) -> int:
+        horizon = time.monotonic() - 3600
+        while self._searches and self._searches[0] < horizon:
+            self._searches.popleft()
+        return settings.PREWARM_SEARCHES_PER_HOUR - len(self._searches)
+
+    def _get_retriever(self):
+        if self._retriever is None:
+            self._retriever = Retriever()
+        return self._retriever
+
+    async def run_once(self) -> List[Dict]:
+        # One cycle; returns what was warmed.
+        if not in_hours_window(settings.PREWARM_HOURS, _utcnow().hour):
+            return []
+        self._last_run = _utcnow().isoformat() + "Z"
+        combos = await asyncio.to_thread(self.popular_combos, settings.PREWARM_TOP_COMBOS)
+        candidates, warmed = [], []
+        for combo, (sector, geography, stage), count in combos:
+            expires_in = await asyncio.to_thread(retrieval_cache.expires_in, combo)
+            candidates.append({
+                "sector": sector, "geography": geography, "stage": stage,
+                "analyses": count, "expires_in_seconds": max(0, int(expires_in)),
+            })
+            if expires_in > settings.PREWARM_REFRESH_AHEAD_SECONDS:
+                continue
+            if self._budget_left() <= 0:
+                PREWARM_REFRESHES.inc(outcome="over_budget")
+                continue
+            self._searches.append(time.monotonic())
+            with llm_priority(PRIORITY_BULK):
+                units = await self._get_retriever().refresh_web_tier(sector, geography, stage)
+            if not units:
+                # Failed or empty search (quota, open breaker): stop spending
+                # budget this cycle, the next one retries.
+                PREWARM_REFRESHES.inc(outcome="empty")
+                break
+            PREWARM_REFRESHES.inc(outcome="warmed")
+            item = {
+                "sector": sector, "geography": geography, "stage": stage,
+                "analyses": count, "units": units, "at": _utcnow().isoformat() + "Z",
+            }
+            self._warmed.append(item)
+            warmed.append(item)
+        self._candidates = candidates
+        if warmed:
+            print(f"[*] [LOG] Pre-warmed web retrieval for {len(warmed)} popular combos.")
+        return warmed
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "last_run": self._last_run,
+            "searches_last_hour": settings.PREWARM_SEARCHES_PER_HOUR - self._budget_left(),
+            "searches_per_hour": settings.PREWARM_SEARCHES_PER_HOUR,
+            "hours": settings.PREWARM_HOURS or "any",
+            "popular_combos": self._candidates,
+            "recently_warmed": list(self._warmed)[-20:],
+            "retrieval_cache": retrieval_cache.stats(),
+        }
+
+
+prewarm_scheduler = PrewarmScheduler()
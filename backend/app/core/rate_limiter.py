@@ -0,0 +1,275 @@
+import re
+import time
+import asyncio
+import itertools
+import contextvars
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.core.metrics import registry
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+# Chat is the only path where a user is watching text appear.
+_DEFAULT_PRIORITY = {
+    "chat": PRIORITY_INTERACTIVE, "expansion": PRIORITY_INTERACTIVE, "embedding": PRIORITY_INTERACTIVE,
+}
+
+_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("llm_priority", default=None)
+
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "fundingsense_llm_queue_wait_seconds",
+    "Time Gemini calls waited for a rate-limit / concurrency slot.",
+    ["call_type"],
+)
+
+
+@contextmanager
+def llm_priority(level: int):
+    # Sets the queue priority of every LLM call made inside the block
+    # (batch and job workers run as PRIORITY_BULK).
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        try:
+            _priority.reset(token)
+        except ValueError:
+            pass
+
+
+def is_rate_limited(error: Exception) -> bool:
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    # Gemini puts a RetryInfo.retryDelay ("7s") in the error details.
+    match = _RETRY_DELAY_RE.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class _TokenBucket:
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_minute = per_minute
+        self.capacity = max(1.0, per_minute * burst_seconds / 60.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float, throttle: float) -> float:
+        # Takes a token and returns 0, or returns the seconds until one is available.
+        rate = self.per_minute * throttle / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate if rate > 0 else 1.0
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "call_type", "future")
+
+    def __init__(self, priority: int, seq: int, call_type: str, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.call_type = call_type
+        self.future = future
+
+
+class LLMRateLimiter:
+
+    # Client-side governor in front of Gemini:
+    # - a token bucket (requests/minute) and a concurrency cap per call type,
+    #   plus a total concurrency cap across types;
+    # - waiters are served by priority, then arrival, so chat is not stuck
+    #   behind a batch of reports;
+    # - on a 429 every bucket is slowed down (multiplicative decrease) and
+    #   dispatch pauses for the server's retry delay; successes restore the
+    #   rate gradually (additive increase).
+    # Limits are per process; with several uvicorn workers divide the quota.
+
+    def __init__(self):
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._active: Dict[str, int] = defaultdict(int)
+        self._total_active = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._throttle = 1.0
+        self._paused_until = 0.0
+        self._last_throttled = 0.0
+        self._consecutive_throttles = 0
+        self._throttle_events = 0
+        self._wait_totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+
+    @property
+    def throttle(self) -> float:
+        return self._throttle
+
+    def _bucket(self, call_type: str) -> _TokenBucket:
+        bucket = self._buckets.get(call_type)
+        if bucket is None:
+            per_minute = settings.LLM_REQUESTS_PER_MINUTE.get(call_type, settings.LLM_DEFAULT_REQUESTS_PER_MINUTE)
+            bucket = self._buckets[call_type] = _TokenBucket(per_minute, settings.LLM_RATE_BURST_SECONDS)
+        return bucket
+
+    def _concurrency_limit(self, call_type: str) -> int:
+        return settings.LLM_MAX_CONCURRENCY.get(call_type, settings.LLM_DEFAULT_MAX_CONCURRENCY)
+
+    def _has_capacity(self, call_type: str) -> bool:
+        return (
+            self._total_active < settings.LLM_TOTAL_CONCURRENCY
+            and self._active[call_type] < self._concurrency_limit(call_type)
+        )
+
+    def _grant(self, call_type: str):
+        self._active[call_type] += 1
+        self._total_active += 1
+
+    def _release(self, call_type: str):
+        self._active[call_type] -= 1
+        self._total_active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        retry_in: Optional[float] = None
+        if now < self._paused_until:
+            retry_in = self._paused_until - now
+            self._waiters = [w for w in self._waiters if not w.future.done()]
+        else:
+            waiting: List[_Waiter] = []
+            for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+                if waiter.future.done():
+                    continue
+                if not self._has_capacity(waiter.call_type):
+                    waiting.append(waiter)
+                    continue
+                delay = self._bucket(waiter.call_type).take(now, self._throttle)
+                if delay:
+                    waiting.append(waiter)
+                    retry_in = delay if retry_in is None else min(retry_in, delay)
+                    continue
+                self._grant(waiter.call_type)
+                waiter.future.set_result(None)
+            self._waiters = waiting
+
+        if self._waiters and retry_in is not None:
+            self._timer = asyncio.get_running_loop().call_later(retry_in, self._dispatch)
+
+    @asynccontextmanager
+    async def slot(self, call_type: str, timeout: Optional[float] = None):
+        # Holds one request slot of `call_type` for the duration of the block.
+        priority = _priority.get()
+        if priority is None:
+            priority = _DEFAULT_PRIORITY.get(call_type, PRIORITY_NORMAL)
+        waiter = _Waiter(priority, next(self._seq), call_type, asyncio.get_running_loop().create_future())
+        start = time.monotonic()
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Timed out in the queue; give the slot back if it was granted meanwhile.
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(call_type)
+            raise
+        waited = time.monotonic() - start
+        QUEUE_WAIT_SECONDS.observe(waited, call_type=call_type)
+        totals = self._wait_totals[call_type]
+        totals[0] += waited
+        totals[1] += 1
+        try:
+            yield
+        finally:
+            self._release(call_type)
+
+    def try_acquire(self, call_type: str) -> bool:
+        # Non-blocking slot for opportunistic work (hedged requests); release() it after.
+        if self._waiters or time.monotonic() < self._paused_until or not self._has_capacity(call_type):
+            return False
+        if self._bucket(call_type).take(time.monotonic(), self._throttle):
+            return False
+        self._grant(call_type)
+        return True
+
+    def release(self, call_type: str):
+        self._release(call_type)
+
+    def record_throttled(self, error: Exception) -> float:
+        # Called on a 429; returns how long dispatch is paused.
+        now = time.monotonic()
+        self._consecutive_throttles += 1
+        self._throttle_events += 1
+        self._last_throttled = now
+        self._throttle = max(self._throttle * 0.5, settings.LLM_MIN_THROTTLE)
+        backoff = _retry_after(error) or min(
+            settings.LLM_RATE_LIMIT_BACKOFF_SECONDS * 2 ** (self._consecutive_throttles - 1), 60.0
+        )
+        self._paused_until = max(self._paused_until, now + backoff)
+        for bucket in self._buckets.values():
+            bucket.tokens = 0.0
+        print(f"[!] Gemini rate limited; pausing {backoff:.1f}s, throughput at {self._throttle:.0%} of budget.")
+        return backoff
+
+    def record_success(self):
+        self._consecutive_throttles = 0
+        if self._throttle < 1.0 and time.monotonic() - self._last_throttled > settings.LLM_RATE_LIMIT_BACKOFF_SECONDS:
+            self._throttle = min(1.0, self._throttle + 0.05)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth: Dict[str, int] = defaultdict(int)
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                depth[waiter.call_type] += 1
+        return dict(depth)
+
+    def stats(self) -> Dict:
+        depth = self.queue_depth()
+        call_types = set(self._buckets) | set(depth)
+        return {
+            "throttle": round(self._throttle, 2),
+            "paused_for_seconds": round(max(self._paused_until - time.monotonic(), 0.0), 1),
+            "rate_limited_events": self._throttle_events,
+            "active": self._total_active,
+            "call_types": {
+                call_type: {
+                    "active": self._active.get(call_type, 0),
+                    "queued": depth.get(call_type, 0),
+                    "requests_per_minute": round(self._bucket(call_type).per_minute * self._throttle, 1),
+                    "avg_queue_wait_ms": round(
+                        self._wait_totals[call_type][0] / self._wait_totals[call_type][1] * 1000, 1
+                    ) if self._wait_totals[call_type][1] else 0.0,
+                }
+                for call_type in sorted(call_types)
+            },
+        }
+
+
+rate_limiter = LLMRateLimiter()
+
+registry.gauge(
+    "fundingsense_llm_queue_depth",
+    "Gemini calls waiting for a rate-limit / concurrency slot.",
+    ["call_type"],
+    rate_limiter.queue_depth,
+)
+registry.gauge(
+    "fundingsense_llm_throttle_ratio",
+    "Fraction of the configured Gemini request rate currently in use after 429 backoff.",
+    [],
+    lambda: {(): rate_limiter.throttle},
+)
@@ -0,0 +1,137 @@
+import json
+import asyncio
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.storage import storage, DATA_DIR
+from app.core.log_cache import LogBackedCache
+from app.core.metrics import record_cache
+from app.schemas.analysis import AnalysisRequest, AnalysisResponse
+
+
+# Append-only log of {"user_id", "key", "analysis_id"} records.
+IDEMPOTENCY_KEYS_FILE = DATA_DIR / "idempotency_keys.jsonl"
+IDEMPOTENCY_KEYS_LOCK_FILE = DATA_DIR / ".idempotency_keys.lock"
+
+
+def _norm(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def request_fingerprint(request: AnalysisRequest) -> str:
+    # Canonical hash of everything that changes the analysis output; user_id is
+    # deliberately left out because lookups are already scoped per user.
+    canonical = {
+        "startup_description": _norm(request.startup_description),
+        "sector": _norm(request.sector),
+        "funding_stage": _norm(request.funding_stage),
+        "geography": _norm(request.geography),
+        "language": _norm(request.language),
+    }
+    digest = hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+    return f"req:{digest}"
+
+
+class IdempotencyConflictError(Exception):
+    pass
+
+
+class IdempotencyKeyBindings(LogBackedCache):
+
+    # Idempotency-Keys whose first request was answered from another
+    # request's stored analysis (fingerprint hit). Analyses run under a key
+    # carry it in their metadata instead. A key is bound once.
+
+    first_wins = True
+
+    def __init__(self, capacity: Optional[int] = None):
+        super().__init__(
+            "idempotency_keys",
+            IDEMPOTENCY_KEYS_FILE,
+            IDEMPOTENCY_KEYS_LOCK_FILE,
+            capacity or settings.ANALYSIS_IDEMPOTENCY_KEYS_SIZE,
+        )
+
+    def _key_value(self, record: Dict):
+        return (record["user_id"], record["key"]), record["analysis_id"]
+
+    def _to_record(self, key: tuple, value: str) -> Dict:
+        return {"user_id": key[0], "key": key[1], "analysis_id": value}
+
+
+class AnalysisResponseCache:
+
+    # Idempotent /analyze: a resubmitted request (same canonical fingerprint, or
+    # same Idempotency-Key header) from the same user returns the analysis that
+    # was already stored instead of re-running the pipeline.
+    #
+    # The fingerprint is saved in AnalysisResponse.metadata, so the lookup table
+    # lives in the storage index and is shared by every worker process.
+    # Identical requests arriving while the first is still running wait for it.
+
+    def __init__(self, ttl_seconds: Optional[int] = None, bindings: Optional[IdempotencyKeyBindings] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANALYSIS_RESPONSE_CACHE_TTL_SECONDS
+        self.bindings = bindings or IdempotencyKeyBindings()
+        # scope -> (request fingerprint, future of the running analysis)
+        self._inflight: Dict[tuple, Tuple[str, asyncio.Future]] = {}
+
+    def _find_by_idempotency_key(self, user_id: Optional[str], key: str) -> Optional[AnalysisResponse]:
+        cached = storage.find_by_request_key(user_id, key, self.ttl_seconds)
+        if cached is None:
+            analysis_id = self.bindings.get_many([(user_id, key)])[0]
+            if analysis_id:
+                cached = storage.get_analysis_by_id(analysis_id, user_id, self.ttl_seconds)
+        return cached
+
+    def lookup(
+        self, request: AnalysisRequest, idempotency_key: Optional[str] = None
+    ) -> Optional[AnalysisResponse]:
+        fingerprint = request_fingerprint(request)
+        if idempotency_key:
+            key = f"idem:{idempotency_key}"
+            cached = self._find_by_idempotency_key(request.user_id, key)
+            if cached is not None and cached.metadata.get("request_fingerprint") != fingerprint:
+                raise IdempotencyConflictError(
+                    "Idempotency-Key was already used for a different analysis request."
+                )
+            if cached is not None:
+                record_cache("analyze_response", True)
+                return cached
+        cached = storage.find_by_request_key(request.user_id, fingerprint, self.ttl_seconds)
+        record_cache("analyze_response", cached is not None)
+        if cached is not None and idempotency_key:
+            # The key now stands for this analysis; a later reuse with a
+            # different body is a conflict.
+            self.bindings.put_many([((request.user_id, key), cached.analysis_id)], only_new=True)
+        return cached
+
+    async def get_or_run(self, request: AnalysisRequest, idempotency_key: Optional[str], run):
+        # run() executes and stores the analysis; concurrent duplicates share it.
+        fingerprint = request_fingerprint(request)
+        scope = (request.user_id, idempotency_key or fingerprint)
+        pending = self._inflight.get(scope)
+        if pending is not None:
+            pending_fingerprint, pending_future = pending
+            if pending_fingerprint != fingerprint:
+                raise IdempotencyConflictError(
+                    "Idempotency-Key is already in use by a different analysis request."
+                )
+            return await asyncio.shield(pending_future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[scope] = (fingerprint, future)
+        try:
+            result = await run()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception as retrieved.
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(scope, None)
+
+
+response_cache = AnalysisResponseCache()
@@ -0,0 +1,115 @@
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.storage import DATA_DIR
+from app.core.log_cache import LogBackedCache
+from app.core.evidence_cache import evidence_cache
+from app.core.metrics import record_cache
+from app.schemas.evidence import EvidenceRecord
+
+
+# Append-only log of {"combo", "ids", "fetched_at", "warmed"} records.
+RETRIEVAL_CACHE_FILE = DATA_DIR / "retrieval_cache.jsonl"
+RETRIEVAL_CACHE_LOCK_FILE = DATA_DIR / ".retrieval_cache.lock"
+
+Combo = Tuple[str, str, str]
+
+
+def combo_key(sector: str, geography: str, funding_stage: str) -> Combo:
+    # Normalized (sector, geography, stage); also the batch cohort key.
+    def norm(value: str) -> str:
+        return " ".join((value or "").lower().split())
+
+    return norm(sector), norm(geography), norm(funding_stage)
+
+
+class _CachedRetrieval:
+    __slots__ = ("ids", "fetched_at", "warmed")
+
+    def __init__(self, ids: List[str], fetched_at: float, warmed: bool):
+        self.ids = ids
+        self.fetched_at = fetched_at
+        self.warmed = warmed
+
+
+class RetrievalCache(LogBackedCache):
+
+    # Web-tier (grounded search) results per normalized (sector, geography,
+    # stage), kept RETRIEVAL_CACHE_TTL_SECONDS and shared by workers. Only
+    # evidence ids are stored; the units come from the evidence cache, and an
+    # entry whose units were evicted counts as a miss. Entries written by the
+    # pre-warm scheduler are flagged so its hit rate can be reported.
+
+    def __init__(self, capacity: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        super().__init__(
+            "retrieval",
+            RETRIEVAL_CACHE_FILE,
+            RETRIEVAL_CACHE_LOCK_FILE,
+            capacity or settings.RETRIEVAL_CACHE_SIZE,
+        )
+        self.ttl = settings.RETRIEVAL_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._counts_lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._warmed_hits = 0
+
+    def _key_value(self, record: Dict):
+        return tuple(record["combo"]), _CachedRetrieval(record["ids"], record["fetched_at"], record.get("warmed", False))
+
+    def _to_record(self, key: Combo, value: _CachedRetrieval) -> Dict:
+        return {"combo": list(key), "ids": value.ids, "fetched_at": value.fetched_at, "warmed": value.warmed}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def lookup(self, combo: Combo) -> Optional[List[EvidenceRecord]]:
+        entry = self.get_many([combo])[0]
+        if entry is not None and time.time() - entry.fetched_at >= self.ttl:
+            # Another worker may have refreshed it since.
+            self._refresh()
+            with self._lock:
+                entry = self._entries.get(combo)
+        units = None
+        if entry is not None and time.time() - entry.fetched_at < self.ttl:
+            cached = evidence_cache.get_many(entry.ids)
+            if all(unit is not None for unit in cached):
+                units = cached
+        with self._counts_lock:
+            self._lookups += 1
+            if units is not None:
+                self._hits += 1
+                self._warmed_hits += entry.warmed
+        record_cache("retrieval", units is not None)
+        return units
+
+    def store(self, combo: Combo, units: List[EvidenceRecord], warmed: bool = False):
+        # Units must already be in the evidence cache (the retriever puts them there).
+        self.put_many([(combo, _CachedRetrieval([ev.evidence_id for ev in units], time.time(), warmed))])
+
+    def expires_in(self, combo: Combo) -> float:
+        # Seconds until the entry goes stale (<= 0 when missing or stale),
+        # counting entries other workers wrote.
+        self._refresh()
+        with self._lock:
+            entry = self._entries.get(combo)
+        if entry is None:
+            return 0.0
+        return entry.fetched_at + self.ttl - time.time()
+
+    def stats(self) -> Dict:
+        with self._counts_lock:
+            lookups, hits, warmed_hits = self._lookups, self._hits, self._warmed_hits
+        return {
+            **super().stats(),
+            "ttl_seconds": self.ttl,
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "hits_on_warmed": warmed_hits,
+        }
+
+
+retrieval_cache = RetrievalCache()
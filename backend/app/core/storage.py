@@ -1,31 +1,120 @@
+import os
 import json
-from typing import List, Dict, Optional
+import datetime
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Iterator, Tuple
 from pathlib import Path
 
 from app.schemas.analysis import AnalysisResponse
+from app.core.persistence import persistence_worker, atomic_write_json
+from app.core.evidence_catalog import EvidenceCatalog
+from app.core.investor_index import investor_index
+from app.core.file_lock import FileLock
+from app.config.settings import settings
+from app.core.metrics import record_cache
 
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
-ANALYSES_FILE = DATA_DIR / "analyses.json"
+# Append-only log, one AnalysisResponse JSON document per line.
+ANALYSES_FILE = DATA_DIR / "analyses.jsonl"
+LEGACY_ANALYSES_FILE = DATA_DIR / "analyses.json"
+# Guards every read-modify-write across uvicorn worker processes.
+LOCK_FILE = DATA_DIR / ".storage.lock"
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+class _AnalysisIndexEntry:
+
+    # Lightweight summary kept in memory for every stored analysis. The full
+    # AnalysisResponse is only parsed from (offset, length) when accessed.
+
+    __slots__ = (
+        "analysis_id",
+        "user_id",
+        "offset",
+        "length",
+        "overall_score",
+        "investor_count",
+        "evidence_count",
+        "created_at",
+        "metadata",
+    )
+
+    def __init__(self, record: Dict, offset: Optional[int] = None, length: int = 0):
+        self.analysis_id = record["analysis_id"]
+        self.user_id = record.get("user_id")
+        self.offset = offset  # None while the record is still queued for disk
+        self.length = length
+        self.overall_score = record.get("overall_score", 0)
+        self.investor_count = len(record.get("recommended_investors") or [])
+        self.evidence_count = len(record.get("evidence_used") or [])
+        self.created_at = record.get("created_at")
+        self.metadata = record.get("metadata") or {}
 
 
 class Storage:
+
+    # Safe to share between several uvicorn worker processes: writers append or
+    # replace files under an exclusive flock, and every read first checks the
+    # files for changes made by other processes (size / inode / mtime) and
+    # folds them into this process's index and caches.
+
     def __init__(self):
         self.analyses_file = ANALYSES_FILE
         self.chat_history_file = DATA_DIR / "chat_history.json"
+        self._lock = threading.RLock()
+        DATA_DIR.mkdir(exist_ok=True)
+        self._file_lock = FileLock(LOCK_FILE)
         self._ensure_data_dir()
-        self.analyses: List[AnalysisResponse] = self._load_analyses()
+
+        self._index: Dict[str, _AnalysisIndexEntry] = {}
+        self._indexed_bytes = 0
+        self._indexed_inode: Optional[int] = None
+        # Analyses accepted but not yet flushed stay pinned here.
+        self._pending: Dict[str, AnalysisResponse] = {}
+        self._hydrated: "OrderedDict[str, AnalysisResponse]" = OrderedDict()
+        self._hydrated_limit = max(settings.ANALYSIS_CACHE_SIZE, 1)
+        self.evidence_catalog = EvidenceCatalog()
+        self._request_keys: Dict[tuple, str] = {}
+        self._load_index()
+
+        self._chat_lock = threading.RLock()
+        self._chat_signature = None
+        # (user_id, message) pairs accepted but not yet flushed.
+        self._pending_chats: List[tuple] = []
         self.chat_sessions: Dict[str, List[Dict]] = self._load_chat_history()
 
+        # Disk writes happen on the persistence worker thread, never in the request.
+        persistence_worker.register("analyses", self._flush_analyses)
+        persistence_worker.register("chats", self._flush_chats)
+
     def _ensure_data_dir(self):
-        DATA_DIR.mkdir(exist_ok=True)
-        if not self.analyses_file.exists():
-            self.analyses_file.write_text("[]")
-        if not self.chat_history_file.exists():
-            self.chat_history_file.write_text("{}")
+        with self._file_lock.exclusive():
+            if not self.analyses_file.exists():
+                self._migrate_legacy_analyses()
+            if not self.chat_history_file.exists():
+                self.chat_history_file.write_text("{}")
 
-    def _load_chat_history(self) -> Dict[str, List[Dict]]:
+    @staticmethod
+    def _file_signature(path: Path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_chat_file(self) -> Dict[str, List[Dict]]:
         try:
             with self.chat_history_file.open("r") as f:
                 return json.load(f)
@@ -33,53 +122,265 @@ class Storage:
             print("Failed to load chat history:", e)
             return {}
 
+    def _load_chat_history(self) -> Dict[str, List[Dict]]:
+        with self._file_lock.shared():
+            self._chat_signature = self._file_signature(self.chat_history_file)
+            return self._read_chat_file()
+
+    def _refresh_chats(self):
+        # Another worker rewrote the file: reload it and re-apply our unflushed messages.
+        with self._chat_lock:
+            if self._file_signature(self.chat_history_file) == self._chat_signature:
+                return
+            sessions = self._load_chat_history()
+            for user_id, message in self._pending_chats:
+                sessions.setdefault(user_id, []).append(message)
+            self.chat_sessions = sessions
+
     def save_chat_message(self, user_id: str, message: Dict):
-        if user_id not in self.chat_sessions:
-            self.chat_sessions[user_id] = []
-        self.chat_sessions[user_id].append(message)
-        self._persist_chats()
+        with self._chat_lock:
+            if user_id not in self.chat_sessions:
+                self.chat_sessions[user_id] = []
+            self.chat_sessions[user_id].append(message)
+            self._pending_chats.append((user_id, message))
+        persistence_worker.submit("chats", (user_id, message))
 
     def get_chat_history(self, user_id: str) -> List[Dict]:
+        self._refresh_chats()
         return self.chat_sessions.get(user_id, [])
 
-    def _persist_chats(self):
-        with self.chat_history_file.open("w") as f:
-            json.dump(self.chat_sessions, f, indent=2)
+    def _flush_chats(self, mutations: List, fsync: bool):
+        # Read-modify-write under the exclusive lock so messages written by
+        # other workers since our last read are merged instead of clobbered.
+        with self._file_lock.exclusive():
+            sessions = self._read_chat_file()
+            for user_id, message in mutations:
+                sessions.setdefault(user_id, []).append(message)
+            atomic_write_json(self.chat_history_file, sessions, fsync=fsync)
+            signature = self._file_signature(self.chat_history_file)
+
+        with self._chat_lock:
+            flushed = {id(message) for _, message in mutations}
+            self._pending_chats = [
+                (uid, msg) for uid, msg in self._pending_chats if id(msg) not in flushed
+            ]
+            for user_id, message in self._pending_chats:
+                sessions.setdefault(user_id, []).append(message)
+            self.chat_sessions = sessions
+            self._chat_signature = signature
+
+    def _migrate_legacy_analyses(self):
+        # One-time conversion of the old pretty-printed JSON array into the log.
+        records = []
+        if LEGACY_ANALYSES_FILE.exists():
+            try:
+                with LEGACY_ANALYSES_FILE.open("r") as f:
+                    records = json.load(f)
+                print(f"[*] Migrating {len(records)} analyses to {self.analyses_file.name}")
+            except Exception as e:
+                print("Failed to migrate legacy analyses:", e)
+        tmp_path = self.analyses_file.with_name(f".{self.analyses_file.name}.tmp")
+        with tmp_path.open("w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        tmp_path.replace(self.analyses_file)
 
-    def _load_analyses(self) -> List[AnalysisResponse]:
+    def _refresh_index(self):
+        # Cheap stat() on every read; only new bytes appended by any process are parsed.
+        signature = self._file_signature(self.analyses_file)
+        if signature is None:
+            return
+        inode, size, _ = signature
+        if inode == self._indexed_inode and size == self._indexed_bytes:
+            return
+        if inode != self._indexed_inode or size < self._indexed_bytes:
+            self._reset_index()
+        self._load_index()
+
+    def _reset_index(self):
+        # The log was replaced or truncated underneath us: drop everything
+        # derived from it, keeping only analyses not yet flushed.
+        with self._lock:
+            pending = dict(self._pending)
+            self._index = {}
+            self._indexed_bytes = 0
+            self._hydrated.clear()
+            self._request_keys = {}
+            self.evidence_catalog = EvidenceCatalog()
+            for analysis in pending.values():
+                self._index_pending(analysis)
+
+    def _load_index(self):
+        # Scans only the bytes not indexed yet; records are parsed as plain
+        # dicts for their summary and never turned into pydantic models here.
         try:
-            with self.analyses_file.open("r") as f:
-                data = json.load(f)
-                return [AnalysisResponse(**item) for item in data]
+            with self._file_lock.shared(), self._lock, self.analyses_file.open("rb") as f:
+                self._indexed_inode = os.fstat(f.fileno()).st_ino
+                f.seek(self._indexed_bytes)
+                offset = self._indexed_bytes
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partially written tail, picked up on the next scan
+                    length = len(line)
+                    if line.strip():
+                        try:
+                            self._index_record(json.loads(line), offset, length)
+                        except Exception as e:
+                            print(f"Failed to index analysis at byte {offset}:", e)
+                    offset += length
+                self._indexed_bytes = offset
         except Exception as e:
             print("Failed to load analyses:", e)
-            return []
+
+    def _index_record(self, record: Dict, offset: int, length: int):
+        entry = self._index.get(record["analysis_id"])
+        if entry is not None:
+            entry.offset, entry.length = offset, length
+            return
+        self._add_entry(_AnalysisIndexEntry(record, offset, length), record)
+
+    def _add_entry(self, entry: _AnalysisIndexEntry, record: Dict):
+        self._index[entry.analysis_id] = entry
+        self.evidence_catalog.record(entry.user_id, record.get("evidence_used"), entry.created_at)
+        investor_index.record_analysis(record)
+        # Lookup keys for the /analyze response cache (request fingerprint and
+        # client Idempotency-Key), newest analysis wins.
+        for key in (entry.metadata.get("request_fingerprint"), entry.metadata.get("idempotency_key")):
+            if key:
+                self._request_keys[(entry.user_id, key)] = entry.analysis_id
+
+    def _hydrate(self, entry: _AnalysisIndexEntry) -> Optional[AnalysisResponse]:
+        with self._lock:
+            analysis = self._pending.get(entry.analysis_id)
+            if analysis is not None:
+                return analysis
+            analysis = self._hydrated.get(entry.analysis_id)
+            if analysis is not None:
+                self._hydrated.move_to_end(entry.analysis_id)
+                record_cache("analysis_lru", True)
+                return analysis
+        record_cache("analysis_lru", False)
+
+        try:
+            with self.analyses_file.open("rb") as f:
+                f.seek(entry.offset)
+                analysis = AnalysisResponse(**json.loads(f.read(entry.length)))
+        except Exception as e:
+            print(f"Failed to load analysis {entry.analysis_id}:", e)
+            return None
+        self._remember(analysis)
+        return analysis
+
+    def _remember(self, analysis: AnalysisResponse):
+        with self._lock:
+            self._hydrated[analysis.analysis_id] = analysis
+            self._hydrated.move_to_end(analysis.analysis_id)
+            while len(self._hydrated) > self._hydrated_limit:
+                self._hydrated.popitem(last=False)
+
+    def _entries(self, user_id: Optional[str] = None) -> List[_AnalysisIndexEntry]:
+        self._refresh_index()
+        with self._lock:
+            entries = list(self._index.values())
+        if not user_id:
+            return entries
+        return [e for e in entries if e.user_id == user_id]
+
+    def _index_pending(self, analysis: AnalysisResponse):
+        record = analysis.model_dump()
+        with self._lock:
+            self._pending[analysis.analysis_id] = analysis
+            self._add_entry(_AnalysisIndexEntry(record), record)
 
     def save_analysis(self, analysis: AnalysisResponse):
-        self.analyses.append(analysis)
-        self._persist()
+        self._index_pending(analysis)
+        persistence_worker.submit("analyses", analysis.analysis_id)
+
+    def _flush_analyses(self, analysis_ids: List[str], fsync: bool):
+        with self._lock:
+            batch = [self._pending[a_id] for a_id in analysis_ids if a_id in self._pending]
+        if not batch:
+            return
+        # Pydantic v2 uses model_dump. Use dict() for compatibility but model_dump is preferred.
+        lines = [
+            (json.dumps(a.model_dump() if hasattr(a, "model_dump") else a.dict()) + "\n").encode()
+            for a in batch
+        ]
+        # O_APPEND under the exclusive lock: records from different workers
+        # interleave as whole lines and never overwrite each other.
+        with self._file_lock.exclusive(), self.analyses_file.open("ab") as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            positions = []
+            for line in lines:
+                f.write(line)
+                positions.append((offset, len(line)))
+                offset += len(line)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            inode = os.fstat(f.fileno()).st_ino
+
+        with self._lock:
+            # The tail scan will still see these lines; it only fills in offsets
+            # for ids that are already indexed.
+            for analysis, (offset, length) in zip(batch, positions):
+                entry = self._index.get(analysis.analysis_id)
+                if entry is not None and inode == self._indexed_inode:
+                    entry.offset, entry.length = offset, length
+                self._pending.pop(analysis.analysis_id, None)
+        for analysis in batch:
+            self._remember(analysis)
 
-    def _persist(self):
-        with self.analyses_file.open("w") as f:
-            # Pydantic v2 uses model_dump. Use dict() for compatibility but model_dump is preferred.
-            json.dump([a.model_dump() if hasattr(a, "model_dump") else a.dict() for a in self.analyses], f, indent=2)
+    def iter_analyses(self, user_id: Optional[str] = None) -> Iterator[AnalysisResponse]:
+        # Streams analyses without keeping them all resident at once.
+        for entry in self._entries(user_id):
+            analysis = self._hydrate(entry)
+            if analysis is not None:
+                yield analysis
+
+    def analysis_metadata(self) -> List[Tuple[Optional[str], Dict]]:
+        # (created_at, metadata) of every stored analysis, from the index.
+        return [(entry.created_at, entry.metadata) for entry in self._entries()]
 
     def get_all_analyses(self, user_id: Optional[str] = None) -> List[AnalysisResponse]:
-        if not user_id:
-            return self.analyses
-        return [a for a in self.analyses if a.user_id == user_id]
+        return list(self.iter_analyses(user_id))
 
-    def get_analysis_by_id(self, analysis_id: str, user_id: Optional[str] = None) -> Optional[AnalysisResponse]:
-        analysis = next(
-            (a for a in self.analyses if a.analysis_id == analysis_id),
-            None,
-        )
-        if analysis and user_id and analysis.user_id != user_id:
+    def get_analysis_by_id(
+        self, analysis_id: str, user_id: Optional[str] = None, max_age_seconds: Optional[float] = None
+    ) -> Optional[AnalysisResponse]:
+        self._refresh_index()
+        entry = self._index.get(analysis_id)
+        if entry is None:
             return None
-        return analysis
+        if user_id and entry.user_id != user_id:
+            return None
+        if self._expired(entry, max_age_seconds):
+            return None
+        return self._hydrate(entry)
+
+    def find_by_request_key(
+        self, user_id: Optional[str], key: str, max_age_seconds: Optional[float] = None
+    ) -> Optional[AnalysisResponse]:
+        # Most recent analysis this user stored under a request fingerprint or
+        # idempotency key, if it is younger than max_age_seconds.
+        self._refresh_index()
+        analysis_id = self._request_keys.get((user_id, key))
+        entry = self._index.get(analysis_id) if analysis_id else None
+        if entry is None or self._expired(entry, max_age_seconds):
+            return None
+        return self._hydrate(entry)
+
+    @staticmethod
+    def _expired(entry: _AnalysisIndexEntry, max_age_seconds: Optional[float]) -> bool:
+        if max_age_seconds is None:
+            return False
+        created = _parse_timestamp(entry.created_at)
+        return created is None or (datetime.datetime.utcnow() - created).total_seconds() > max_age_seconds
 
     def get_stats(self, user_id: Optional[str] = None) -> Dict:
-        user_analyses = self.get_all_analyses(user_id)
+        # Served entirely from the in-memory index, nothing is hydrated.
+        user_analyses = self._entries(user_id)
         total = len(user_analyses)
 
         if total == 0:
@@ -90,8 +391,8 @@ class Storage:
                 "avg_score": "0%",
             }
 
-        total_investors = sum(len(a.recommended_investors) for a in user_analyses)
-        total_evidence = sum(len(a.evidence_used) for a in user_analyses)
+        total_investors = sum(e.investor_count for e in user_analyses)
+        total_evidence = sum(e.evidence_count for e in user_analyses)
         avg_score = sum(a.overall_score for a in user_analyses) / total
 
         return {
@@ -101,25 +402,26 @@ class Storage:
             "avg_score": f"{int(avg_score)}%",
         }
 
-    def get_all_evidence(self, user_id: Optional[str] = None) -> List[Dict]:
-        seen_titles = set()
-        all_ev = []
-        
-        user_analyses = self.get_all_analyses(user_id)
-
-        for a in user_analyses:
-            for ev in a.evidence_used:
-                if ev.title not in seen_titles:
-                    all_ev.append(ev.model_dump() if hasattr(ev, "model_dump") else ev.dict())
-                    seen_titles.add(ev.title)
-
-        return all_ev
+    def get_all_evidence(
+        self,
+        user_id: Optional[str] = None,
+        sort: str = "first_seen",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        # Unique evidence (by normalized title) with usage counts, served from
+        # the catalog maintained on save_analysis.
+        self._refresh_index()
+        return self.evidence_catalog.query(
+            user_id, sort=sort, descending=descending, offset=offset, limit=limit
+        )
 
     def get_intelligence_library(self) -> List[Dict]:
         from app.data.evidence_store import EvidenceStore
         store = EvidenceStore()
         all_units = store.list_all_evidence(limit=50)
-        return [u.model_dump() for u in all_units]
+        return [u.to_dict() for u in all_units]
 
 
 storage = Storage()
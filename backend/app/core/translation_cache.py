@@ -0,0 +1,52 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.storage import DATA_DIR
+from app.core.log_cache import LogBackedCache
+
+
+# Append-only log of {"lang", "hash", "text"} records; the newest record of a
+# key wins. Compacted to the in-memory LRU contents once it grows too long.
+TRANSLATIONS_FILE = DATA_DIR / "translations.jsonl"
+TRANSLATIONS_LOCK_FILE = DATA_DIR / ".translations.lock"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+class TranslationCache(LogBackedCache):
+
+    # Translations keyed by (target language, sha256 of the source text),
+    # shared by /translate and /translate/batch. Reads are served from an
+    # in-memory LRU; misses first pick up lines other workers appended.
+
+    def __init__(self, capacity: Optional[int] = None):
+        super().__init__(
+            "translations",
+            TRANSLATIONS_FILE,
+            TRANSLATIONS_LOCK_FILE,
+            capacity or settings.TRANSLATION_CACHE_SIZE,
+        )
+
+    def _key_value(self, record: Dict):
+        return (record["lang"], record["hash"]), record["text"]
+
+    def _to_record(self, key: Tuple[str, str], value: str) -> Dict:
+        return {"lang": key[0], "hash": key[1], "text": value}
+
+    def get(self, text: str, language: str) -> Optional[str]:
+        return self.get_many([text], language)[0]
+
+    def get_many(self, texts: Iterable[str], language: str) -> List[Optional[str]]:
+        return super().get_many([(language, text_hash(t)) for t in texts], metric="translation")
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]], language: str):
+        super().put_many(((language, text_hash(text)), translated) for text, translated in pairs)
+
+    def put(self, text: str, translated: str, language: str):
+        self.put_many([(text, translated)], language)
+
+
+translation_cache = TranslationCache()
@@ -2,8 +2,10 @@ import os
 import chromadb
 from chromadb.utils import embedding_functions
 from typing import List, Optional
-from app.schemas.evidence import EvidenceUnit, SourceType
+from app.schemas.evidence import EvidenceUnit, EvidenceRecord, SourceType
 from app.config.settings import settings
+from app.core.metrics import span
+from app.core.evidence_catalog import evidence_id_for
 
 
 class EvidenceStore:
@@ -51,11 +53,12 @@ class EvidenceStore:
             metadatas=[metadata],
         )
 
-    def query_evidence(self, query_text: str, n_results: int = 5) -> List[EvidenceUnit]:
+    def query_evidence(self, query_text: str, n_results: int = 5) -> List[EvidenceRecord]:
         
         #search for evidence using semantic similarity.
 
-        results = self.collection.query(query_texts=[query_text], n_results=n_results)
+        with span("vector_query"):
+            results = self.collection.query(query_texts=[query_text], n_results=n_results)
 
         evidence_units = []
         if not results["ids"] or not results["ids"][0]:
@@ -70,8 +73,13 @@ class EvidenceStore:
                 raw_type = "news"
 
             evidence_units.append(
-                EvidenceUnit(
-                    evidence_id=results["ids"][0][i],
+                EvidenceRecord(
+                    # Derived from the source, not the stored id, so it matches
+                    # the other tiers even for collections ingested before ids
+                    # were content-addressed.
+                    evidence_id=evidence_id_for(
+                        meta.get("title"), meta.get("url"), results["documents"][0][i]
+                    ),
                     source_type=SourceType(raw_type),
                     title=meta.get("title", "Untitled"),
                     source_name=meta.get("source_name", "Unknown"),
@@ -91,7 +99,7 @@ class EvidenceStore:
 
         return evidence_units
 
-    def list_all_evidence(self, limit: int = 100) -> List[EvidenceUnit]:
+    def list_all_evidence(self, limit: int = 100) -> List[EvidenceRecord]:
         """
         Retrieves a broad sample of ingested evidence from the vector store.
         """
@@ -115,8 +123,8 @@ class EvidenceStore:
 
             try:
                 evidence_units.append(
-                    EvidenceUnit(
-                        evidence_id=results["ids"][i],
+                    EvidenceRecord(
+                        evidence_id=evidence_id_for(meta.get("title"), meta.get("url"), results["documents"][i]),
                         source_type=SourceType(raw_type),
                         title=meta.get("title", "Untitled"),
                         source_name=meta.get("source_name", "Ingested Intelligence"),
@@ -0,0 +1,40 @@
+import os
+from typing import Dict, Iterator, List, Tuple
+
+import yaml
+
+
+# Markdown documents with YAML frontmatter under data/raw (see
+# scripts/ingestion/load_data.py for the expected fields).
+
+
+def as_list(value, default: List[str]) -> List[str]:
+    # Frontmatter lists may be YAML lists or comma-separated strings.
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return list(value) if value else list(default)
+
+
+def iter_local_documents(data_root: str) -> Iterator[Tuple[str, Dict, str]]:
+    # (file name, frontmatter, body) of every parseable document.
+    if not os.path.exists(data_root):
+        print(f"[!] Data root {data_root} does not exist.")
+        return
+    for root, _, files in os.walk(data_root):
+        for file in files:
+            if not file.endswith(".md"):
+                continue
+            file_path = os.path.join(root, file)
+            with open(file_path, "r") as f:
+                content = f.read()
+            if not content.startswith("---"):
+                continue
+            parts = content.split("---")
+            if len(parts) < 3:
+                continue
+            try:
+                metadata = yaml.safe_load(parts[1]) or {}
+            except Exception as e:
+                print(f"[!] Error parsing local file {file}: {e}")
+                continue
+            yield file, metadata, parts[2].strip()
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import struct
+import hashlib
+import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.file_lock import FileLock
+from app.data.evidence_store import EvidenceStore
+
+
+# Single-file snapshot of the evidence collection:
+#
+#   MAGIC | u64 manifest length | manifest JSON | padding to 64 bytes
+#   | float32 embedding matrix (count x dim, C order)
+#   | records JSON ([[id, document, metadata], ...])
+#
+# The manifest holds the offsets, the embedding space and a sha256 over the
+# matrix and records bytes. The matrix is memory-mapped on load and handed to
+# Chroma with the records, so importing never calls an embedding model.
+
+SNAPSHOT_MAGIC = b"FSVSNAP1"
+SNAPSHOT_FORMAT = 1
+_ALIGN = 64
+# Collection metadata key recording the snapshot the collection was loaded from.
+_LOADED_KEY = "snapshot_sha256"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def embedding_space(store) -> str:
+    # Embedding function identity; vectors are only valid in the same space.
+    fn = store.emb_fn
+    name = fn.name() if hasattr(fn, "name") else type(fn).__name__
+    model = getattr(fn, "model_name", None) or getattr(fn, "_model_name", None)
+    return f"{name}:{model}" if model else str(name)
+
+
+def _batch_size(store) -> int:
+    try:
+        return int(store.client.get_max_batch_size())
+    except Exception:
+        return 5000
+
+
+def export_snapshot(store, path: str) -> Dict:
+    collection = store.collection
+    total = collection.count()
+    batch = _batch_size(store)
+    records: List[list] = []
+    rows: List[np.ndarray] = []
+    for offset in range(0, total, batch):
+        page = collection.get(
+            limit=batch, offset=offset, include=["embeddings", "documents", "metadatas"]
+        )
+        records.extend(
+            [id_, doc, meta or {}] for id_, doc, meta in zip(page["ids"], page["documents"], page["metadatas"])
+        )
+        if len(page["ids"]):
+            rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+    matrix = np.ascontiguousarray(np.vstack(rows)) if rows else np.zeros((0, 0), dtype=np.float32)
+    if matrix.shape[0] != len(records):
+        raise SnapshotError(f"{len(records)} records but {matrix.shape[0]} embeddings")
+
+    records_bytes = json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    matrix_bytes = matrix.tobytes()
+    digest = hashlib.sha256(matrix_bytes)
+    digest.update(records_bytes)
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection.name,
+        "embedding_space": embedding_space(store),
+        "count": len(records),
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "sha256": digest.hexdigest(),
+    }
+    # The matrix starts at the first aligned offset after the manifest; sizing
+    # it with placeholder offsets wider than any real one leaves room for it.
+    manifest.update(embeddings_offset=0, records_offset=0, records_length=len(records_bytes))
+    header_len = len(SNAPSHOT_MAGIC) + 8 + len(json.dumps({**manifest, "embeddings_offset": 10 ** 15, "records_offset": 10 ** 15}))
+    embeddings_offset = -(-header_len // _ALIGN) * _ALIGN
+    manifest["embeddings_offset"] = embeddings_offset
+    manifest["records_offset"] = embeddings_offset + len(matrix_bytes)
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+
+    tmp_path = Path(path).with_name(f".{Path(path).name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(manifest_bytes)))
+        f.write(manifest_bytes)
+        f.write(b"\0" * (embeddings_offset - f.tell()))
+        f.write(matrix_bytes)
+        f.write(records_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{path} is not an evidence snapshot")
+        (length,) = struct.unpack("<Q", f.read(8))
+        manifest = json.loads(f.read(length))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format')}")
+    return manifest
+
+
+def load_snapshot(path: str, verify: bool = True) -> Tuple[Dict, List[list], np.ndarray]:
+    # (manifest, records, memory-mapped embedding matrix)
+    manifest = read_manifest(path)
+    count, dim = manifest["count"], manifest["dim"]
+    if count and dim:
+        matrix = np.memmap(path, dtype=np.float32, mode="r", offset=manifest["embeddings_offset"], shape=(count, dim))
+    else:
+        matrix = np.zeros((count, dim), dtype=np.float32)
+    with open(path, "rb") as f:
+        f.seek(manifest["records_offset"])
+        records_bytes = f.read(manifest["records_length"])
+    if verify:
+        digest = hashlib.sha256(memoryview(np.ascontiguousarray(matrix)).cast("B"))
+        digest.update(records_bytes)
+        if digest.hexdigest() != manifest["sha256"]:
+            raise SnapshotError(f"{path} does not match its manifest hash")
+    records = json.loads(records_bytes)
+    if len(records) != count:
+        raise SnapshotError(f"{path} has {len(records)} records, manifest says {count}")
+    return manifest, records, matrix
+
+
+def loaded_snapshot_hash(store):
+    # Re-read, another worker may have loaded a snapshot since the store opened.
+    collection = store.client.get_collection(store.collection.name)
+    return (collection.metadata or {}).get(_LOADED_KEY)
+
+
+def import_snapshot(store, path: str, verify: bool = True) -> Dict:
+    # Bulk upsert into the store's collection; existing ids are overwritten.
+    manifest, records, matrix = load_snapshot(path, verify=verify)
+    space = embedding_space(store)
+    if manifest["count"] and manifest["embedding_space"] != space:
+        raise SnapshotError(
+            f"Snapshot embeddings are in '{manifest['embedding_space']}', the store uses '{space}'"
+        )
+    batch = _batch_size(store)
+    for start in range(0, len(records), batch):
+        chunk = records[start:start + batch]
+        store.collection.upsert(
+            ids=[r[0] for r in chunk],
+            documents=[r[1] for r in chunk],
+            # Chroma rejects empty metadata dicts.
+            metadatas=[r[2] or None for r in chunk],
+            embeddings=np.asarray(matrix[start:start + batch]),
+        )
+    metadata = dict(store.collection.metadata or {})
+    metadata[_LOADED_KEY] = manifest["sha256"]
+    store.collection.modify(metadata=metadata)
+    return manifest
+
+
+def load_boot_snapshot(store=None):
+    # Imports VECTOR_SNAPSHOT_PATH unless the collection already holds it.
+    # Workers booting together serialize on a lock next to the snapshot.
+    path = settings.VECTOR_SNAPSHOT_PATH
+    if not path or not os.path.exists(path):
+        if path:
+            print(f"[!] Vector snapshot {path} not found; starting with the existing index.")
+        return None
+    try:
+        manifest = read_manifest(path)
+        if store is None:
+            store = EvidenceStore()
+        if loaded_snapshot_hash(store) == manifest["sha256"]:
+            return manifest
+        with FileLock(Path(path).with_name(f".{Path(path).name}.lock")).exclusive():
+            if loaded_snapshot_hash(store) == manifest["sha256"]:
+                return manifest
+            start = time.perf_counter()
+            import_snapshot(store, path)
+            elapsed = time.perf_counter() - start
+            print(f"[*] Loaded vector snapshot {path}: {manifest['count']} units in {elapsed:.2f}s.")
+        return manifest
+    except Exception as e:
+        print(f"[!] Vector snapshot load failed: {e}")
+        return None
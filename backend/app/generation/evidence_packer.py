@@ -0,0 +1,129 @@
+import re
+import json
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.schemas.reasoning import ReasoningResult
+
+
+# Ids only matter to the validator; the model never cites them.
+_DROPPED_FIELDS = {"evidence_id"}
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_DIGIT_RE = re.compile(r"\d")
+_STOPWORDS = {
+    "the", "and", "for", "in", "of", "to", "a", "an", "on", "with", "by", "is",
+    "are", "startups", "startup", "availability", "support",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is the usual rule of thumb for Gemini/English
+    # prose; good enough for budgeting without a tokenizer round trip.
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _terms(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+class EvidencePacker:
+
+    # Fits evidence into the report prompt under a token budget:
+    # 1. Ranks units by how many validated claims cite them (evidence_map),
+    #    then by term overlap with the claims.
+    # 2. Trims long content extractively, keeping the highest-signal sentences
+    #    (claim terms, figures) in their original order.
+    # 3. Drops fields the model does not need (ids, empty values).
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        unit_token_cap: Optional[int] = None,
+    ):
+        self.token_budget = token_budget or settings.REPORT_EVIDENCE_TOKEN_BUDGET
+        self.unit_token_cap = unit_token_cap or settings.REPORT_EVIDENCE_UNIT_TOKENS
+
+    def pack(
+        self, evidence_units: List[Any], reasoning_result: ReasoningResult
+    ) -> Tuple[List[Dict], int]:
+        # Returns the packed evidence and the estimated token count it occupies.
+        claim_terms = _terms(" ".join(reasoning_result.supported_claims + reasoning_result.rejected_claims))
+        citations: Dict[str, int] = {}
+        for ev_ids in reasoning_result.evidence_map.values():
+            for ev_id in ev_ids:
+                citations[ev_id] = citations.get(ev_id, 0) + 1
+
+        ranked = sorted(
+            enumerate(evidence_units),
+            key=lambda item: (
+                -citations.get(getattr(item[1], "evidence_id", None), 0),
+                -len(claim_terms & _terms(f"{getattr(item[1], 'title', '')} {getattr(item[1], 'content', '')}")),
+                item[0],
+            ),
+        )
+
+        packed: List[Dict] = []
+        used = estimate_tokens("[]")
+        for _, ev in ranked:
+            remaining = self.token_budget - used
+            if remaining <= 0:
+                break
+            unit = self._compact(ev)
+            content = unit.pop("content", "")
+            overhead = estimate_tokens(json.dumps(unit)) + 4
+            if overhead >= remaining:
+                continue
+            cap = min(self.unit_token_cap, remaining - overhead)
+            if content:
+                unit["content"] = self._extract(content, cap, claim_terms)
+            cost = estimate_tokens(json.dumps(unit)) + 1
+            packed.append(unit)
+            used += cost
+
+        return packed, used
+
+    def _compact(self, ev: Any) -> Dict:
+        if hasattr(ev, "to_dict"):
+            data = ev.to_dict(json_mode=True)
+        elif hasattr(ev, "model_dump"):
+            data = ev.model_dump(mode="json")
+        elif hasattr(ev, "dict"):
+            data = ev.dict()
+        else:
+            return {"content": str(ev)}
+        return {
+            key: value
+            for key, value in data.items()
+            if key not in _DROPPED_FIELDS and value not in (None, "", [], {})
+        }
+
+    def _extract(self, content: str, cap: int, claim_terms: Set[str]) -> str:
+        content = content.strip()
+        if estimate_tokens(content) <= cap:
+            return content
+
+        sentences = [s.strip() for s in _SENTENCE_RE.split(content) if s.strip()]
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda i: (
+                -(len(claim_terms & _terms(sentences[i])) + (2 if _DIGIT_RE.search(sentences[i]) else 0)),
+                i,
+            ),
+        )
+        keep: List[int] = []
+        spent = 0
+        for i in scored:
+            cost = estimate_tokens(sentences[i]) + 1
+            if spent + cost > cap:
+                continue
+            keep.append(i)
+            spent += cost
+        if keep:
+            return " ".join(sentences[i] for i in sorted(keep))
+
+        # A single run-on sentence: cut at a word boundary.
+        clipped = content[: cap * 4].rsplit(" ", 1)[0]
+        return clipped + "..."
@@ -1,9 +1,20 @@
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from google import genai
 from google.genai import types
 from app.config.settings import settings
 from app.schemas.reasoning import ReasoningResult
+from app.generation.evidence_packer import EvidencePacker
+from app.core.metrics import span, record_fallback
+from app.core.llm_gateway import llm_gateway, fallback_reason
+from app.core.translation_cache import translation_cache
+
+
+# Mapping language codes to full names for better AI context
+LANGUAGE_NAMES = {
+    "hi": "Hindi", "bn": "Bengali", "ta": "Tamil", "te": "Telugu",
+    "mr": "Marathi", "gu": "Gujarati", "kn": "Kannada", "en": "English"
+}
 
 
 class Generator:
@@ -18,6 +29,7 @@ class Generator:
             self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
         else:
             self.client = None
+        self.evidence_packer = EvidencePacker()
 
     # reasoning_result: The output from the Validator layer.
     #   language: Target language for the report
@@ -26,9 +38,13 @@ class Generator:
         reasoning_result: ReasoningResult,
         evidence_units: List[Any],
         language: str = "en",
+        investor_shortlist: Optional[List[Dict]] = None,
     ) -> Dict:
+        # investor_shortlist: investors ranked from evidence deal history
+        #   (app/core/investor_index.py); refined by the model, used as is by the fallback.
         if not settings.GOOGLE_API_KEY:
-            return self._generate_mock_fallback(reasoning_result, language)
+            record_fallback("report_mock", "no_api_key")
+            return self._generate_mock_fallback(reasoning_result, language, investor_shortlist)
 
         system_prompt = (
             "You are a Senior Venture Capital Analyst. Your task is to explain a provided "
@@ -39,7 +55,8 @@ class Generator:
             "but your 'why_this_fits' and 'why_this_does_not_fit' bullet points MUST contain "
             "SPECIFIC DATA found in the 'Evidence' (e.g., mention names of investors, specific policy names, "
             "funding amounts, or dates).\n"
-            "2. Recommend the BEST 3-5 investors from the evidence or known real-world VCs that fit this SPECIFIC startup description.\n"
+            "2. Recommend the BEST 3-5 investors from the evidence or known real-world VCs that fit this SPECIFIC startup description. "
+            "'investor_shortlist' ranks investors by their deal history in our evidence: start from it, re-rank it, and drop or replace investors that do not fit.\n"
             "3. For each investor, provide:\n"
             "   - name (string)\n"
             "   - fit_score (int 0-100)\n"
@@ -54,30 +71,47 @@ class Generator:
             "   - confidence_explanation (string: Explain why you chose this confidence level based on the richness of provided evidence)"
         )
 
+        # Evidence is packed to a fixed token budget so prompt size stays predictable.
+        packed_evidence, evidence_tokens = self.evidence_packer.pack(
+            evidence_units, reasoning_result
+        )
+        print(
+            f"[*] [LOG] Packed {len(packed_evidence)}/{len(evidence_units)} evidence units "
+            f"into ~{evidence_tokens} tokens (budget {self.evidence_packer.token_budget})."
+        )
+
         input_data = {
             "supported_claims": reasoning_result.supported_claims,
             "rejected_claims": reasoning_result.rejected_claims,
             "confidence_level": reasoning_result.confidence_level,
-            "evidence": [
-                ev.dict() if hasattr(ev, "dict") else str(ev) for ev in evidence_units
+            "evidence": packed_evidence,
+            "investor_shortlist": [
+                {k: inv[k] for k in ("name", "deal_count", "focus_areas", "fit_score")}
+                for inv in investor_shortlist or []
             ],
         }
 
         try:
-            response = await self.client.aio.models.generate_content(
+            response = await llm_gateway.generate(
+                "report",
+                self.client,
                 model="gemini-2.0-flash-exp",
                 contents=f"{system_prompt}\n\nData to analyze: {json.dumps(input_data)}",
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json"
                 )
             )
-            return json.loads(response.text)
+            report = json.loads(response.text)
+            report["evidence_tokens"] = evidence_tokens
+            return report
         except Exception as e:
-            # Fallback in case of API failure or parsing error
-            return self._generate_mock_fallback(reasoning_result, language)
+            # Fallback in case of API failure, open breaker, deadline or parsing error
+            print(f"[!] Report generation failed, using fallback: {e}")
+            record_fallback("report_mock", fallback_reason(e))
+            return self._generate_mock_fallback(reasoning_result, language, investor_shortlist)
 
     def _generate_mock_fallback(
-        self, reasoning_result: ReasoningResult, language: str
+        self, reasoning_result: ReasoningResult, language: str, investor_shortlist: Optional[List[Dict]] = None
     ) -> Dict:
         # Basic translations for demonstration if API fails
         summaries = {
@@ -98,6 +132,9 @@ class Generator:
                 for c in reasoning_result.rejected_claims
             ],
             "recommended_investors": [
+                {k: inv[k] for k in ("name", "fit_score", "reasons", "focus_areas")}
+                for inv in investor_shortlist or []
+            ] or [
                 {
                     "name": "General VC Fund",
                     "fit_score": 70,
@@ -109,26 +146,86 @@ class Generator:
         }
 
     async def translate(self, text: str, target_language: str) -> str:
+        if not text.strip():
+            return text
+        cached = translation_cache.get(text, target_language)
+        if cached is not None:
+            return cached
         if not self.client:
             return text
-        
-        # Mapping language codes to full names for better AI context
-        lang_map = {
-            "hi": "Hindi", "bn": "Bengali", "ta": "Tamil", "te": "Telugu", 
-            "mr": "Marathi", "gu": "Gujarati", "kn": "Kannada", "en": "English"
-        }
-        target_lang_name = lang_map.get(target_language, target_language)
+
+        target_lang_name = LANGUAGE_NAMES.get(target_language, target_language)
 
         prompt = f"Translate the following text to {target_lang_name}. Return ONLY the translated text, no quotes or meta-talk.\n\nTEXT: {text}"
         try:
-            response = await self.client.aio.models.generate_content(
-                model="gemini-2.0-flash-exp",
-                contents=prompt
-            )
-            return response.text.strip()
+            with span("translation"):
+                response = await llm_gateway.generate(
+                    "translate",
+                    self.client,
+                    model="gemini-2.0-flash-exp",
+                    contents=prompt
+                )
+            translated = response.text.strip()
+            translation_cache.put(text, translated, target_language)
+            return translated
         except Exception as e:
             print(f"[!] Dynamic translation failed: {e}")
+            record_fallback("translation", fallback_reason(e))
             return text
 
+    async def translate_batch(self, texts: List[str], target_language: str) -> List[str]:
+        # Cached strings are answered locally; the rest (deduplicated) go to
+        # Gemini in a single call as an index -> text JSON object. Anything
+        # missing from the reply falls back to the source text, uncached.
+        results: List[Optional[str]] = list(translation_cache.get_many(texts, target_language))
+        misses: Dict[str, List[int]] = {}
+        for i, (text, cached) in enumerate(zip(texts, results)):
+            if cached is not None:
+                continue
+            if not text.strip():
+                results[i] = text
+                continue
+            misses.setdefault(text, []).append(i)
+
+        if misses and self.client:
+            unique = list(misses)
+            target_lang_name = LANGUAGE_NAMES.get(target_language, target_language)
+            prompt = (
+                f"Translate every value of the following JSON object to {target_lang_name}. "
+                "Return a JSON object with exactly the same keys, each mapped to its translated text. "
+                "No extra keys, no commentary.\n\n"
+                f"{json.dumps({str(i): t for i, t in enumerate(unique)}, ensure_ascii=False)}"
+            )
+            try:
+                with span("translation"):
+                    response = await llm_gateway.generate(
+                        "translate",
+                        self.client,
+                        model="gemini-2.0-flash-exp",
+                        contents=prompt,
+                        config=types.GenerateContentConfig(
+                            response_mime_type="application/json"
+                        )
+                    )
+                translated = json.loads(response.text)
+                if not isinstance(translated, dict):
+                    raise ValueError(f"expected a JSON object, got {type(translated).__name__}")
+                fresh = []
+                for i, text in enumerate(unique):
+                    value = translated.get(str(i))
+                    if not isinstance(value, str) or not value.strip():
+                        continue
+                    fresh.append((text, value.strip()))
+                    for index in misses[text]:
+                        results[index] = value.strip()
+                translation_cache.put_many(fresh, target_language)
+                if len(fresh) < len(unique):
+                    record_fallback("translation", "incomplete_batch")
+            except Exception as e:
+                print(f"[!] Batch translation failed: {e}")
+                record_fallback("translation", fallback_reason(e))
+
+        return [text if result is None else result for text, result in zip(texts, results)]
+
     async def generate_explanation(self, validated_data: dict, language: str) -> str:
         return f"Validated report generated in {language}"
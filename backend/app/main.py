@@ -1,13 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import analysis
 from app.config.settings import settings
+from app.core.persistence import persistence_worker
+from app.core.jobs import job_manager
+from app.core.prewarm import prewarm_scheduler
+from app.data.vector_snapshot import load_boot_snapshot
+from app.core.metrics import registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    persistence_worker.start()
+    if settings.ENABLE_VECTOR_DB and settings.VECTOR_SNAPSHOT_PATH:
+        await asyncio.to_thread(load_boot_snapshot)
+    await job_manager.start()
+    await prewarm_scheduler.start()
+    yield
+    await prewarm_scheduler.stop()
+    await job_manager.stop()
+    # Drain queued writes so nothing accepted by an endpoint is lost on shutdown.
+    persistence_worker.stop()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,3 +50,9 @@ async def root():
         "version": "1.0.0",
         "status": "healthy",
     }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus scrape endpoint (text exposition format 0.0.4).
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
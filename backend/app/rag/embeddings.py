@@ -0,0 +1,106 @@
+import re
+import hashlib
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+from google import genai
+
+from app.config.settings import settings
+from app.core.llm_gateway import llm_gateway, fallback_reason
+from app.core.metrics import record_fallback
+
+
+# Embedding spaces are not comparable with each other; every vector is
+# returned together with the name of the space it lives in.
+LOCAL_SPACE = "hashed-bow"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_LOCAL_DIM = 512
+_STOPWORDS = {
+    "the", "and", "for", "what", "which", "how", "about", "with", "this", "that",
+    "are", "does", "can", "who", "why", "when", "where", "you", "your", "our",
+    "they", "their", "there", "from", "into", "more", "tell", "should", "would",
+}
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_local(texts: List[str]) -> np.ndarray:
+    # Hashed binary bag of words: no model, no network, deterministic. Only
+    # captures lexical overlap, which is enough to tell a follow-up question
+    # from a change of topic. Rows are term-presence vectors, not unit length.
+    matrix = np.zeros((len(texts), _LOCAL_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in _TOKEN_RE.findall(text.lower()):
+            if len(token) > 2 and token not in _STOPWORDS:
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest()
+                matrix[row, int.from_bytes(digest, "little") % _LOCAL_DIM] = 1.0
+    return matrix
+
+
+def similarity(query: np.ndarray, docs: np.ndarray, space: str, symmetric: bool = False) -> np.ndarray:
+    # Score of one query row against each document row, in [0, 1].
+    # Model space: cosine. Local space: share of the query's terms found in
+    # the document (cosine is swamped by document length there), or with
+    # `symmetric` the overlap relative to the larger of the two term sets,
+    # for comparing texts of the same kind (question vs question).
+    if space == LOCAL_SPACE:
+        overlap = docs @ query
+        if symmetric:
+            sizes = np.maximum(docs.sum(axis=1), query.sum())
+            return np.divide(overlap, sizes, out=np.zeros_like(overlap), where=sizes > 0)
+        terms = float(query.sum())
+        return overlap / terms if terms else np.zeros(len(docs), dtype=np.float32)
+    return docs @ query
+
+
+class Embedder:
+
+    # Gemini text embeddings (through the LLM gateway) with the local hashed
+    # embedding as fallback when there is no API key or the call fails.
+
+    def __init__(self, query_cache_size: int = 1024):
+        self.client = genai.Client(api_key=settings.GOOGLE_API_KEY) if settings.GOOGLE_API_KEY else None
+        # Single-text embeddings are memoized: the chat answer and evidence
+        # caches embed the same question within one turn.
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_size = query_cache_size
+
+    async def embed(self, texts: List[str], space: str = None) -> Tuple[np.ndarray, str]:
+        # Returns one row per text and its space (compare rows with
+        # similarity()). Pass `space` to force vectors comparable with ones
+        # computed earlier.
+        if not texts:
+            return np.zeros((0, _LOCAL_DIM), dtype=np.float32), space or LOCAL_SPACE
+        if space == LOCAL_SPACE or self.client is None:
+            return embed_local(texts), LOCAL_SPACE
+        if len(texts) == 1 and texts[0] in self._query_cache:
+            self._query_cache.move_to_end(texts[0])
+            return self._query_cache[texts[0]], settings.EMBEDDING_MODEL
+        try:
+            response = await llm_gateway.embed(
+                "embedding",
+                self.client,
+                model=settings.EMBEDDING_MODEL,
+                contents=texts,
+            )
+            matrix = _unit_rows(np.array([e.values for e in response.embeddings], dtype=np.float32))
+            if len(texts) == 1:
+                self._query_cache[texts[0]] = matrix
+                while len(self._query_cache) > self._query_cache_size:
+                    self._query_cache.popitem(last=False)
+            return matrix, settings.EMBEDDING_MODEL
+        except Exception as e:
+            print(f"[!] Embedding failed, using local embeddings: {e}")
+            record_fallback("embedding", fallback_reason(e))
+            if space is not None:
+                raise
+            return embed_local(texts), LOCAL_SPACE
+
+
+embedder = Embedder()
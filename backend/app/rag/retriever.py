@@ -1,13 +1,17 @@
-import os
-import yaml
 import json
-from typing import List, Optional
+from typing import Awaitable, List, Optional
 import asyncio
 from google import genai
 from google.genai import types
-from app.schemas.evidence import EvidenceUnit, SourceType
+from app.schemas.evidence import EvidenceRecord, SourceType
 from app.config.settings import settings
 from app.data.evidence_store import EvidenceStore
+from app.data.knowledge_base import iter_local_documents, as_list
+from app.core.metrics import span, record_fallback
+from app.core.evidence_catalog import evidence_id_for
+from app.core.evidence_cache import evidence_cache
+from app.core.retrieval_cache import retrieval_cache, combo_key
+from app.core.llm_gateway import llm_gateway, fallback_reason, LLMUnavailableError
 
 
 class Retriever:
@@ -47,17 +51,63 @@ class Retriever:
         geography: str,
         funding_stage: str,
         startup_description: str = "",
-    ) -> List[EvidenceUnit]:
+        generative: Optional[Awaitable[List[EvidenceRecord]]] = None,
+        combo_cache: bool = True,
+    ) -> List[EvidenceRecord]:
+        # `generative` is a web tier already started by the caller (see
+        # start_generative); otherwise it is run here with startup_description.
+        # With combo_cache and no startup_description (batch cohorts), the web
+        # tier is served from (and refreshes) the per (sector, geography,
+        # stage) retrieval cache. A description shapes the search prompt, so
+        # its results are never cached or served from the combo entry.
+        with span("retrieval"):
+            return await self._retrieve_tiers(
+                sector, geography, funding_stage, startup_description, generative, combo_cache
+            )
+
+    def start_generative(
+        self, sector: str, geography: str, funding_stage: str, startup_description: str = ""
+    ) -> "asyncio.Task[List[EvidenceRecord]]":
+        # Starts the web tier ahead of the rest of retrieval, e.g. on the raw
+        # chat message while its expansion is still being computed.
+        return asyncio.ensure_future(
+            self._generative_retrieval(sector, geography, funding_stage, startup_description)
+        )
+
+    async def _retrieve_tiers(
+        self,
+        sector: str,
+        geography: str,
+        funding_stage: str,
+        startup_description: str = "",
+        generative: Optional[Awaitable[List[EvidenceRecord]]] = None,
+        combo_cache: bool = True,
+    ) -> List[EvidenceRecord]:
         print(f"[*] Starting high-fidelity retrieval for {sector} in {geography}..")
-        evidence_results: List[EvidenceUnit] = []
+        evidence_results: List[EvidenceRecord] = []
 
         # 1. Real-Time Deep Scrape
-        print(
-            f"[*] [LOG] Initializing real-time generative crawl (Google Search grounded)..."
-        )
-        generative_evidence = await self._generative_retrieval(
-            sector, geography, funding_stage, startup_description
+        combo = combo_key(sector, geography, funding_stage)
+        use_cache = (
+            combo_cache and generative is None and not startup_description.strip() and retrieval_cache.enabled
         )
+        generative_evidence = retrieval_cache.lookup(combo) if use_cache else None
+        if generative_evidence is not None:
+            # Shared copies; stamp this request's context like the web tier does.
+            generative_evidence = [ev.with_context(sector, geography) for ev in generative_evidence]
+            print(f"[*] [LOG] Reusing cached web retrieval for {sector} / {geography} / {funding_stage}.")
+        else:
+            print(
+                f"[*] [LOG] Initializing real-time generative crawl (Google Search grounded)..."
+            )
+            with span("retrieval_generative"):
+                if generative is None:
+                    generative = self._generative_retrieval(
+                        sector, geography, funding_stage, startup_description
+                    )
+                generative_evidence = await generative
+            if generative_evidence and use_cache:
+                retrieval_cache.store(combo, evidence_cache.put_units(generative_evidence))
         if generative_evidence:
             print(f"[*] [LOG] Generative retrieval successful: {len(generative_evidence)} units.")
             evidence_results.extend(generative_evidence)
@@ -70,8 +120,10 @@ class Retriever:
                 print(
                     f"[*] [LOG] Supplementing with cached proprietary intelligence..."
                 )
-                vector_data = self.vector_store.query_evidence(
-                    f"{sector} {funding_stage} in {geography} {startup_description}"
+                # Local tiers run off the event loop so concurrent LLM calls keep moving.
+                vector_data = await asyncio.to_thread(
+                    self.vector_store.query_evidence,
+                    f"{sector} {funding_stage} in {geography} {startup_description}",
                 )
                 if vector_data:
                     print(f"[*] [LOG] Vector store returned {len(vector_data)} units.")
@@ -82,98 +134,87 @@ class Retriever:
         # 3. File Scan Fallback
         if len(evidence_results) < 3:
             print(f"[*] [LOG] Still low on evidence. Scanning local files for {sector}...")
-            local_data = self._scan_local_files(sector, geography)
+            with span("retrieval_file_scan"):
+                local_data = await asyncio.to_thread(self._scan_local_files, sector, geography)
             if local_data:
                 print(f"[*] [LOG] File scan returned {len(local_data)} units.")
                 evidence_results.extend(local_data)
 
+        # Tiers can return the same source; ids are content-addressed, so
+        # keep its first occurrence, and share it through the evidence cache.
+        seen = set()
+        unique = []
+        for ev in evidence_results:
+            if ev.evidence_id not in seen:
+                seen.add(ev.evidence_id)
+                unique.append(ev)
+        evidence_results = evidence_cache.put_units(unique)
+
         print(
             f"[*] [LOG] Retrieval complete. Fetched {len(evidence_results)} real-world evidence units."
         )
         return evidence_results[:10]
 
-    def _scan_local_files(self, sector: str, geography: str) -> List[EvidenceUnit]:
+    def _scan_local_files(self, sector: str, geography: str) -> List[EvidenceRecord]:
         local_results = []
         try:
-            if not os.path.exists(self.data_root):
-                print(f"[!] Data root {self.data_root} does not exist.")
-                return []
-
             sector_words = set(sector.lower().replace("&", " ").split())
             geo_words = set(geography.lower().replace("-", " ").split())
 
-            for root, _, files in os.walk(self.data_root):
-                for file in files:
-                    if file.endswith(".md"):
-                        file_path = os.path.join(root, file)
-                        with open(file_path, "r") as f:
-                            content = f.read()
-                            if content.startswith("---"):
-                                parts = content.split("---")
-                                if len(parts) >= 3:
-                                    try:
-                                        metadata = yaml.safe_load(parts[1])
-                                        body = parts[2].strip()
-
-                                        file_sector = metadata.get("sector", "").lower()
-                                        file_geo = metadata.get("geography", "").lower()
-                                        
-                                        # Word-based overlap matching for more robustness
-                                        sector_match = any(word in file_sector for word in sector_words)
-                                        geo_match = any(word in file_geo for word in geo_words)
+            for file, metadata, body in iter_local_documents(self.data_root):
+                try:
+                    file_sector = metadata.get("sector", "").lower()
+                    file_geo = metadata.get("geography", "").lower()
 
-                                        # Handle usage_tags being either a list or a comma-separated string
-                                        raw_tags = metadata.get("usage_tags", ["proprietary-analysis"])
-                                        if isinstance(raw_tags, str):
-                                            tags = [t.strip() for t in raw_tags.split(",")]
-                                        else:
-                                            tags = list(raw_tags) if raw_tags else ["proprietary-analysis"]
+                    # Word-based overlap matching for more robustness
+                    sector_match = any(word in file_sector for word in sector_words)
+                    geo_match = any(word in file_geo for word in geo_words)
 
-                                        # Handle investors being either a list or a comma-separated string
-                                        raw_investors = metadata.get("investors", [])
-                                        if isinstance(raw_investors, str):
-                                            investors = [inv.strip() for inv in raw_investors.split(",")]
-                                        else:
-                                            investors = list(raw_investors) if raw_investors else []
+                    # usage_tags and investors may be lists or comma-separated strings
+                    tags = as_list(metadata.get("usage_tags"), ["proprietary-analysis"])
+                    investors = as_list(metadata.get("investors"), [])
 
-                                        if sector_match or geo_match:
-                                            local_results.append(
-                                                EvidenceUnit(
-                                                    evidence_id=f"ev_repo_{file.replace('.md', '')}_{len(local_results)}",
-                                                    source_type=SourceType(
-                                                        metadata.get("source_type", "news")
-                                                    ),
-                                                    title=metadata.get(
-                                                        "title",
-                                                        "Market Intelligence Report",
-                                                    ),
-                                                    source_name=metadata.get(
-                                                        "source_name",
-                                                        "Proprietary Funding Dataset",
-                                                    ),
-                                                    published_year=metadata.get(
-                                                        "published_year", 2024
-                                                    ),
-                                                    url=metadata.get("source_url"),
-                                                    sector=metadata.get("sector", sector),
-                                                    geography=metadata.get(
-                                                        "geography", geography
-                                                    ),
-                                                    investors=investors,
-                                                    content=body[:2000], # Cap content size
-                                                    usage_tags=tags,
-                                                )
-                                            )
-                                    except Exception as e:
-                                        print(f"[!] Error parsing local file {file}: {e}")
+                    if sector_match or geo_match:
+                        local_results.append(
+                            EvidenceRecord(
+                                evidence_id=evidence_id_for(
+                                    metadata.get("title"), metadata.get("source_url"), body
+                                ),
+                                source_type=SourceType(
+                                    metadata.get("source_type", "news")
+                                ),
+                                title=str(metadata.get(
+                                    "title",
+                                    "Market Intelligence Report",
+                                )),
+                                source_name=str(metadata.get(
+                                    "source_name",
+                                    "Proprietary Funding Dataset",
+                                )),
+                                published_year=int(metadata.get(
+                                    "published_year", 2024
+                                )),
+                                url=metadata.get("source_url"),
+                                sector=str(metadata.get("sector", sector)),
+                                geography=str(metadata.get(
+                                    "geography", geography
+                                )),
+                                investors=investors,
+                                content=body[:2000], # Cap content size
+                                usage_tags=tags,
+                            )
+                        )
+                except Exception as e:
+                    print(f"[!] Error parsing local file {file}: {e}")
         except Exception as e:
             print(f"[!] Error reading repository: {e}")
         return local_results
 
     async def _generative_retrieval(
         self, sector: str, geography: str, stage: str, description: str = ""
-    ) -> List[EvidenceUnit]:
+    ) -> List[EvidenceRecord]:
         if not settings.GOOGLE_API_KEY:
+            record_fallback("retrieval_generative", "no_api_key")
             return []
 
         # We tell the model to EXPLICITLY search the web first.
@@ -195,7 +236,9 @@ class Retriever:
 
         try:
             print(f"[*] [LOG] Sending live search request to Gemini for {sector}...")
-            response = await self.client.aio.models.generate_content(
+            response = await llm_gateway.generate(
+                "search",
+                self.client,
                 model="gemini-2.0-flash-exp",
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -246,30 +289,43 @@ class Retriever:
                     pub_year = 2024
 
                 units.append(
-                    EvidenceUnit(
-                        evidence_id=f"ev_gen_{i}_{abs(hash(item.get('title', str(i))))}",
+                    EvidenceRecord(
+                        evidence_id=evidence_id_for(item.get("title"), item.get("url"), item.get("content")),
                         source_type=SourceType(item.get("source_type", "news")),
-                        title=item.get("title", "Untitled Source"),
-                        source_name=item.get("source_name", "Unknown Source"),
+                        title=str(item.get("title") or "Untitled Source"),
+                        source_name=str(item.get("source_name") or "Unknown Source"),
                         published_year=pub_year,
                         url=item.get("url"),
                         sector=sector,
                         geography=geography,
-                        investors=item.get("investors", []),
-                        content=item.get("content", ""),
-                        usage_tags=item.get("usage_tags", ["generative-retrieval"]),
+                        investors=as_list(item.get("investors"), []),
+                        content=str(item.get("content") or ""),
+                        usage_tags=as_list(item.get("usage_tags"), ["generative-retrieval"]),
                     )
                 )
             return units
         except Exception as e:
+            # Local tiers (vector DB, file scan) fill in below.
+            record_fallback("retrieval_generative", fallback_reason(e))
             print(f"[!] Generative retrieval failed with error: {e}")
-            import traceback
-            traceback.print_exc()
+            if not isinstance(e, LLMUnavailableError):
+                import traceback
+                traceback.print_exc()
             return []
 
+    async def refresh_web_tier(self, sector: str, geography: str, funding_stage: str) -> int:
+        # Re-runs the web tier for a combo ahead of its cache expiry (used by
+        # the pre-warm scheduler); returns the number of units cached.
+        units = await self._generative_retrieval(sector, geography, funding_stage)
+        if units:
+            retrieval_cache.store(
+                combo_key(sector, geography, funding_stage), evidence_cache.put_units(units), warmed=True
+            )
+        return len(units)
+
     async def retrieve_relevant_data(
         self, query: str, context: dict
-    ) -> List[EvidenceUnit]:
+    ) -> List[EvidenceRecord]:
         return await self.retrieve_relevant_evidence(
             sector=context.get("sector", "General Tech"),
             geography=context.get("geography", "Global"),
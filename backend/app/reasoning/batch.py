@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.reasoning.rules import RuleSet, rule_registry, normalize_geography, SOURCE_BITS
+from app.reasoning.scoring import confidence_levels, blend_scores, DEFAULT_INVESTOR_SCORE
+from app.schemas.analysis import AnalysisResponse
+
+
+# (evidence, sector, geography, funding_stage). Evidence items only need
+# source_type, usage_tags, investors and geography: EvidenceRecords, or the
+# StoredEvidence rebuilt from saved analyses.
+ValidationInput = Tuple[Sequence, str, str, str]
+
+
+class StoredEvidence:
+
+    # What a saved analysis knows about an evidence unit. Analyses saved
+    # before usage_tags/investors/geography were stored only keep the first
+    # tag; for them the request geography stands in and the investor claim
+    # can only be met through tags.
+
+    __slots__ = ("source_type", "usage_tags", "investors", "geography")
+
+    def __init__(self, source_type: str, usage_tags: List[str], investors: Sequence[str], geography: Optional[str]):
+        self.source_type = source_type
+        self.usage_tags = usage_tags
+        self.investors = investors
+        self.geography = geography
+
+
+def inputs_from_analysis(analysis: AnalysisResponse) -> Tuple[ValidationInput, float, int]:
+    # (validation input, average investor fit score, evidence count) of a
+    # stored analysis, as run_analysis scored it.
+    metadata = analysis.metadata or {}
+    geography = metadata.get("geography", "")
+    evidence = [
+        StoredEvidence(
+            ev.source_type,
+            ev.usage_tags if ev.usage_tags is not None else [ev.usage_reason],
+            ev.investors or (),
+            ev.geography if ev.usage_tags is not None else geography,
+        )
+        for ev in analysis.evidence_used
+    ]
+    scores = [inv.fit_score for inv in analysis.recommended_investors]
+    avg_investor_score = sum(scores) / len(scores) if scores else DEFAULT_INVESTOR_SCORE
+    evidence_count = metadata.get("evidence_count", len(evidence))
+    return (
+        (evidence, metadata.get("sector", "General"), geography, metadata.get("stage", "")),
+        avg_investor_score,
+        evidence_count,
+    )
+
+
+class BatchValidation:
+
+    # Column-wise results of validate_batch, row i for input i.
+    # supported[i] holds the ids of the rules input i satisfies.
+
+    def __init__(self, support_ratio: np.ndarray, supported: List[Tuple[str, ...]]):
+        self.support_ratio = support_ratio
+        self.confidence = confidence_levels(support_ratio)
+        self.supported = supported
+
+    def blended_scores(self, avg_investor_score: Sequence[float], evidence_count: Sequence[int]) -> np.ndarray:
+        return blend_scores(np.asarray(avg_investor_score), self.support_ratio, np.asarray(evidence_count))
+
+    def __len__(self) -> int:
+        return len(self.support_ratio)
+
+
+def validate_batch(inputs: Sequence[ValidationInput]) -> BatchValidation:
+    # Validator.validate for many inputs at once. Inputs are grouped by the
+    # rule set of their sector; each group's evidence is flattened into
+    # arrays (owner row, source bit, tag bitmask, geography and investor
+    # flags) and every rule is evaluated for every unit with array ops.
+    support_ratio = np.zeros(len(inputs), dtype=np.float64)
+    supported: List[Tuple[str, ...]] = [()] * len(inputs)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    rule_sets: Dict[int, RuleSet] = {}
+    for i, (_, sector, _, _) in enumerate(inputs):
+        rule_set = rule_registry.for_sector(sector)
+        rule_sets[id(rule_set)] = rule_set
+        groups[id(rule_set)].append(i)
+
+    for key, rows in groups.items():
+        rule_set = rule_sets[key]
+        if not rule_set.rules:
+            continue
+        passed = _evaluate_group(rule_set, [inputs[i] for i in rows])
+        weights = np.array([r.weight for r in rule_set.rules], dtype=np.float64)
+        total_weight = weights.sum()
+        if total_weight > 0:
+            support_ratio[rows] = (passed * weights).sum(axis=1) / total_weight
+        rule_ids = [r.rule_id for r in rule_set.rules]
+        for row, flags in zip(rows, passed):
+            supported[row] = tuple(rule_id for rule_id, ok in zip(rule_ids, flags) if ok)
+
+    return BatchValidation(support_ratio, supported)
+
+
+def _evaluate_group(rule_set: RuleSet, inputs: Sequence[ValidationInput]) -> np.ndarray:
+    # (inputs x rules) boolean: does the input support the rule.
+    rules = rule_set.rules
+    vocabulary = rule_set.vocabulary
+    # Python ints beyond 64 tags; uint64 bit ops otherwise.
+    mask_dtype = np.uint64 if len(vocabulary) <= 64 else object
+
+    owner: List[int] = []
+    sources: List[int] = []
+    tags: List[int] = []
+    geo_match: List[bool] = []
+    has_investors: List[bool] = []
+    evidence_count = np.zeros(len(inputs), dtype=np.int64)
+
+    for row, (evidence, _, geography, _) in enumerate(inputs):
+        geo_norm = normalize_geography(geography)
+        evidence_count[row] = len(evidence)
+        for ev in evidence:
+            ev_geo = (ev.geography or "").lower()
+            owner.append(row)
+            sources.append(SOURCE_BITS.get(ev.source_type, 0))
+            tags.append(vocabulary.mask(ev.usage_tags))
+            geo_match.append(geo_norm in ev_geo or ev_geo == "global")
+            has_investors.append(len(ev.investors) > 0)
+
+    passed = np.zeros((len(inputs), len(rules)), dtype=bool)
+    if not owner:
+        return passed
+
+    owner_arr = np.array(owner, dtype=np.int64)
+    source_arr = np.array(sources, dtype=np.int64)
+    tag_arr = np.array(tags, dtype=mask_dtype)
+    geo_arr = np.array(geo_match, dtype=bool)
+    investor_arr = np.array(has_investors, dtype=bool)
+
+    for j, rule in enumerate(rules):
+        ok = (source_arr & rule.source_mask) != 0
+        if rule.geography == "match":
+            ok &= geo_arr
+        if rule.has_tag_condition:
+            rule_tags = np.uint64(rule.tag_mask) if mask_dtype is np.uint64 else rule.tag_mask
+            tag_ok = (tag_arr & rule_tags) != 0
+            if rule.or_has_investors:
+                tag_ok |= investor_arr
+            if rule.or_evidence_over is not None:
+                tag_ok |= (evidence_count > rule.or_evidence_over)[owner_arr]
+            ok &= tag_ok.astype(bool)
+        counts = np.bincount(owner_arr, weights=ok, minlength=len(inputs))
+        passed[:, j] = counts >= rule.min_count
+
+    return passed
@@ -0,0 +1,228 @@
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from app.config.settings import settings
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+# Built-in packs; settings.VALIDATOR_RULE_PACKS_DIR may add or override packs.
+RULE_PACKS_DIR = Path(__file__).resolve().parent / "rule_packs"
+DEFAULT_PACK = "default"
+
+SOURCE_BITS = {source_type: 1 << i for i, source_type in enumerate(SourceType)}
+_ALL_SOURCES = sum(SOURCE_BITS.values())
+
+
+def normalize_geography(geography: str) -> str:
+    # "india" from "India - Pan India"
+    return geography.lower().split("-")[0].strip()
+
+
+class TagVocabulary:
+
+    # Interns usage tags to bit positions, so a rule's tag set and an
+    # evidence unit's tags are both plain ints and "any tag in common" is a
+    # single AND. Only tags some rule mentions get a bit.
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+
+    def intern(self, tag: str) -> int:
+        bit = self._bits.get(tag)
+        if bit is None:
+            bit = self._bits[tag] = 1 << len(self._bits)
+        return bit
+
+    def mask(self, tags: Iterable[str]) -> int:
+        mask = 0
+        for tag in tags:
+            mask |= self._bits.get(tag, 0)
+        return mask
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+
+class Rule:
+
+    # One claim, defined as data (see rule_packs/default.yaml):
+    # - claim: text, formatted with {sector}, {geography}, {funding_stage}
+    # - source_types: evidence must be one of these (default: any)
+    # - tags: evidence must carry at least one (default: no tag condition)
+    # - or_has_investors: naming an investor also satisfies the tag condition
+    # - or_evidence_over: every unit supports the claim when the request has
+    #   more than this many evidence units
+    # - geography: "match" requires the request geography (or "global")
+    # - min_count: supporting units needed for the claim to hold
+    # - weight: share of the support ratio this claim carries
+
+    __slots__ = (
+        "rule_id", "claim", "source_types", "tags", "or_has_investors",
+        "or_evidence_over", "geography", "min_count", "weight",
+        "source_mask", "tag_mask",
+    )
+
+    def __init__(self, spec: Dict):
+        self.rule_id = spec["id"]
+        self.claim = spec["claim"]
+        self.source_types = [SourceType(s) for s in spec.get("source_types") or []]
+        self.tags = list(spec.get("tags") or [])
+        self.or_has_investors = bool(spec.get("or_has_investors", False))
+        self.or_evidence_over = spec.get("or_evidence_over")
+        self.geography = spec.get("geography", "any")
+        if self.geography not in ("any", "match"):
+            raise ValueError(f"Rule {self.rule_id}: geography must be 'any' or 'match'")
+        self.min_count = int(spec.get("min_count", 1))
+        self.weight = float(spec.get("weight", 1.0))
+        self.source_mask = _ALL_SOURCES
+        self.tag_mask = 0
+
+    def compile(self, vocabulary: TagVocabulary):
+        if self.source_types:
+            self.source_mask = sum(SOURCE_BITS[s] for s in set(self.source_types))
+        self.tag_mask = 0
+        for tag in self.tags:
+            self.tag_mask |= vocabulary.intern(tag)
+
+    @property
+    def has_tag_condition(self) -> bool:
+        return bool(self.tags) or self.or_has_investors or self.or_evidence_over is not None
+
+
+class RuleSet:
+
+    # A compiled, ordered list of rules. evaluate() makes one pass over the
+    # evidence and tests each unit against every rule with integer masks.
+
+    def __init__(self, rules: List[Rule], packs: Tuple[str, ...] = ()):
+        self.rules = rules
+        self.packs = packs
+        self.vocabulary = TagVocabulary()
+        for rule in rules:
+            rule.compile(self.vocabulary)
+
+    def evaluate(
+        self, evidence: List[EvidenceRecord], geography: str
+    ) -> List[Tuple[Rule, List[str]]]:
+        # (rule, supporting evidence ids) for every rule, in rule order.
+        geo_norm = normalize_geography(geography)
+        total = len(evidence)
+        supporting: List[List[str]] = [[] for _ in self.rules]
+        # Rules whose tag condition holds for every unit in this request.
+        blanket = [
+            r.or_evidence_over is not None and total > r.or_evidence_over
+            for r in self.rules
+        ]
+
+        for ev in evidence:
+            source_bit = SOURCE_BITS[ev.source_type]
+            tag_mask = self.vocabulary.mask(ev.usage_tags)
+            has_investors = len(ev.investors) > 0
+            ev_geo = (ev.geography or "").lower()
+            geo_match = geo_norm in ev_geo or ev_geo == "global"
+
+            for i, rule in enumerate(self.rules):
+                if not rule.source_mask & source_bit:
+                    continue
+                if rule.geography == "match" and not geo_match:
+                    continue
+                if rule.has_tag_condition and not (
+                    rule.tag_mask & tag_mask
+                    or (rule.or_has_investors and has_investors)
+                    or blanket[i]
+                ):
+                    continue
+                supporting[i].append(ev.evidence_id)
+
+        return list(zip(self.rules, supporting))
+
+
+def _read_pack(name: str) -> Optional[Dict]:
+    # Packs in VALIDATOR_RULE_PACKS_DIR shadow the built-in ones of the same name.
+    directories = [RULE_PACKS_DIR]
+    if settings.VALIDATOR_RULE_PACKS_DIR:
+        directories.insert(0, Path(settings.VALIDATOR_RULE_PACKS_DIR))
+    for directory in directories:
+        path = directory / f"{name}.yaml"
+        if path.exists():
+            with path.open("r", encoding="utf-8") as f:
+                return yaml.safe_load(f) or {}
+    return None
+
+
+def _pack_names() -> List[str]:
+    names = {p.stem for p in RULE_PACKS_DIR.glob("*.yaml")}
+    if settings.VALIDATOR_RULE_PACKS_DIR:
+        names.update(p.stem for p in Path(settings.VALIDATOR_RULE_PACKS_DIR).glob("*.yaml"))
+    names.discard(DEFAULT_PACK)
+    return sorted(names)
+
+
+class RuleRegistry:
+
+    # Rule sets per sector: the default pack, then every sector pack whose
+    # `sectors` keywords occur in the sector name. A sector pack rule with
+    # an existing id replaces it (`enabled: false` drops it); new ids are
+    # appended. Compiled sets are cached per sector; reload() re-reads the files.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._packs: Optional[Dict[str, Dict]] = None
+        self._compiled: Dict[str, RuleSet] = {}
+
+    def for_sector(self, sector: str) -> RuleSet:
+        key = (sector or "").strip().lower()
+        rule_set = self._compiled.get(key)
+        if rule_set is None:
+            with self._lock:
+                rule_set = self._compiled.get(key)
+                if rule_set is None:
+                    rule_set = self._compiled[key] = self._build(key)
+        return rule_set
+
+    def reload(self):
+        with self._lock:
+            self._packs = None
+            self._compiled = {}
+
+    def _load_packs(self) -> Dict[str, Dict]:
+        if self._packs is None:
+            packs = {}
+            for name in [DEFAULT_PACK] + _pack_names():
+                pack = _read_pack(name)
+                if pack is not None:
+                    packs[name] = pack
+            if DEFAULT_PACK not in packs:
+                raise FileNotFoundError(f"Validator rule pack '{DEFAULT_PACK}.yaml' not found")
+            self._packs = packs
+        return self._packs
+
+    def _build(self, sector: str) -> RuleSet:
+        packs = self._load_packs()
+        specs: Dict[str, Dict] = {}
+        applied = [DEFAULT_PACK]
+        for spec in packs[DEFAULT_PACK].get("rules", []):
+            specs[spec["id"]] = spec
+
+        for name, pack in packs.items():
+            if name == DEFAULT_PACK:
+                continue
+            keywords = [k.lower() for k in pack.get("sectors", [])]
+            if not any(k in sector for k in keywords):
+                continue
+            applied.append(name)
+            for spec in pack.get("rules", []):
+                if spec.get("enabled", True) is False:
+                    specs.pop(spec["id"], None)
+                elif spec["id"] in specs:
+                    specs[spec["id"]] = {**specs[spec["id"]], **spec}
+                else:
+                    specs[spec["id"]] = spec
+
+        return RuleSet([Rule(spec) for spec in specs.values()], tuple(applied))
+
+
+rule_registry = RuleRegistry()
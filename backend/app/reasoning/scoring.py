@@ -0,0 +1,67 @@
+from typing import List
+
+import numpy as np
+
+
+# Blended analysis score: investor fit and claim support dominate, evidence
+# volume nudges. Scalar and vectorized forms must stay in step.
+INVESTOR_WEIGHT = 0.45
+REASONING_WEIGHT = 0.45
+EVIDENCE_WEIGHT = 0.1
+# Analyses without recommended investors / without evidence.
+DEFAULT_INVESTOR_SCORE = 50
+EMPTY_EVIDENCE_SCORE = 30
+# Evidence units for a full evidence score.
+FULL_EVIDENCE_COUNT = 7.0
+
+
+def confidence_level(support_ratio: float) -> str:
+    if support_ratio > 0.7:
+        return "high"
+    elif support_ratio > 0.4:
+        return "medium"
+    return "low"
+
+
+def blend_score(investor_scores: List[int], support_ratio: float, evidence_count: int) -> int:
+    avg_inv_score = (
+        sum(investor_scores) / len(investor_scores)
+        if investor_scores
+        else DEFAULT_INVESTOR_SCORE
+    )
+    evidence_score = (
+        min(100, (evidence_count / FULL_EVIDENCE_COUNT) * 100) if evidence_count else EMPTY_EVIDENCE_SCORE
+    )
+    reasoning_ratio_score = support_ratio * 100
+
+    blended_score = int(
+        (avg_inv_score * INVESTOR_WEIGHT) +
+        (reasoning_ratio_score * REASONING_WEIGHT) +
+        (evidence_score * EVIDENCE_WEIGHT)
+    )
+    # Final cap for realism
+    return max(5, min(99, blended_score))
+
+
+def confidence_levels(support_ratio: np.ndarray) -> np.ndarray:
+    return np.select(
+        [support_ratio > 0.7, support_ratio > 0.4], ["high", "medium"], default="low"
+    )
+
+
+def blend_scores(avg_investor_score: np.ndarray, support_ratio: np.ndarray, evidence_count: np.ndarray) -> np.ndarray:
+    # blend_score() over arrays; pass DEFAULT_INVESTOR_SCORE where an
+    # analysis has no investor scores.
+    evidence_count = np.asarray(evidence_count, dtype=np.float64)
+    evidence_score = np.where(
+        evidence_count > 0,
+        np.minimum(100, (evidence_count / FULL_EVIDENCE_COUNT) * 100),
+        EMPTY_EVIDENCE_SCORE,
+    )
+    reasoning_ratio_score = np.asarray(support_ratio, dtype=np.float64) * 100
+    blended = np.trunc(
+        (np.asarray(avg_investor_score, dtype=np.float64) * INVESTOR_WEIGHT) +
+        (reasoning_ratio_score * REASONING_WEIGHT) +
+        (evidence_score * EVIDENCE_WEIGHT)
+    ).astype(np.int64)
+    return np.clip(blended, 5, 99)
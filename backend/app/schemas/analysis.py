@@ -21,6 +21,9 @@ class AnalysisRequest(BaseModel):
     geography: str = Field(..., description="Target market geography")
     language: str = Field("en", description="Response language (e.g., en, hi)")
     user_id: Optional[str] = Field(None, description="The ID of the user performing the analysis")
+    include_timings: bool = Field(
+        False, description="Add a per-stage timing breakdown to metadata.timings_ms"
+    )
 
 
 class InvestorRecommendation(BaseModel):
@@ -32,12 +35,23 @@ class InvestorRecommendation(BaseModel):
 
 
 class EvidenceUsed(BaseModel):
+    evidence_id: Optional[str] = Field(
+        None, description="Content-addressed id; resolves to the full unit in the evidence cache"
+    )
     source_type: str = Field(..., description="e.g., news, policy, dataset")
     title: str
     source_name: str
     year: str
     url: Optional[str] = None
     usage_reason: str
+    excerpt: Optional[str] = Field(
+        None, description="Start of the evidence text, used to ground follow-up chat"
+    )
+    usage_tags: Optional[List[str]] = Field(
+        None, description="All usage tags of the evidence, used to re-validate stored analyses"
+    )
+    investors: Optional[List[str]] = Field(None, description="Investors named in the evidence")
+    geography: Optional[str] = Field(None, description="Geography of the evidence")
 
 
 class AnalysisResponse(BaseModel):
@@ -58,6 +72,36 @@ class AnalysisResponse(BaseModel):
     metadata: Dict = {}
 
 
+class BatchAnalysisRequest(BaseModel):
+    items: List[AnalysisRequest] = Field(..., min_length=1, description="Startups to analyze")
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, description="Upper bound on concurrent report generations (capped at the server's BATCH_CONCURRENCY)"
+    )
+
+
+class BatchAnalysisItem(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="ok or error")
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchAnalysisItem]
+    cohort_count: int = Field(..., description="Retrievals performed, one per (sector, geography, stage)")
+    succeeded: int
+    failed: int
+
+
 class TranslationRequest(BaseModel):
     text: str
     target_language: str
+
+
+class TranslationBatchRequest(BaseModel):
+    texts: List[str]
+    target_language: str
+
+
+class TranslationBatchResponse(BaseModel):
+    translations: List[str]
@@ -6,7 +6,10 @@ class ChatRequest(BaseModel):
     analysis_id: Optional[str] = Field(None, description="Context from a specific analysis")
     language: str = Field("en", description="Preferred response language")
     user_id: Optional[str] = None
-    chat_history: Optional[List[Dict[str, str]]] = Field(default_factory=list, description="Recent conversation history")
+    chat_history: Optional[List[Dict[str, str]]] = Field(
+        default_factory=list,
+        description="Only used without user_id/analysis_id; otherwise the server keeps the conversation",
+    )
 
 class ChatSource(BaseModel):
     title: str
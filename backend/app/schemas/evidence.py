@@ -1,5 +1,6 @@
+import sys
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from enum import Enum
 from datetime import datetime
 
@@ -54,6 +55,86 @@ class EvidenceUnit(BaseModel):
     )
 
 
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class EvidenceRecord:
+
+    # Internal evidence representation used by retrieval, ranking,
+    # validation and caching: the same fields as EvidenceUnit, with no
+    # validation on construction. __slots__ keeps instances small, and the
+    # low-cardinality strings (sector, geography, source name, stage) are
+    # interned so thousands of units share one copy. Callers pass
+    # already-typed values; convert with to_unit() where a pydantic model
+    # is required (API responses, ingestion payloads).
+
+    __slots__ = (
+        "evidence_id", "source_type", "title", "source_name", "published_year", "url",
+        "sector", "funding_stage", "geography", "investors", "content", "usage_tags",
+    )
+
+    def __init__(
+        self,
+        evidence_id: str,
+        source_type: SourceType,
+        title: str,
+        source_name: str,
+        published_year: int,
+        sector: str,
+        content: str,
+        url: Optional[str] = None,
+        funding_stage: Optional[str] = None,
+        geography: Optional[str] = None,
+        investors: Iterable[str] = (),
+        usage_tags: Iterable[str] = (),
+    ):
+        self.evidence_id = evidence_id
+        self.source_type = source_type if isinstance(source_type, SourceType) else SourceType(source_type)
+        self.title = title
+        self.source_name = _intern(source_name)
+        self.published_year = published_year
+        self.url = url
+        self.sector = _intern(sector)
+        self.funding_stage = _intern(funding_stage)
+        self.geography = _intern(geography)
+        self.investors = list(investors)
+        self.content = content
+        self.usage_tags = [_intern(t) for t in usage_tags]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EvidenceRecord":
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+    @classmethod
+    def from_unit(cls, unit: EvidenceUnit) -> "EvidenceRecord":
+        return cls(**{k: getattr(unit, k) for k in cls.__slots__})
+
+    def to_dict(self, json_mode: bool = False) -> Dict[str, Any]:
+        # Same shape as EvidenceUnit.model_dump(); json_mode gives the enum's value.
+        data = {k: getattr(self, k) for k in self.__slots__}
+        data["investors"] = list(self.investors)
+        data["usage_tags"] = list(self.usage_tags)
+        if json_mode:
+            data["source_type"] = self.source_type.value
+        return data
+
+    def with_context(self, sector: str, geography: Optional[str]) -> "EvidenceRecord":
+        # This unit as retrieved for another request: the shared copy keeps
+        # the sector/geography it was first cached with, callers get theirs.
+        if self.sector == sector and self.geography == geography:
+            return self
+        data = self.to_dict()
+        data.update(sector=sector, geography=geography)
+        return EvidenceRecord(**data)
+
+    def to_unit(self) -> EvidenceUnit:
+        return EvidenceUnit(**self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"EvidenceRecord({self.evidence_id!r}, {self.title!r})"
+
+
 class IngestedEvidencePayload(BaseModel):
 
     # IngestedEvidencePayload represents the contract for data processed by ingestion scripts.
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from enum import Enum
+
+from app.schemas.analysis import AnalysisRequest, AnalysisResponse
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class AnalysisJob(BaseModel):
+
+    # defines the shape of an asynchronous /analyze job.
+    job_id: str
+    user_id: Optional[str] = None
+    status: JobStatus
+    request: AnalysisRequest
+    analysis_id: Optional[str] = Field(
+        None, description="Stored analysis produced by the job once it succeeded"
+    )
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    lease_expires_at: Optional[float] = Field(
+        None, description="Epoch seconds after which a running job is considered orphaned"
+    )
+    result: Optional[AnalysisResponse] = None
@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.schemas.evidence import EvidenceUnit, SourceType
 from app.data.evidence_store import EvidenceStore
+from app.core.evidence_catalog import evidence_id_for
 
 
 def chunk_text(text, chunk_size=1500, overlap=200):
@@ -67,7 +68,7 @@ def ingest_local_files(data_root: str = "data/raw"):
                                 processed_investors = [i.strip() for i in raw_investors.split(",")] if isinstance(raw_investors, str) else list(raw_investors)
 
                                 evidence = EvidenceUnit(
-                                    evidence_id=f"ev_vec_{file.replace('.md', '')}",
+                                    evidence_id=evidence_id_for(metadata.get("title", file), metadata.get("source_url"), body),
                                     source_type=SourceType(metadata.get("source_type", "news")),
                                     title=metadata.get("title", file),
                                     source_name=metadata.get("source_name", "Local Intelligence"),
@@ -101,7 +102,7 @@ def ingest_local_files(data_root: str = "data/raw"):
                 chunks = chunk_text(full_text)
                 for i, chunk in enumerate(chunks):
                     evidence = EvidenceUnit(
-                        evidence_id=f"ev_pdf_{file.replace('.pdf', '')}_{i}",
+                        evidence_id=evidence_id_for(f"{file} (Part {i+1})", None, chunk),
                         source_type=SourceType(source_type),
                         title=f"{file} (Part {i+1})",
                         source_name="Official PDF Document",
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.schemas.evidence import EvidenceUnit, EvidenceRecord, SourceType
+
+
+# Per-unit construction time, memory and serialization cost of the pydantic
+# EvidenceUnit against the slotted EvidenceRecord used inside retrieval.
+#
+#   python scripts/bench_evidence.py [--units 20000]
+
+
+_SECTORS = ["Fintech", "AgriTech", "HealthTech", "EdTech", "CleanTech"]
+_GEOGRAPHIES = ["India", "Southeast Asia", "Pan-India", "Global"]
+
+
+def _fields(i: int) -> dict:
+    # Fresh string objects per unit, as parsed from files or JSON.
+    return {
+        "evidence_id": f"ev_{i:020x}",
+        "source_type": SourceType.NEWS,
+        "title": f"Startup {i} raises seed round",
+        "source_name": "".join(["Inc42 ", "Media"]),
+        "published_year": 2024,
+        "url": f"https://example.com/{i}",
+        "sector": "".join([_SECTORS[i % len(_SECTORS)]]),
+        "funding_stage": "".join(["Se", "ed"]),
+        "geography": "".join([_GEOGRAPHIES[i % len(_GEOGRAPHIES)]]),
+        "investors": [f"Fund {i % 50}", "Blume Ventures"],
+        "content": f"Startup {i} closed a seed round led by Fund {i % 50}.",
+        "usage_tags": ["".join(["funding", "-round"]), "investor-activity"],
+    }
+
+
+def _measure(name: str, build, count: int):
+    inputs = [_fields(i) for i in range(count)]
+    start = time.perf_counter()
+    units = [build(f) for f in inputs]
+    construct = time.perf_counter() - start
+
+    inputs = [_fields(i) for i in range(count)]
+    tracemalloc.start()
+    kept = [build(f) for f in inputs]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    dump = (lambda u: u.model_dump(mode="json")) if hasattr(units[0], "model_dump") else (lambda u: u.to_dict(json_mode=True))
+    start = time.perf_counter()
+    for unit in units:
+        dump(unit)
+    serialize = time.perf_counter() - start
+
+    print(
+        f"{name:<15} construct {construct / count * 1e6:7.2f} us/unit   "
+        f"memory {memory / count:7.0f} B/unit   "
+        f"to dict {serialize / count * 1e6:7.2f} us/unit"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evidence unit representations.")
+    parser.add_argument("--units", type=int, default=20000, help="Units built per measurement")
+    args = parser.parse_args()
+
+    print(f"[*] {args.units} units per measurement.")
+    _measure("EvidenceUnit", lambda f: EvidenceUnit(**f), args.units)
+    _measure("EvidenceRecord", lambda f: EvidenceRecord(**f), args.units)
+    _measure("Record.to_unit", lambda f: EvidenceRecord(**f).to_unit(), args.units)
+
+
+if __name__ == "__main__":
+    main()
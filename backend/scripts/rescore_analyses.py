@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.core.storage import storage
+from app.reasoning.batch import validate_batch, inputs_from_analysis
+
+
+# Re-runs validation and scoring over every stored analysis with the current
+# rule packs (app/reasoning/rule_packs) and reports what would change.
+# Stored analyses are not modified.
+#
+#   python scripts/rescore_analyses.py [--user-id ID] [--output changes.jsonl]
+#
+# Analyses saved before evidence_used carried usage_tags/investors/geography
+# only keep each unit's first tag, so their results are approximate.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored analyses with the current validator rules.")
+    parser.add_argument("--user-id", help="Only analyses of this user")
+    parser.add_argument("--output", help="Write one JSON line per changed analysis to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ids, inputs, investor_scores, evidence_counts = [], [], [], []
+    old_scores, old_confidence = [], []
+    for analysis in storage.iter_analyses(args.user_id):
+        validation_input, avg_investor_score, evidence_count = inputs_from_analysis(analysis)
+        ids.append(analysis.analysis_id)
+        inputs.append(validation_input)
+        investor_scores.append(avg_investor_score)
+        evidence_counts.append(evidence_count)
+        old_scores.append(analysis.overall_score)
+        old_confidence.append(analysis.confidence_indicator.value)
+    loaded = time.perf_counter()
+    print(f"[*] Loaded {len(ids)} analyses in {loaded - start:.2f}s.")
+    if not ids:
+        return
+
+    result = validate_batch(inputs)
+    scores = result.blended_scores(investor_scores, evidence_counts)
+    print(f"[*] Re-scored {len(ids)} analyses in {time.perf_counter() - loaded:.2f}s.")
+
+    changed = 0
+    transitions = Counter()
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for i, analysis_id in enumerate(ids):
+            confidence = str(result.confidence[i])
+            score = int(scores[i])
+            if score == old_scores[i] and confidence == old_confidence[i]:
+                continue
+            changed += 1
+            transitions[(old_confidence[i], confidence)] += 1
+            if out:
+                out.write(json.dumps({
+                    "analysis_id": analysis_id,
+                    "old_score": old_scores[i],
+                    "new_score": score,
+                    "old_confidence": old_confidence[i],
+                    "new_confidence": confidence,
+                    "support_ratio": round(float(result.support_ratio[i]), 4),
+                    "supported_rules": list(result.supported[i]),
+                }) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    print(f"[*] {changed} of {len(ids)} analyses would change.")
+    for (old, new), count in transitions.most_common():
+        print(f"    confidence {old} -> {new}: {count}")
+    if out:
+        print(f"[+] Changes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
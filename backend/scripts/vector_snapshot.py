@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import argparse
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.data.evidence_store import EvidenceStore
+from app.data.vector_snapshot import export_snapshot, import_snapshot, load_snapshot, SnapshotError
+
+
+# Exports the evidence vector store (ChromaDB, `db/`) to one snapshot file
+# with embeddings, documents, metadata and a manifest hash, and imports it
+# into another store without re-extracting PDFs or embedding anything.
+#
+#   python scripts/vector_snapshot.py export db_snapshot.fsv [--db db]
+#   python scripts/vector_snapshot.py import db_snapshot.fsv [--db db] [--no-verify]
+#   python scripts/vector_snapshot.py verify db_snapshot.fsv
+#
+# Set VECTOR_SNAPSHOT_PATH to have the backend import it at boot.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import evidence vector store snapshots.")
+    parser.add_argument("command", choices=["export", "import", "verify"])
+    parser.add_argument("path", help="Snapshot file")
+    parser.add_argument("--db", default="db", help="ChromaDB directory (default: db)")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the manifest hash check on import")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "verify":
+            manifest, _, _ = load_snapshot(args.path, verify=True)
+            action = "Verified"
+        elif args.command == "export":
+            manifest = export_snapshot(EvidenceStore(args.db), args.path)
+            action = "Exported"
+        else:
+            manifest = import_snapshot(EvidenceStore(args.db), args.path, verify=not args.no_verify)
+            action = "Imported"
+    except SnapshotError as e:
+        print(f"[!] {e}")
+        sys.exit(1)
+
+    print(
+        f"[+] {action} {manifest['count']} units ({manifest['dim']}-d, {manifest['embedding_space']}) "
+        f"in {time.perf_counter() - start:.2f}s. sha256 {manifest['sha256'][:16]}..."
+    )
+
+
+if __name__ == "__main__":
+    main()
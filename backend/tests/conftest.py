@@ -0,0 +1,47 @@
+import os
+import sys
+import datetime
+
+import pytest
+
+# Tests import the app the same way scripts/ do: from the backend directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def storage_files(tmp_path, monkeypatch):
+    # Points new Storage instances at tmp_path, with their own write-behind
+    # worker ("none" durability, no group-commit delay).
+    import app.core.storage as module
+    from app.core.persistence import PersistenceWorker
+
+    monkeypatch.setattr(module, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(module, "ANALYSES_FILE", tmp_path / "analyses.jsonl")
+    monkeypatch.setattr(module, "LEGACY_ANALYSES_FILE", tmp_path / "analyses.json")
+    monkeypatch.setattr(module, "LOCK_FILE", tmp_path / ".storage.lock")
+    worker = PersistenceWorker(durability="none", flush_interval_ms=0)
+    monkeypatch.setattr(module, "persistence_worker", worker)
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def make_analysis():
+    from app.schemas.analysis import AnalysisResponse
+
+    def make(analysis_id: str, user_id=None, created_at=None, **metadata):
+        return AnalysisResponse(
+            analysis_id=analysis_id,
+            user_id=user_id,
+            startup_summary=f"Summary of {analysis_id}",
+            confidence_indicator="medium",
+            overall_score=70,
+            recommended_investors=[],
+            why_fits=[],
+            why_does_not_fit=[],
+            evidence_used=[],
+            created_at=created_at or datetime.datetime.utcnow().isoformat() + "Z",
+            metadata=metadata,
+        )
+
+    return make
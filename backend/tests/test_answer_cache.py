@@ -0,0 +1,19 @@
+import asyncio
+
+from app.core.answer_cache import SemanticAnswerCache
+
+
+def test_store_into_new_context_survives_eviction():
+    cache = SemanticAnswerCache(capacity=2, ttl_seconds=3600)
+
+    async def scenario():
+        for question in ("what is the market size", "who are the competitors"):
+            probe = await cache.lookup(("en", "a"), question)
+            cache.store(probe, f"answer: {question}", [])
+        probe = await cache.lookup(("en", "b"), "how much should we raise")
+        cache.store(probe, "answer b", [])
+        return await cache.lookup(("en", "b"), "how much should we raise")
+
+    probe = asyncio.run(scenario())
+    assert probe.hit is not None and probe.hit.answer == "answer b"
+    assert cache.stats() == {"entries": 2, "contexts": 2, "capacity": 2}
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.core.chat_orchestrator as module
+from app.core.chat_orchestrator import ChatOrchestrator, _cached_expansion
+from app.schemas.chat import ChatRequest
+
+
+def _orchestrator(retriever=None):
+    # Skips __init__: no vector store or model clients needed for these paths.
+    orchestrator = ChatOrchestrator.__new__(ChatOrchestrator)
+    orchestrator.generator = SimpleNamespace(client=None)
+    orchestrator.retriever = retriever
+    return orchestrator
+
+
+def test_expansion_cache_is_keyed_on_conversation_context(monkeypatch):
+    monkeypatch.setattr(module, "_expansions", type(module._expansions)())
+    prompts = []
+
+    async def generate(kind, client, model, contents):
+        prompts.append(contents)
+        return SimpleNamespace(text=f"expansion {len(prompts)}")
+
+    monkeypatch.setattr(module.llm_gateway, "generate", generate)
+    orchestrator = _orchestrator()
+    request = ChatRequest(message="और सीरीज़ ए के बारे में?", language="hi")
+    seed_round = ["सीड राउंड में कौन निवेश करता है?"]
+    pre_seed = ["प्री-सीड के लिए कितना जुटाएं?"]
+
+    assert _cached_expansion(request, seed_round) is None
+    first = asyncio.run(orchestrator._expand(request, seed_round))
+    assert seed_round[0] in prompts[0]
+
+    # Same follow-up in another conversation: no reuse, a fresh expansion.
+    assert _cached_expansion(request, pre_seed) is None
+    second = asyncio.run(orchestrator._expand(request, pre_seed))
+    assert first != second and pre_seed[0] in prompts[1]
+
+    assert _cached_expansion(request, seed_round) == first
+    assert _cached_expansion(request, pre_seed) == second
+
+
+def test_empty_raw_message_web_tier_is_rerun_on_expansion():
+    calls = []
+
+    def start_generative(sector, geography, stage, description):
+        calls.append(description)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(["expanded evidence"])
+        return future
+
+    retriever = SimpleNamespace(client=object(), start_generative=start_generative)
+    orchestrator = _orchestrator(retriever)
+
+    async def refine(speculative_result, expanded):
+        speculative = asyncio.get_running_loop().create_future()
+        speculative.set_result(speculative_result)
+        return await orchestrator._refine_web(
+            speculative, "Fintech", "India", "Seed", "A payments app", "raw message", expanded
+        )
+
+    assert asyncio.run(refine(["raw evidence"], "expanded query")) == ["raw evidence"]
+    assert asyncio.run(refine([], "raw message")) == []
+    assert calls == []
+
+    assert asyncio.run(refine([], "expanded query")) == ["expanded evidence"]
+    assert calls == ["A payments app expanded query"]
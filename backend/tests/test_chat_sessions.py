@@ -0,0 +1,69 @@
+import asyncio
+
+from app.core.conversation_memory import ConversationMemory
+from app.core.chat_evidence_cache import ChatEvidenceCache
+
+
+def test_anonymous_chats_do_not_share_history():
+    memory = ConversationMemory()
+    key = memory.session_key(None, "analysis-1")
+    assert key is None
+    memory.record_turn(key, "first user's question", "first user's answer")
+
+    history = memory.history_section(
+        memory.session_key(None, "analysis-1"),
+        [{"role": "user", "content": "my own question"}, {"role": "assistant", "content": "my own answer"}],
+    )
+    assert "first user's" not in history
+    assert "my own question" in history
+
+
+def test_anonymous_chats_do_not_pool_evidence():
+    cache = ChatEvidenceCache()
+    retrieved = []
+
+    async def retrieve():
+        retrieved.append(1)
+        return []
+
+    asyncio.run(cache.get_evidence(None, "question", retrieve))
+    assert retrieved and not cache.has_session(None)
+    assert cache.stats()["sessions"] == 0
+
+
+def test_refresh_rebuilds_memory_without_failed_turns(storage_files, monkeypatch):
+    import app.core.conversation_memory as module
+    import app.core.storage as storage_module
+    from app.core.conversation_memory import CHAT_FAILURE_MESSAGE
+
+    storage = storage_module.Storage()
+    monkeypatch.setattr(module, "storage", storage)
+    for message in (
+        {"role": "user", "content": "who invests in seed fintech", "analysis_id": "a1"},
+        {"role": "assistant", "content": "Blume and Accel", "analysis_id": "a1", "failed": False},
+        {"role": "user", "content": "and series A", "analysis_id": "a1"},
+        {"role": "assistant", "content": "upstream timed out", "analysis_id": "a1", "failed": True},
+        # Logged before the flag existed
+        {"role": "user", "content": "any policy news", "analysis_id": "a1"},
+        {"role": "assistant", "content": CHAT_FAILURE_MESSAGE, "analysis_id": "a1"},
+        {"role": "user", "content": "other analysis", "analysis_id": "a2"},
+        {"role": "assistant", "content": "other answer", "analysis_id": "a2"},
+    ):
+        storage.save_chat_message("u1", message)
+
+    # A fresh process: nothing in memory until the session is refreshed.
+    memory = ConversationMemory()
+    key = memory.session_key("u1", "a1")
+    assert memory.history_section(key) == ""
+
+    asyncio.run(memory.refresh(key))
+    history = memory.history_section(key)
+    assert "Blume and Accel" in history
+    assert "upstream timed out" not in history
+    assert CHAT_FAILURE_MESSAGE not in history
+    assert "other answer" not in history
+    assert memory.recent_questions(key) == ["who invests in seed fintech"]
+
+    # Already reflected: a second refresh adds nothing.
+    asyncio.run(memory.refresh(key))
+    assert memory.history_section(key) == history
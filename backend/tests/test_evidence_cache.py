@@ -0,0 +1,37 @@
+from app.core.evidence_cache import EvidenceCache
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+def _unit(sector: str, geography: str) -> EvidenceRecord:
+    return EvidenceRecord(
+        evidence_id="ev_same_source",
+        source_type=SourceType.NEWS,
+        title="Startup raises seed round",
+        source_name="Inc42",
+        published_year=2024,
+        sector=sector,
+        geography=geography,
+        content="A seed round.",
+    )
+
+
+def _cache(tmp_path, monkeypatch) -> EvidenceCache:
+    import app.core.evidence_cache as module
+    monkeypatch.setattr(module, "EVIDENCE_CACHE_FILE", tmp_path / "evidence.jsonl")
+    monkeypatch.setattr(module, "EVIDENCE_CACHE_LOCK_FILE", tmp_path / ".evidence.lock")
+    return EvidenceCache(capacity=10)
+
+
+def test_cached_source_keeps_the_callers_context(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, monkeypatch)
+    cache.put_units([_unit("Fintech", "India")])
+    (unit,) = cache.put_units([_unit("Fintech", "Southeast Asia")])
+    assert unit.geography == "Southeast Asia"
+    assert cache.get("ev_same_source").geography == "India"
+
+
+def test_log_replay_keeps_the_first_copy(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, monkeypatch)
+    cache._flush([[cache._to_record("ev_same_source", _unit("Fintech", "India"))]], fsync=False)
+    cache._flush([[cache._to_record("ev_same_source", _unit("Fintech", "Kenya"))]], fsync=False)
+    assert _cache(tmp_path, monkeypatch).get("ev_same_source").geography == "India"
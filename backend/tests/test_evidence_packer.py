@@ -0,0 +1,78 @@
+import json
+
+from app.generation.evidence_packer import EvidencePacker, estimate_tokens
+from app.schemas.evidence import EvidenceRecord, SourceType
+from app.schemas.reasoning import ReasoningResult
+
+
+def _unit(evidence_id: str, title: str, content: str) -> EvidenceRecord:
+    return EvidenceRecord(
+        evidence_id=evidence_id,
+        source_type=SourceType.NEWS,
+        title=title,
+        source_name="Inc42",
+        published_year=2024,
+        sector="Fintech",
+        geography="India",
+        content=content,
+    )
+
+
+def _reasoning(evidence_map=None) -> ReasoningResult:
+    return ReasoningResult(
+        supported_claims=["Market growth and demand for Fintech in India"],
+        rejected_claims=["Availability of Seed capital for Fintech startups"],
+        confidence_level="medium",
+        support_ratio=0.5,
+        evidence_map=evidence_map or {},
+    )
+
+
+def test_cited_units_come_first_then_claim_overlap():
+    units = [
+        _unit("plain", "Cricket scores", "Rain expected."),
+        _unit("overlap", "Fintech demand in India grows", "Market growth continues."),
+        _unit("cited-once", "Cricket fixtures", "Rain expected."),
+        _unit("cited-twice", "Cricket results", "Rain expected."),
+    ]
+    reasoning = _reasoning({"claim a": ["cited-twice", "cited-once"], "claim b": ["cited-twice"]})
+    packed, _ = EvidencePacker(token_budget=10000).pack(units, reasoning)
+
+    assert [p["title"] for p in packed] == [
+        "Cricket results", "Cricket fixtures", "Fintech demand in India grows", "Cricket scores",
+    ]
+    # Ids are only for the validator.
+    assert all("evidence_id" not in p for p in packed)
+
+
+def test_packing_stays_within_the_token_budget():
+    units = [_unit(f"ev{i}", f"Fintech round {i}", "Funding news. " * 40) for i in range(30)]
+    packed, used = EvidencePacker(token_budget=600, unit_token_cap=100).pack(units, _reasoning())
+
+    assert 0 < len(packed) < len(units)
+    assert used <= 600
+    assert estimate_tokens(json.dumps(packed)) <= used
+
+
+def test_long_content_keeps_high_signal_sentences_in_order():
+    content = (
+        "The company was founded by two friends. "
+        "Fintech demand in India grew 40% last year. "
+        "They like cricket on weekends. "
+        "Market growth is driven by UPI adoption."
+    )
+    packer = EvidencePacker(token_budget=10000, unit_token_cap=25)
+    (packed,), _ = packer.pack([_unit("ev", "Report", content)], _reasoning())
+
+    assert packed["content"] == (
+        "Fintech demand in India grew 40% last year. Market growth is driven by UPI adoption."
+    )
+
+
+def test_a_single_run_on_sentence_is_cut_at_a_word_boundary():
+    packer = EvidencePacker(token_budget=10000, unit_token_cap=10)
+    (packed,), _ = packer.pack([_unit("ev", "Report", "word " * 100)], _reasoning())
+
+    assert packed["content"].endswith("...")
+    assert not packed["content"][:-3].endswith(" ")
+    assert estimate_tokens(packed["content"]) <= 11
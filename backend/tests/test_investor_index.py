@@ -0,0 +1,87 @@
+import datetime
+import math
+
+import pytest
+
+from app.core.investor_index import InvestorIndex
+from app.schemas.analysis import EvidenceUsed
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+THIS_YEAR = datetime.date.today().year
+
+
+def _unit(title: str, investors, sector="Fintech", geography="India", stage="Seed", year=THIS_YEAR):
+    return EvidenceRecord(
+        evidence_id=f"ev_{title}",
+        source_type=SourceType.NEWS,
+        title=title,
+        source_name="Inc42",
+        published_year=year,
+        sector=sector,
+        funding_stage=stage,
+        geography=geography,
+        investors=investors,
+        content="",
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    # An empty knowledge base, so only what the test feeds in counts.
+    return InvestorIndex(data_root=str(tmp_path / "raw"))
+
+
+def test_rank_scores_sector_geography_volume_recency_and_stage(index):
+    index.observe([_unit(f"Kirana payments round {i}", ["Blume Ventures"]) for i in range(3)])
+    index.observe([_unit("Clinic chain raise", ["Old Capital"], "HealthTech", "Kenya", "Series B", THIS_YEAR - 10)])
+
+    (blume, blume_score), (old, old_score) = index.rank("Fintech", "India", "Seed")
+    assert blume.name == "Blume Ventures" and old.name == "Old Capital"
+    volume = math.log1p(3) / math.log1p(10)
+    assert blume_score == round(45 + 20 + 15 * volume + 15 + 5)
+    # No overlap and stale: only its single deal counts, floored at 5.
+    assert old_score == max(5, round(15 * math.log1p(1) / math.log1p(10)))
+    assert blume.focus_areas == ["Fintech"]
+
+
+def test_spellings_merge_and_repeated_articles_count_once(index):
+    index.observe([_unit("Seed round", ["Blume Ventures"]), _unit("Seed round", ["blume ventures."])])
+    index.observe([_unit("Another round", ["Blume Ventures"])])
+
+    ((profile, _),) = index.rank("Fintech", "India", "Seed")
+    assert len(profile.deals) == 2
+    assert profile.name == "Blume Ventures"
+
+
+def test_stored_analyses_feed_the_index(storage_files, make_analysis, index, monkeypatch):
+    import app.core.storage as module
+
+    monkeypatch.setattr(module, "investor_index", index)
+
+    def analysis(analysis_id: str, title: str, investor: str):
+        result = make_analysis(analysis_id, "u1", sector="Fintech", geography="India", stage="Seed")
+        result.evidence_used = [
+            EvidenceUsed(
+                source_type="news", title=title, source_name="Inc42", year=str(THIS_YEAR),
+                usage_reason="Funding", usage_tags=["deal-flow"], investors=[investor], geography="India",
+            )
+        ]
+        return result
+
+    storage = module.Storage()
+    storage.save_analysis(analysis("a1", "UPI startup raises seed", "Accel"))
+    assert [p.name for p, _ in index.rank("Fintech", "India", "Seed")] == ["Accel"]
+
+    # A new analysis invalidates the cached ranking.
+    storage.save_analysis(analysis("a2", "Lending startup raises seed", "Peak XV"))
+    assert {p.name for p, _ in index.rank("Fintech", "India", "Seed")} == {"Accel", "Peak XV"}
+    storage_files.stop()
+
+    # Reloading the log in another process rebuilds the same profiles;
+    # re-indexing flushed analyses adds no deals.
+    reloaded = InvestorIndex(data_root=index.data_root)
+    monkeypatch.setattr(module, "investor_index", reloaded)
+    module.Storage()
+    assert {p.name: len(p.deals) for p, _ in reloaded.rank("Fintech", "India", "Seed")} == {"Accel": 1, "Peak XV": 1}
+    assert {p.name: len(p.deals) for p, _ in index.rank("Fintech", "India", "Seed")} == {"Accel": 1, "Peak XV": 1}
@@ -0,0 +1,76 @@
+from app.core.jobs import JobManager
+from app.schemas.analysis import AnalysisRequest
+from app.schemas.job import AnalysisJob, JobStatus
+
+
+def _job(job_id, status, finished_at=None):
+    return AnalysisJob(
+        job_id=job_id,
+        status=status,
+        request=AnalysisRequest(
+            startup_description="A fintech startup", sector="Fintech", funding_stage="Seed", geography="India"
+        ),
+        created_at="2020-01-01T00:00:00Z",
+        finished_at=finished_at,
+    )
+
+
+def test_recovery_scan_drops_expired_jobs_and_compacts_log(tmp_path):
+    jobs_file = tmp_path / "jobs.jsonl"
+    manager = JobManager(jobs_file)
+    with manager._file_lock.exclusive():
+        manager._append(_job("old", JobStatus.RUNNING))
+        manager._append(_job("old", JobStatus.SUCCEEDED, finished_at="2020-01-01T00:05:00Z"))
+        manager._append(_job("queued", JobStatus.QUEUED))
+        for _ in range(150):
+            manager._append(_job("recent", JobStatus.SUCCEEDED, finished_at="2999-01-01T00:00:00Z"))
+
+    manager._recoverable_job_ids()
+    assert sorted(manager._jobs) == ["queued", "recent"]
+    assert len(jobs_file.read_bytes().splitlines()) == 2
+
+    # Another process picks up the rewritten log from scratch.
+    reader = JobManager(jobs_file)
+    reader._refresh()
+    assert sorted(reader._jobs) == ["queued", "recent"]
+
+
+def test_job_events_end_when_the_job_disappears(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import app.api.endpoints.analysis as endpoints
+    from app.config.settings import settings
+
+    snapshots = [_job("j1", JobStatus.QUEUED), _job("j1", JobStatus.QUEUED), None]
+
+    class FakeJobManager:
+        async def get(self, job_id, user_id=None):
+            return snapshots.pop(0)
+
+    monkeypatch.setattr(endpoints, "job_manager", FakeJobManager())
+    monkeypatch.setattr(settings, "ANALYSIS_JOB_POLL_SECONDS", 0)
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    with TestClient(app).stream("GET", "/jobs/j1/events") as response:
+        events = [line for line in response.iter_lines() if line.startswith("event:")]
+    assert events == ["event: queued", "event: error"]
+
+
+def test_interrupted_runs_count_and_are_capped(tmp_path, monkeypatch):
+    from app.config.settings import settings
+
+    monkeypatch.setattr(settings, "ANALYSIS_JOB_MAX_ATTEMPTS", 2)
+    manager = JobManager(tmp_path / "jobs.jsonl")
+    with manager._file_lock.exclusive():
+        manager._append(_job("j1", JobStatus.QUEUED))
+
+    for attempt in (1, 2):
+        # The process running the job dies: its lease is left to expire.
+        job = manager._transition("j1", [JobStatus.QUEUED], attempts_delta=1, status=JobStatus.RUNNING, lease_expires_at=0)
+        assert job.attempts == attempt
+        manager._recoverable_job_ids()
+
+    reader = JobManager(tmp_path / "jobs.jsonl")
+    job = reader._get("j1")
+    assert job.status == JobStatus.FAILED and job.attempts == 2
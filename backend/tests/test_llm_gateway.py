@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.core.llm_gateway import (
+    LLMGateway,
+    CircuitBreaker,
+    DeadlineExceededError,
+    request_deadline,
+)
+
+
+class _Stream:
+    # Yields one chunk, then waits forever (a slow model).
+    def __aiter__(self):
+        return self
+
+    def __init__(self):
+        self.sent = False
+
+    async def __anext__(self):
+        if not self.sent:
+            self.sent = True
+            return "chunk"
+        await asyncio.sleep(3600)
+
+
+class _Models:
+    async def generate_content_stream(self, **kwargs):
+        return _Stream()
+
+
+class _Aio:
+    models = _Models()
+
+
+class _Client:
+    aio = _Aio()
+
+
+def _half_open_gateway() -> LLMGateway:
+    gateway = LLMGateway()
+    gateway.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    gateway.breaker.record_failure()
+    gateway.breaker._opened_at -= 61
+    assert gateway.breaker.state == CircuitBreaker.HALF_OPEN
+    return gateway
+
+
+def test_closing_a_half_open_stream_releases_the_probe():
+    gateway = _half_open_gateway()
+
+    async def scenario():
+        stream = gateway.stream("chat", _Client(), model="m", contents="hi")
+        assert await stream.__anext__() == "chunk"
+        # The client disconnects: the response generator is closed mid-stream.
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert gateway.breaker.allow()
+
+
+def test_cancelling_a_half_open_stream_releases_the_probe():
+    gateway = _half_open_gateway()
+
+    async def consume():
+        async for _ in gateway.stream("chat", _Client(), model="m", contents="hi"):
+            pass
+
+    async def scenario():
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert gateway.breaker.allow()
+
+
+def test_deadline_skip_does_not_reopen_the_breaker():
+    gateway = _half_open_gateway()
+    with request_deadline(0.001):
+        with pytest.raises(DeadlineExceededError):
+            gateway._admit("chat", _Client())
+    assert gateway.breaker.state == CircuitBreaker.HALF_OPEN
+    assert gateway.breaker.allow()
+
+
+def test_cancelled_caller_does_not_orphan_the_hedged_call(monkeypatch):
+    from app.config.settings import settings
+    from app.core.llm_gateway import LatencyTracker
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 1)
+    tracker = LatencyTracker()
+    tracker.add(30)
+    calls = []
+
+    async def slow_call(**kwargs):
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        caller = asyncio.ensure_future(LLMGateway()._call_with_hedge("chat", slow_call, tracker, {}))
+        await asyncio.sleep(0.05)
+        # Cancelled while still waiting for the hedge delay.
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        (primary,) = calls
+        return primary.cancelled()
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,80 @@
+import time
+import threading
+
+import pytest
+
+from app.core.persistence import PersistenceWorker
+
+
+def _recording_worker(durability: str, flush_interval_ms: int = 0):
+    worker = PersistenceWorker(durability=durability, flush_interval_ms=flush_interval_ms)
+    calls = []
+    flushed = threading.Event()
+
+    def handler(payloads, fsync):
+        calls.append((list(payloads), fsync, threading.current_thread().name))
+        flushed.set()
+
+    worker.register("target", handler)
+    return worker, calls, flushed
+
+
+@pytest.mark.parametrize("durability, fsync", [("always", True), ("interval", True), ("none", False)])
+def test_writes_happen_on_the_worker_thread(durability, fsync):
+    worker, calls, flushed = _recording_worker(durability, flush_interval_ms=50)
+    worker.submit("target", 1)
+    assert flushed.wait(2)
+    worker.stop()
+    assert calls == [([1], fsync, "persistence-worker")]
+
+
+def test_interval_mode_group_commits():
+    worker, calls, flushed = _recording_worker("interval", flush_interval_ms=300)
+    start = time.monotonic()
+    for payload in range(3):
+        worker.submit("target", payload)
+    assert not calls
+    assert flushed.wait(2)
+    assert time.monotonic() - start >= 0.25
+    worker.stop()
+    assert calls == [([0, 1, 2], True, "persistence-worker")]
+
+
+def test_always_mode_does_not_wait_for_an_interval():
+    worker, calls, flushed = _recording_worker("always", flush_interval_ms=5000)
+    worker.submit("target", 1)
+    assert flushed.wait(1)
+    worker.stop()
+
+
+def test_stop_drains_the_queue_promptly():
+    worker, calls, _ = _recording_worker("none")
+    for payload in range(100):
+        worker.submit("target", payload)
+    start = time.monotonic()
+    worker.stop()
+    assert time.monotonic() - start < 2
+    assert [p for batch, _, _ in calls for p in batch] == list(range(100))
+
+
+def test_failed_flush_is_retried_with_the_next_batch():
+    worker = PersistenceWorker(durability="none", flush_interval_ms=0)
+    calls = []
+    disk_full = True
+
+    def handler(payloads, fsync):
+        calls.append(list(payloads))
+        if disk_full:
+            raise OSError("disk full")
+
+    worker.register("target", handler)
+    worker.submit("target", "a")
+    worker.stop()
+    assert worker.stats()["pending_retries"] == 1
+    assert worker.stats()["failed_flushes"] >= 1
+
+    disk_full = False
+    worker.submit("target", "b")
+    worker.stop()
+    assert calls[-1] == ["a", "b"]
+    assert worker.stats()["pending_retries"] == 0
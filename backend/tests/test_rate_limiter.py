@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+import app.core.rate_limiter as module
+from app.config.settings import settings
+from app.core.rate_limiter import (
+    LLMRateLimiter,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    _TokenBucket,
+    llm_priority,
+)
+
+
+class FakeClock:
+    # Stands in for the `time` module inside rate_limiter.
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(module, "time", fake)
+    monkeypatch.setattr(settings, "LLM_REQUESTS_PER_MINUTE", {})
+    monkeypatch.setattr(settings, "LLM_DEFAULT_REQUESTS_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "LLM_RATE_BURST_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", {})
+    monkeypatch.setattr(settings, "LLM_DEFAULT_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "LLM_TOTAL_CONCURRENCY", 16)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_BACKOFF_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "LLM_MIN_THROTTLE", 0.1)
+    return fake
+
+
+def test_token_bucket_refills_at_the_throttled_rate(clock):
+    bucket = _TokenBucket(per_minute=60, burst_seconds=2)
+    now = clock.monotonic()
+    assert bucket.take(now, 1.0) == 0 and bucket.take(now, 1.0) == 0
+    assert bucket.take(now, 1.0) == pytest.approx(1.0)
+    assert bucket.take(now + 0.5, 1.0) == pytest.approx(0.5)
+    assert bucket.take(now + 1.0, 1.0) == 0
+    # Half the rate: a token takes two seconds.
+    assert bucket.take(now + 1.0, 0.5) == pytest.approx(2.0)
+    # Never more than the burst capacity.
+    assert bucket.take(now + 600, 1.0) == 0 and bucket.tokens == pytest.approx(1.0)
+
+
+def test_waiters_are_served_by_priority_then_arrival(clock, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_TOTAL_CONCURRENCY", 1)
+    # Only concurrency decides here; the clock does not move.
+    monkeypatch.setattr(settings, "LLM_DEFAULT_REQUESTS_PER_MINUTE", 6000)
+    limiter = LLMRateLimiter()
+    order = []
+
+    async def call(name: str, priority: int):
+        with llm_priority(priority):
+            async with limiter.slot("report"):
+                order.append(name)
+                await asyncio.sleep(0)
+
+    async def scenario():
+        async with limiter.slot("report"):
+            tasks = [
+                asyncio.ensure_future(call("bulk-1", PRIORITY_BULK)),
+                asyncio.ensure_future(call("bulk-2", PRIORITY_BULK)),
+                asyncio.ensure_future(call("chat", PRIORITY_INTERACTIVE)),
+            ]
+            await asyncio.sleep(0)
+            assert limiter.queue_depth() == {"report": 3}
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["chat", "bulk-1", "bulk-2"]
+
+
+def test_try_acquire_never_blocks(clock, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_DEFAULT_MAX_CONCURRENCY", 1)
+    limiter = LLMRateLimiter()
+
+    assert limiter.try_acquire("report")
+    # No concurrency left.
+    assert not limiter.try_acquire("report")
+    limiter.release("report")
+
+    # Bucket (capacity 2) empty.
+    assert limiter.try_acquire("report")
+    limiter.release("report")
+    assert not limiter.try_acquire("report")
+    clock.advance(1.0)
+    assert limiter.try_acquire("report")
+    limiter.release("report")
+
+    # Paused after a 429.
+    clock.advance(60)
+    limiter.record_throttled(Exception("429 RESOURCE_EXHAUSTED"))
+    assert not limiter.try_acquire("report")
+
+
+def test_record_throttled_backs_off_and_recovers(clock):
+    limiter = LLMRateLimiter()
+    limiter._bucket("report")
+
+    assert limiter.record_throttled(Exception("429 RESOURCE_EXHAUSTED")) == 2.0
+    assert limiter.throttle == 0.5
+    assert limiter._buckets["report"].tokens == 0
+    # Consecutive 429s double the pause; the server's retryDelay wins.
+    assert limiter.record_throttled(Exception("429 RESOURCE_EXHAUSTED")) == 4.0
+    assert limiter.record_throttled(Exception("429 {'retryDelay': '7s'}")) == 7.0
+    assert limiter.throttle == 0.125
+    limiter.record_throttled(Exception("429"))
+    assert limiter.throttle == settings.LLM_MIN_THROTTLE
+
+    async def scenario():
+        waiter = asyncio.ensure_future(limiter.slot("report").__aenter__())
+        await asyncio.sleep(0)
+        assert not waiter.done()  # still paused
+        clock.advance(60)
+        limiter._dispatch()
+        await asyncio.sleep(0)
+        assert waiter.done()
+
+    asyncio.run(scenario())
+
+    # Additive increase once the backoff window has passed.
+    limiter.record_success()
+    assert limiter.throttle == pytest.approx(settings.LLM_MIN_THROTTLE + 0.05)
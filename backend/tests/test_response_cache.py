@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.orchestrator import AnalysisOrchestrator
+from app.core.response_cache import (
+    AnalysisResponseCache,
+    IdempotencyConflictError,
+    IdempotencyKeyBindings,
+    request_fingerprint,
+)
+from app.schemas.analysis import AnalysisRequest
+
+
+BODY = {
+    "startup_description": "UPI payments for kirana stores",
+    "sector": "Fintech",
+    "funding_stage": "Seed",
+    "geography": "India",
+    "user_id": "u1",
+}
+
+
+@pytest.fixture
+def cache(storage_files, monkeypatch, tmp_path):
+    import app.core.log_cache as log_cache
+    import app.core.response_cache as module
+    import app.core.storage as storage_module
+
+    monkeypatch.setattr(log_cache, "persistence_worker", storage_files)
+    monkeypatch.setattr(module, "IDEMPOTENCY_KEYS_FILE", tmp_path / "idempotency_keys.jsonl")
+    monkeypatch.setattr(module, "IDEMPOTENCY_KEYS_LOCK_FILE", tmp_path / ".idempotency_keys.lock")
+    monkeypatch.setattr(module, "storage", storage_module.Storage())
+    return AnalysisResponseCache(ttl_seconds=3600, bindings=IdempotencyKeyBindings(capacity=100))
+
+
+@pytest.fixture
+def client(cache, monkeypatch, make_analysis):
+    import app.api.endpoints.analysis as endpoints
+    import app.core.response_cache as module
+
+    monkeypatch.setattr(endpoints, "storage", module.storage)
+    monkeypatch.setattr(endpoints, "response_cache", cache)
+    runs = []
+
+    class FakeOrchestrator:
+        async def run_analysis(self, request):
+            runs.append(request)
+            return make_analysis(
+                f"a{len(runs)}", request.user_id, request_fingerprint=request_fingerprint(request)
+            )
+
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    app.dependency_overrides[AnalysisOrchestrator] = FakeOrchestrator
+    test_client = TestClient(app)
+    test_client.runs = runs
+    return test_client
+
+
+def test_fingerprint_ignores_case_whitespace_and_user():
+    base = AnalysisRequest(**BODY)
+    same = AnalysisRequest(**{**BODY, "sector": "  fintech ", "startup_description": "UPI  payments for\nKirana stores", "user_id": "u2"})
+    other = AnalysisRequest(**{**BODY, "funding_stage": "Series A"})
+    assert request_fingerprint(base) == request_fingerprint(same)
+    assert request_fingerprint(base) != request_fingerprint(other)
+
+
+def test_stored_analysis_expires_after_ttl(cache, make_analysis):
+    import app.core.response_cache as module
+
+    request = AnalysisRequest(**BODY)
+    old = (datetime.datetime.utcnow() - datetime.timedelta(hours=2)).isoformat() + "Z"
+    module.storage.save_analysis(make_analysis("old", "u1", old, request_fingerprint=request_fingerprint(request)))
+    assert cache.lookup(request) is None
+    module.storage.save_analysis(make_analysis("new", "u1", request_fingerprint=request_fingerprint(request)))
+    assert cache.lookup(request).analysis_id == "new"
+
+
+def test_resubmission_is_served_unless_bypassed(client):
+    assert client.post("/analyze", json=BODY).headers["X-Cache"] == "MISS"
+    hit = client.post("/analyze", json=BODY)
+    assert hit.headers["X-Cache"] == "HIT" and hit.json()["analysis_id"] == "a1"
+
+    assert client.post("/analyze?refresh=true", json=BODY).headers["X-Cache"] == "MISS"
+    assert client.post("/analyze", json=BODY, headers={"Cache-Control": "no-cache"}).headers["X-Cache"] == "MISS"
+    assert len(client.runs) == 3
+
+
+def test_idempotency_key_reused_for_a_different_body_conflicts(client):
+    assert client.post("/analyze", json=BODY, headers={"Idempotency-Key": "k1"}).status_code == 200
+    other = client.post("/analyze", json={**BODY, "sector": "Health"}, headers={"Idempotency-Key": "k1"})
+    assert other.status_code == 422
+    assert len(client.runs) == 1
+
+
+def test_idempotency_key_first_served_from_the_fingerprint_is_bound(client):
+    client.post("/analyze", json=BODY)
+    hit = client.post("/analyze", json=BODY, headers={"Idempotency-Key": "k1"})
+    assert hit.headers["X-Cache"] == "HIT"
+    other = client.post("/analyze", json={**BODY, "sector": "Health"}, headers={"Idempotency-Key": "k1"})
+    assert other.status_code == 422
+    assert len(client.runs) == 1
+
+
+def test_concurrent_duplicates_share_one_run(cache):
+    runs = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run():
+            runs.append(1)
+            await release.wait()
+            return "result"
+
+        request = AnalysisRequest(**BODY)
+        first = asyncio.ensure_future(cache.get_or_run(request, "k1", run))
+        second = asyncio.ensure_future(cache.get_or_run(request, "k1", run))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyConflictError):
+            await cache.get_or_run(AnalysisRequest(**{**BODY, "sector": "Health"}), "k1", run)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == ["result", "result"]
+    assert runs == [1]
@@ -0,0 +1,72 @@
+import asyncio
+
+from app.core.evidence_cache import EvidenceCache
+from app.core.retrieval_cache import RetrievalCache
+from app.rag.retriever import Retriever
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+def _unit(title: str) -> EvidenceRecord:
+    return EvidenceRecord(
+        evidence_id=f"ev_{title}",
+        source_type=SourceType.NEWS,
+        title=title,
+        source_name="Inc42",
+        published_year=2024,
+        sector="Fintech",
+        geography="India",
+        content=f"{title} raised a seed round.",
+    )
+
+
+def _retriever(tmp_path, monkeypatch):
+    import app.core.evidence_cache as evidence_module
+    import app.core.retrieval_cache as retrieval_module
+    import app.rag.retriever as retriever_module
+
+    monkeypatch.setattr(evidence_module, "EVIDENCE_CACHE_FILE", tmp_path / "evidence.jsonl")
+    monkeypatch.setattr(evidence_module, "EVIDENCE_CACHE_LOCK_FILE", tmp_path / ".evidence.lock")
+    monkeypatch.setattr(retrieval_module, "RETRIEVAL_CACHE_FILE", tmp_path / "retrieval.jsonl")
+    monkeypatch.setattr(retrieval_module, "RETRIEVAL_CACHE_LOCK_FILE", tmp_path / ".retrieval.lock")
+    evidence = EvidenceCache(capacity=100)
+    monkeypatch.setattr(retriever_module, "evidence_cache", evidence)
+    monkeypatch.setattr(retrieval_module, "evidence_cache", evidence)
+    monkeypatch.setattr(retriever_module, "retrieval_cache", RetrievalCache(capacity=10, ttl_seconds=3600))
+
+    retriever = Retriever.__new__(Retriever)
+    retriever.vector_store = None
+    retriever.data_root = str(tmp_path / "raw")
+    searches = []
+
+    async def generative(sector, geography, stage, description=""):
+        searches.append(description)
+        return [_unit(f"web result {len(searches)}")]
+
+    retriever._generative_retrieval = generative
+    return retriever, searches
+
+
+def test_described_analyses_never_share_the_combo_web_tier(tmp_path, monkeypatch):
+    retriever, searches = _retriever(tmp_path, monkeypatch)
+
+    async def scenario():
+        first = await retriever.retrieve_relevant_evidence("Fintech", "India", "Seed", "payments for kiranas")
+        second = await retriever.retrieve_relevant_evidence("Fintech", "India", "Seed", "crypto lending")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert searches == ["payments for kiranas", "crypto lending"]
+    assert first[0].title != second[0].title
+
+
+def test_description_free_retrieval_reuses_the_combo_web_tier(tmp_path, monkeypatch):
+    retriever, searches = _retriever(tmp_path, monkeypatch)
+
+    async def scenario():
+        await retriever.retrieve_relevant_evidence("Fintech", "India", "Seed")
+        await retriever.retrieve_relevant_evidence("fintech", " India", "seed")
+        return await retriever.retrieve_relevant_evidence("Fintech", "India", "Seed", "payments for kiranas")
+
+    described = asyncio.run(scenario())
+    assert searches == ["", "payments for kiranas"]
+    assert described[0].title == "web result 2"
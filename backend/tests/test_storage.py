@@ -0,0 +1,63 @@
+from app.schemas.analysis import EvidenceUsed
+
+
+def _storage():
+    # Constructed after the storage_files fixture patched the paths.
+    import app.core.storage as module
+
+    return module.Storage()
+
+
+def test_saved_analyses_reload_in_a_new_instance(storage_files, make_analysis):
+    writer = _storage()
+    first = make_analysis("a1", "u1", request_fingerprint="req:1")
+    first.evidence_used = [
+        EvidenceUsed(source_type="news", title="Seed round", source_name="Inc42", year="2024", usage_reason="Market")
+    ]
+    writer.save_analysis(first)
+    writer.save_analysis(make_analysis("a2", "u2"))
+    storage_files.stop()
+
+    reader = _storage()
+    assert reader.get_stats("u1")["total_analyses"] == 1
+    # Only the index is loaded; documents are parsed when accessed.
+    assert not reader._hydrated
+    assert reader.get_analysis_by_id("a1") == first
+    assert list(reader._hydrated) == ["a1"]
+    assert reader.get_analysis_by_id("a1", user_id="u2") is None
+    assert reader.find_by_request_key("u1", "req:1").analysis_id == "a1"
+    assert [a.analysis_id for a in reader.get_all_analyses()] == ["a1", "a2"]
+    assert reader.get_all_evidence("u1")[0]["title"] == "Seed round"
+
+
+def test_reader_picks_up_appends_from_another_process(storage_files, make_analysis):
+    reader = _storage()
+    writer = _storage()
+    assert reader.get_stats()["total_analyses"] == 0
+
+    writer.save_analysis(make_analysis("a1", "u1", request_fingerprint="req:1"))
+    storage_files.stop()
+    assert reader.get_analysis_by_id("a1").analysis_id == "a1"
+    assert reader.find_by_request_key("u1", "req:1").analysis_id == "a1"
+
+    writer.save_analysis(make_analysis("a2", "u1"))
+    storage_files.stop()
+    assert [a.analysis_id for a in reader.get_all_analyses("u1")] == ["a1", "a2"]
+
+
+def test_reader_reloads_a_log_replaced_under_a_new_inode(storage_files, make_analysis, tmp_path):
+    import json
+    import os
+
+    reader = _storage()
+    reader.save_analysis(make_analysis("old", "u1", request_fingerprint="req:old"))
+    storage_files.stop()
+    assert reader.get_analysis_by_id("old") is not None
+
+    replacement = tmp_path / "replacement.jsonl"
+    replacement.write_text(json.dumps(make_analysis("new", "u1").model_dump()) + "\n")
+    os.replace(replacement, tmp_path / "analyses.jsonl")
+
+    assert [a.analysis_id for a in reader.get_all_analyses()] == ["new"]
+    assert reader.get_analysis_by_id("old") is None
+    assert reader.find_by_request_key("u1", "req:old") is None
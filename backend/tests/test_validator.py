@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from app.reasoning.batch import validate_batch
+from app.reasoning.rules import rule_registry
+from app.reasoning.scoring import blend_score
+from app.reasoning.validator import Validator
+from app.schemas.evidence import EvidenceRecord, SourceType
+
+
+TAGS = [
+    "market-sizing", "funding-trends", "market-growth", "demand", "sector-opportunity",
+    "regulation", "policy-impact", "favorable", "legal", "government-grant", "compliance",
+    "licensing", "valuation", "exit-metrics", "deal-flow", "investor-sentiment",
+    "active-investors", "ecosystem", "maturity", "unrelated", "proprietary-analysis",
+]
+GEOGRAPHIES = ["India", "India - Pan India", "Southeast Asia", "Global", "global", "Kenya", ""]
+SECTORS = ["Fintech", "Payments", "HealthTech", "AgriTech", "General"]
+
+
+def _legacy_validate(evidence, geography):
+    # The hard-coded claims the default pack replaced, as (supported, ratio).
+    geo_norm = geography.lower().split("-")[0].strip()
+
+    def tagged(ev, tags):
+        return any(tag in ev.usage_tags for tag in tags)
+
+    checks = [
+        [ev for ev in evidence if ev.source_type in (SourceType.NEWS, SourceType.DATASET)
+         and tagged(ev, ["market-sizing", "funding-trends", "market-growth", "demand", "sector-opportunity"])],
+        [ev for ev in evidence if ev.source_type == SourceType.POLICY
+         and (geo_norm in ev.geography.lower() or ev.geography.lower() == "global")
+         and tagged(ev, ["regulation", "policy-impact", "favorable", "legal", "government-grant"])],
+        [ev for ev in evidence if tagged(ev, ["valuation", "exit-metrics", "funding-trends", "deal-flow"])],
+        [ev for ev in evidence if len(ev.investors) > 0 or tagged(ev, ["investor-sentiment", "active-investors"])],
+        [ev for ev in evidence if tagged(ev, ["ecosystem", "maturity"]) or len(evidence) > 5],
+    ]
+    supported = [bool(units) for units in checks]
+    return supported, sum(supported) / len(supported)
+
+
+def _random_evidence(rng: random.Random, count: int):
+    return [
+        EvidenceRecord(
+            evidence_id=f"ev_{i}",
+            source_type=rng.choice(list(SourceType)),
+            title=f"Unit {i}",
+            source_name="Source",
+            published_year=2024,
+            sector="Fintech",
+            geography=rng.choice(GEOGRAPHIES),
+            investors=rng.sample(["Blume", "Accel", "Peak XV"], rng.randint(0, 2)) if rng.random() < 0.3 else [],
+            content="",
+            usage_tags=rng.sample(TAGS, rng.randint(0, 3)),
+        )
+        for i in range(count)
+    ]
+
+
+def test_batch_validation_matches_validator_on_random_inputs():
+    rng = random.Random(1234)
+    inputs = [
+        (_random_evidence(rng, rng.randint(0, 9)), rng.choice(SECTORS), rng.choice(GEOGRAPHIES[:4]), "Seed")
+        for _ in range(2000)
+    ]
+    investor_scores = [[rng.randint(0, 100) for _ in range(rng.randint(0, 3))] for _ in inputs]
+    batch = validate_batch(inputs)
+    blended = batch.blended_scores(
+        [sum(s) / len(s) if s else 50 for s in investor_scores], [len(evidence) for evidence, _, _, _ in inputs]
+    )
+    validator = Validator()
+
+    for i, (evidence, sector, geography, stage) in enumerate(inputs):
+        result = validator.validate(evidence, sector, geography, stage)
+        assert batch.support_ratio[i] == pytest.approx(result.support_ratio)
+        assert batch.confidence[i] == result.confidence_level
+        rules = rule_registry.for_sector(sector).rules
+        claims = {
+            r.claim.format(sector=sector, geography=geography, funding_stage=stage)
+            for r in rules if r.rule_id in batch.supported[i]
+        }
+        assert claims == set(result.supported_claims)
+
+        assert blended[i] == blend_score(investor_scores[i], result.support_ratio, len(evidence))
+
+        if sector in ("HealthTech", "AgriTech", "General"):
+            supported, ratio = _legacy_validate(evidence, geography)
+            assert [r.claim.format(sector=sector, geography=geography, funding_stage=stage) in result.supported_claims
+                    for r in rules] == supported
+            assert result.support_ratio == pytest.approx(ratio)
+
+
+def test_fintech_pack_extends_the_default_policy_rule():
+    default = {r.rule_id: r for r in rule_registry.for_sector("HealthTech").rules}
+    fintech_set = rule_registry.for_sector("Digital Payments")
+    fintech = {r.rule_id: r for r in fintech_set.rules}
+
+    assert fintech_set.packs == ("default", "fintech")
+    assert list(fintech) == list(default)
+    policy = fintech["policy-support"]
+    assert {"compliance", "licensing"} <= set(policy.tags)
+    # Fields the pack does not set come from default.yaml.
+    assert policy.claim == default["policy-support"].claim
+    assert policy.geography == "match" and policy.source_types == [SourceType.POLICY]
+
+    licence = EvidenceRecord(
+        evidence_id="ev_licence",
+        source_type=SourceType.POLICY,
+        title="Payment aggregator licensing rules",
+        source_name="RBI",
+        published_year=2024,
+        sector="Fintech",
+        geography="India",
+        content="",
+        usage_tags=["licensing"],
+    )
+    fintech_result = Validator().validate([licence], "Fintech", "India", "Seed")
+    health_result = Validator().validate([licence], "HealthTech", "India", "Seed")
+    assert "Regulatory framework and policy support in India" in fintech_result.supported_claims
+    assert "Regulatory framework and policy support in India" not in health_result.supported_claims
+
+
+def test_override_pack_can_disable_a_rule(tmp_path, monkeypatch):
+    from app.config.settings import settings
+
+    (tmp_path / "fintech.yaml").write_text(
+        "sectors: [fintech]\nrules:\n  - id: investor-interest\n    enabled: false\n"
+    )
+    monkeypatch.setattr(settings, "VALIDATOR_RULE_PACKS_DIR", str(tmp_path))
+    rule_registry.reload()
+    try:
+        ids = [r.rule_id for r in rule_registry.for_sector("Fintech").rules]
+        assert "investor-interest" not in ids and "policy-support" in ids
+        assert "investor-interest" in [r.rule_id for r in rule_registry.for_sector("HealthTech").rules]
+    finally:
+        monkeypatch.undo()
+        rule_registry.reload()
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.data.evidence_store import EvidenceStore
+from app.data import vector_snapshot
+from app.data.vector_snapshot import (
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+    load_snapshot,
+    loaded_snapshot_hash,
+)
+
+
+IDS = ["ev_a", "ev_b", "ev_c"]
+
+
+@pytest.fixture
+def source(tmp_path):
+    # Explicit embeddings, so no embedding model is needed.
+    store = EvidenceStore(str(tmp_path / "source_db"))
+    store.collection.upsert(
+        ids=IDS,
+        documents=["Seed round for a UPI startup.", "Health policy update.", "Agri lending dataset."],
+        metadatas=[{"sector": "Fintech", "published_year": 2024}, {"sector": "HealthTech"}, None],
+        embeddings=np.random.default_rng(7).random((3, 8), dtype=np.float32),
+    )
+    return store
+
+
+def _contents(store):
+    page = store.collection.get(ids=IDS, include=["embeddings", "documents", "metadatas"])
+    order = np.argsort(page["ids"])
+    return (
+        [page["ids"][i] for i in order],
+        [page["documents"][i] for i in order],
+        [page["metadatas"][i] for i in order],
+        np.asarray(page["embeddings"])[order],
+    )
+
+
+def test_export_import_round_trip(source, tmp_path):
+    path = str(tmp_path / "evidence.fsv")
+    manifest = export_snapshot(source, path)
+    assert manifest["count"] == 3 and manifest["dim"] == 8
+
+    target = EvidenceStore(str(tmp_path / "target_db"))
+    assert loaded_snapshot_hash(target) is None
+    imported = import_snapshot(target, path)
+
+    assert imported["sha256"] == manifest["sha256"]
+    assert loaded_snapshot_hash(target) == manifest["sha256"]
+    ids, documents, metadatas, embeddings = _contents(target)
+    expected = _contents(source)
+    assert (ids, documents, metadatas) == expected[:3]
+    np.testing.assert_array_equal(embeddings, expected[3])
+
+
+def test_corrupted_snapshot_is_rejected(source, tmp_path):
+    path = tmp_path / "evidence.fsv"
+    export_snapshot(source, str(path))
+    data = bytearray(path.read_bytes())
+    data[-5] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+    with pytest.raises(SnapshotError):
+        import_snapshot(EvidenceStore(str(tmp_path / "target_db")), str(path))
+
+
+def test_snapshot_from_another_embedding_space_is_rejected(source, tmp_path, monkeypatch):
+    path = str(tmp_path / "evidence.fsv")
+    export_snapshot(source, path)
+    monkeypatch.setattr(vector_snapshot, "embedding_space", lambda store: "google:models/text-embedding-004")
+
+    with pytest.raises(SnapshotError, match="embedding"):
+        import_snapshot(EvidenceStore(str(tmp_path / "target_db")), path)
@@ -13,7 +13,7 @@ import {
   BarChart3,
   Clock,
 } from "lucide-react";
-import { getStats, getHistory } from "../services/api";
+import { getStats, getHistory, translateTexts } from "../services/api";
 import type { AnalysisResponse } from "../services/api";
 import { useLanguage } from "../contexts/LanguageContext";
 import { supabase } from "../utils/supabase";
@@ -35,26 +35,19 @@ export default function Dashboard() {
   const translateSummaries = async (analyses: AnalysisResponse[]) => {
     if (language === 'en') return;
 
-    const newTranslations: Record<string, string> = { ...translatedSummaries };
-    let hasNew = false;
-
-    await Promise.all(analyses.map(async (analysis) => {
-      // If summary is in English but UI is not, and we haven't translated it yet
-      if (!newTranslations[analysis.analysis_id]) {
-        try {
-          const { translateText } = await import("../services/api");
-          const translated = await translateText(analysis.startup_summary, language);
-          newTranslations[analysis.analysis_id] = translated;
-          hasNew = true;
-        } catch (e) {
-          console.error("Translation failed for", analysis.analysis_id, e);
-        }
-      }
-    }));
+    // Summaries not translated yet, in one /translate/batch request.
+    const pending = analyses.filter((analysis) => !translatedSummaries[analysis.analysis_id]);
+    if (pending.length === 0) return;
 
-    if (hasNew) {
-      setTranslatedSummaries(newTranslations);
-    }
+    const translated = await translateTexts(
+      pending.map((analysis) => analysis.startup_summary),
+      language
+    );
+    const newTranslations: Record<string, string> = { ...translatedSummaries };
+    pending.forEach((analysis, i) => {
+      newTranslations[analysis.analysis_id] = translated[i] ?? analysis.startup_summary;
+    });
+    setTranslatedSummaries(newTranslations);
   };
 
   useEffect(() => {
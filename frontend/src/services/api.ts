@@ -123,6 +123,28 @@ export const translateText = async (
   }
 };
 
+export const translateTexts = async (
+  texts: string[],
+  targetLanguage: string
+): Promise<string[]> => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/translate/batch`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ texts, target_language: targetLanguage }),
+    });
+
+    if (!response.ok) return texts;
+    const data = await response.json();
+    return data.translations || texts;
+  } catch (error) {
+    console.error("Translation error:", error);
+    return texts;
+  }
+};
+
 export interface ChatRequest {
   message: string;
   analysis_id?: string;